@@ -15,12 +15,36 @@
 ##You should have received a copy of the GNU Lesser General Public License
 ##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
 
+import gzip
+import hashlib
+import io
+import json
+import logging
+import mmap
 import os
+import re
+import struct
+import tempfile
+import time
+from collections import Counter, namedtuple
 
-from OCC.Core.TopoDS import TopoDS_Shape
+try:
+    import resource
+    HAVE_RESOURCE = True
+except ImportError:  # windows
+    HAVE_RESOURCE = False
+
+try:
+    import zstandard
+    HAVE_ZSTD = True
+except ImportError:
+    HAVE_ZSTD = False
+
+from OCC.Core.TopoDS import TopoDS_Shape, TopoDS_Iterator
 from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
 from OCC.Core.StlAPI import StlAPI_Reader, StlAPI_Writer
 from OCC.Core.BRep import BRep_Builder
+from OCC.Core.BRepTools import BRepTools_ShapeSet, breptools_Read, breptools_Write
 from OCC.Core.TopoDS import TopoDS_Compound
 from OCC.Core.IGESControl import IGESControl_Reader, IGESControl_Writer
 from OCC.Core.STEPControl import STEPControl_Reader, STEPControl_Writer, STEPControl_AsIs
@@ -28,40 +52,366 @@ from OCC.Core.Interface import Interface_Static_SetCVal
 from OCC.Core.IFSelect import IFSelect_RetDone, IFSelect_ItemsByEntity
 from OCC.Core.TDocStd import TDocStd_Document
 from OCC.Core.XCAFDoc import (XCAFDoc_DocumentTool_ShapeTool,
-                              XCAFDoc_DocumentTool_ColorTool)
+                              XCAFDoc_DocumentTool_ColorTool,
+                              XCAFDoc_DocumentTool_LayerTool)
 from OCC.Core.STEPCAFControl import STEPCAFControl_Reader
 from OCC.Core.TDF import TDF_LabelSequence, TDF_Label, TDF_Tool
 from OCC.Core.TDataStd import TDataStd_Name, TDataStd_Name_GetID
 from OCC.Core.TCollection import TCollection_ExtendedString, TCollection_AsciiString
 from OCC.Core.Quantity import Quantity_Color, Quantity_TOC_RGB
 from OCC.Core.TopLoc import TopLoc_Location
-from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_Transform
 
+from OCC.Extend.ParallelUtils import serialize_shape, deserialize_shape
+from OCC.Extend.ProgressUtils import OperationCancelled
 from OCC.Extend.TopologyUtils import TopologyExplorer
 
+log = logging.getLogger(__name__)
+
+
+##############
+# Statistics #
+##############
+class ExchangeStats(object):
+    """ Measures of a read or a write, filled by the functions of this
+    module that take a stats argument. They are also logged at the DEBUG
+    level, and only measured when stats is given or DEBUG is enabled.
+
+    stats = ExchangeStats()
+    shape = read_step_file("part.stp", stats=stats)
+    record = stats.as_dict()
+
+    Warnings and fails are counted by message, separately for the loading
+    of the file (syntactic checks) and the transfer to shapes.
+    """
+    def __init__(self):
+        self.filename = None
+        self.format = None
+        self.operation = None
+        self.from_cache = False
+        self.parse_time = 0.
+        self.transfer_time = 0.
+        self.write_time = 0.
+        self.number_of_entities = 0
+        self.number_of_roots = 0
+        self.shape_counts = Counter()
+        self.load_warnings = Counter()
+        self.load_fails = Counter()
+        self.transfer_warnings = Counter()
+        self.transfer_fails = Counter()
+
+    @property
+    def number_of_warnings(self):
+        return sum(self.load_warnings.values()) + sum(self.transfer_warnings.values())
+
+    @property
+    def number_of_fails(self):
+        return sum(self.load_fails.values()) + sum(self.transfer_fails.values())
+
+    def as_dict(self):
+        """ the measures as a dict of numbers, strings and dicts, that can
+        be stored as JSON
+        """
+        return {"filename": self.filename,
+                "format": self.format,
+                "operation": self.operation,
+                "from_cache": self.from_cache,
+                "parse_time": self.parse_time,
+                "transfer_time": self.transfer_time,
+                "write_time": self.write_time,
+                "number_of_entities": self.number_of_entities,
+                "number_of_roots": self.number_of_roots,
+                "shape_counts": dict(self.shape_counts),
+                "load_warnings": dict(self.load_warnings),
+                "load_fails": dict(self.load_fails),
+                "transfer_warnings": dict(self.transfer_warnings),
+                "transfer_fails": dict(self.transfer_fails)}
+
+    def __str__(self):
+        return ("%s %s of %s%s: parse %.3fs, transfer %.3fs, write %.3fs, %i entities, "
+                "%i roots, %i solids, %i faces, %i warnings, %i fails" %
+                (self.format, self.operation, self.filename,
+                 " (from cache)" if self.from_cache else "",
+                 self.parse_time, self.transfer_time, self.write_time,
+                 self.number_of_entities, self.number_of_roots,
+                 self.shape_counts["solids"], self.shape_counts["faces"],
+                 self.number_of_warnings, self.number_of_fails))
+
+
+def _exchange_stats(stats, filename, file_format, operation):
+    """ returns the ExchangeStats to fill: stats if given, a new one if
+    DEBUG messages are logged, None otherwise
+    """
+    if stats is None:
+        if not log.isEnabledFor(logging.DEBUG):
+            return None
+        stats = ExchangeStats()
+    stats.filename = filename
+    stats.format = file_format
+    stats.operation = operation
+    return stats
+
+
+def _count_checks(check_iterator, warnings, fails):
+    check_iterator.Start()
+    while check_iterator.More():
+        check = check_iterator.Value()
+        for i in range(1, check.NbWarnings() + 1):
+            warnings[check.CWarning(i)] += 1
+        for i in range(1, check.NbFails() + 1):
+            fails[check.CFail(i)] += 1
+        check_iterator.Next()
+
+
+def _load_stats(stats, reader, parse_time):
+    """ fills stats after the XSControl_Reader.ReadFile call
+    """
+    stats.parse_time = parse_time
+    model = reader.Model()
+    if model is not None:
+        stats.number_of_entities = model.NbEntities()
+    _count_checks(reader.WS().ModelCheckList(False), stats.load_warnings, stats.load_fails)
+
+
+def _transfer_stats(stats, reader, transfer_time):
+    """ fills stats once all the roots of the reader are transferred
+    """
+    stats.transfer_time = transfer_time
+    stats.number_of_roots = reader.NbRootsForTransfer()
+    process = reader.WS().TransferReader().TransientProcess()
+    if process is not None:
+        _count_checks(process.CheckList(False), stats.transfer_warnings,
+                      stats.transfer_fails)
+
+
+def _log_stats(stats, shapes):
+    """ adds the sub-shapes of shapes to stats, then logs them
+    """
+    if stats is None:
+        return
+    for a_shape in shapes:
+        stats.shape_counts.update(TopologyExplorer(a_shape).counts())
+    log.debug("%s", stats)
+
+
+################
+# Import cache #
+################
+class ImportCache(object):
+    """ An on-disk cache of imported shapes, keyed by the content of the
+    file and by the reader options, so that a file read again (even
+    renamed or copied) is loaded from its serialized BRep instead of being
+    parsed and transferred again. When the total size of the cache exceeds
+    max_size, the least recently used entries are removed.
+
+    cache = ImportCache("/var/cache/occ_imports", max_size=10 * 2**30)
+    shape = read_step_file("part.stp", cache=cache)
+
+    An entry is the serialized BRep of the shapes, as bytes, with optional
+    metadata stored as JSON (names, colors...): nothing in the cache is
+    ever executed, so that the directory can be shared between users.
+    """
+    _FORMAT_VERSION = 2
+    _SUFFIX = ".occcache"
+    # magic, format version, size of the JSON metadata
+    _HEADER = struct.Struct("<8sII")
+    _MAGIC = b"OCCCACHE"
+
+    def __init__(self, directory, max_size=2**30):
+        """
+        directory: the folder where entries are stored, created if needed
+        max_size: optional, the maximum size of the cache, in bytes. 1GB by default.
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.max_size = max_size
+
+    def key(self, filename, **options):
+        """ the hexadecimal sha256 digest of the file content and options
+        """
+        digest = hashlib.sha256()
+        with open(filename, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        digest.update(repr((self._FORMAT_VERSION, sorted(options.items()))).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self._SUFFIX)
+
+    def get_entry(self, key, decode=None):
+        """ returns (data, metadata) for key, data being decode(bytes) if
+        decode is given. None if there is no such entry, or if it cannot be
+        read or decoded: a corrupt or stale entry is a cache miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            magic, version, metadata_size = self._HEADER.unpack_from(content, 0)
+            if magic != self._MAGIC or version != self._FORMAT_VERSION:
+                return None
+            start = self._HEADER.size
+            metadata = json.loads(content[start:start + metadata_size].decode("utf-8"))
+            data = content[start + metadata_size:]
+            if decode is not None:
+                data = decode(data)
+        except Exception:
+            return None
+        # the modification time is the last use time, for the LRU eviction
+        try:
+            os.utime(path, None)
+        except OSError:  # removed by another process
+            pass
+        return data, metadata
+
+    def get(self, key, decode=None):
+        """ returns the bytes stored for key, or decode(bytes), None on a miss
+        """
+        entry = self.get_entry(key, decode)
+        if entry is None:
+            return None
+        return entry[0]
+
+    def put(self, key, data, metadata=None):
+        """ stores bytes for key, with optional metadata that can be
+        serialized to JSON
+        """
+        encoded_metadata = json.dumps(metadata).encode("utf-8")
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as f:
+                f.write(self._HEADER.pack(self._MAGIC, self._FORMAT_VERSION,
+                                          len(encoded_metadata)))
+                f.write(encoded_metadata)
+                f.write(data)
+            # atomic, so that concurrent readers never see a partial entry
+            os.replace(temporary_path, self._path(key))
+        except BaseException:
+            if os.path.isfile(temporary_path):
+                os.remove(temporary_path)
+            raise
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self._SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:  # removed by another process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self):
+        """ the total size of the entries, in bytes
+        """
+        return sum(entry[1] for entry in self._entries())
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total_size = sum(entry[1] for entry in entries)
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            os.remove(path)
+
+
+def _shapes_to_bytes(shapes):
+    """ serializes a list of shapes at once, in a compound, so that the
+    TShapes they share are only stored once
+    """
+    builder = BRep_Builder()
+    compound = TopoDS_Compound()
+    builder.MakeCompound(compound)
+    for a_shape in shapes:
+        builder.Add(compound, a_shape)
+    return serialize_shape(compound)
+
+
+def _shapes_from_bytes(data):
+    shapes = []
+    iterator = TopoDS_Iterator(deserialize_shape(data))
+    while iterator.More():
+        shapes.append(iterator.Value())
+        iterator.Next()
+    return shapes
+
 
 ##########################
 # Step import and export #
 ##########################
-def read_step_file(filename, return_as_shapes=False, verbosity=True):
+def read_step_file(filename, return_as_shapes=False, verbosity=False, cache=None,
+                   progress=None, stats=None):
     """ read the STEP file and returns a compound
     filename: the file path
     return_as_shapes: optional, False by default. If True returns a list of shapes,
                       else returns a single compound
-    verbosity: optional, False by default.
+    verbosity: optional, False by default. If True, the load and transfer
+               check lists are printed to the console by OpenCASCADE. Use
+               stats, or the DEBUG log, to get the counts of warnings.
+    cache: optional, an ImportCache. If the same file was already read, the
+           shape is loaded from the cache.
+    progress: optional, an OCC.Extend.ProgressUtils.ProgressIndicator,
+              notified after the parsing of the file and after the transfer
+    stats: optional, an ExchangeStats filled with the measures of the import
     """
     if not os.path.isfile(filename):
         raise FileNotFoundError("%s not found." % filename)
 
+    stats = _exchange_stats(stats, filename, "step", "read")
+    if cache is not None:
+        key = cache.key(filename, reader="step")
+        shape_to_return = cache.get(key, deserialize_shape)
+        if shape_to_return is not None:
+            if stats is not None:
+                stats.from_cache = True
+        else:
+            shape_to_return = _read_step_file(filename, verbosity, progress, stats)
+            cache.put(key, serialize_shape(shape_to_return))
+    else:
+        shape_to_return = _read_step_file(filename, verbosity, progress, stats)
+    _log_stats(stats, [shape_to_return])
+    if return_as_shapes:
+        shape_to_return = TopologyExplorer(shape_to_return).solids()
+
+    return shape_to_return
+
+
+def _read_step_file(filename, verbosity, progress=None, stats=None):
     step_reader = STEPControl_Reader()
+    if progress is not None:
+        progress.start("read", 1)
+    start = time.perf_counter()
     status = step_reader.ReadFile(filename)
+    if stats is not None and status == IFSelect_RetDone:
+        _load_stats(stats, step_reader, time.perf_counter() - start)
+    if progress is not None:
+        progress.finish()
 
     if status == IFSelect_RetDone:  # check status
         if verbosity:
             failsonly = False
             step_reader.PrintCheckLoad(failsonly, IFSelect_ItemsByEntity)
             step_reader.PrintCheckTransfer(failsonly, IFSelect_ItemsByEntity)
+        if progress is not None:
+            progress.start("transfer", 1)
+        start = time.perf_counter()
         transfer_result = step_reader.TransferRoot(1)
+        if stats is not None:
+            _transfer_stats(stats, step_reader, time.perf_counter() - start)
+        if progress is not None:
+            progress.finish()
         if not transfer_result:
             raise AssertionError("Transfer failed.")
         _nbs = step_reader.NbShapes()
@@ -72,17 +422,15 @@ def read_step_file(filename, return_as_shapes=False, verbosity=True):
             raise AssertionError("Shape is null.")
     else:
         raise AssertionError("Error: can't read file.")
-    if return_as_shapes:
-        shape_to_return = TopologyExplorer(shape_to_return).solids()
-
     return shape_to_return
 
 
-def write_step_file(a_shape, filename, application_protocol="AP203"):
+def write_step_file(a_shape, filename, application_protocol="AP203", stats=None):
     """ exports a shape to a STEP file
     a_shape: the topods_shape to export (a compound, a solid etc.)
     filename: the filename
     application protocol: "AP203" or "AP214"
+    stats: optional, an ExchangeStats filled with the measures of the export
     """
     # a few checks
     if a_shape.IsNull():
@@ -90,14 +438,22 @@ def write_step_file(a_shape, filename, application_protocol="AP203"):
     if application_protocol not in ["AP203", "AP214IS"]:
         raise AssertionError("application_protocol must be either AP203 or AP214IS. You passed %s." % application_protocol)
     if os.path.isfile(filename):
-        print("Warning: %s file already exists and will be replaced" % filename)
+        log.debug("%s file already exists and will be replaced", filename)
+    stats = _exchange_stats(stats, filename, "step", "write")
     # creates and initialise the step exporter
     step_writer = STEPControl_Writer()
     Interface_Static_SetCVal("write.step.schema", application_protocol)
 
     # transfer shapes and write file
+    start = time.perf_counter()
     step_writer.Transfer(a_shape, STEPControl_AsIs)
+    transfer_end = time.perf_counter()
     status = step_writer.Write(filename)
+    if stats is not None:
+        stats.transfer_time = transfer_end - start
+        stats.write_time = time.perf_counter() - transfer_end
+        stats.number_of_entities = step_writer.Model().NbEntities()
+        _log_stats(stats, [a_shape])
 
     if not status == IFSelect_RetDone:
         raise AssertionError("Error while writing shape to STEP file.")
@@ -105,24 +461,55 @@ def write_step_file(a_shape, filename, application_protocol="AP203"):
         raise AssertionError("File %s was not saved to filesystem." % filename)
 
 
-def read_step_file_with_names_colors(filename):
+def read_step_file_with_names_colors(filename, cache=None, progress=None, stats=None):
     """ Returns list of tuples (topods_shape, label, color)
     Use OCAF.
+    cache: optional, an ImportCache. If the same file was already read, the
+           shapes, names and colors are loaded from the cache.
+    progress: optional, a ProgressIndicator, notified after the parsing, the
+              transfer, and for each label of the assembly tree
+    stats: optional, an ExchangeStats filled with the measures of the import
     """
     if not os.path.isfile(filename):
         raise FileNotFoundError("%s not found." % filename)
-    # the list:
-    output_shapes = {}
+    stats = _exchange_stats(stats, filename, "step", "read")
+    if cache is None:
+        output_shapes = _read_step_file_with_names_colors(filename, progress, stats)
+        _log_stats(stats, output_shapes)
+        return output_shapes
+    key = cache.key(filename, reader="step_names_colors")
+    entry = cache.get_entry(key, _shapes_from_bytes)
+    if entry is not None:
+        shapes, metadata = entry
+        output_shapes = {}
+        try:
+            for a_shape, name, rgb in zip(shapes, metadata["names"], metadata["colors"]):
+                output_shapes[a_shape] = [name, Quantity_Color(rgb[0], rgb[1], rgb[2],
+                                                               Quantity_TOC_RGB)]
+        except (KeyError, TypeError, IndexError, ValueError):
+            # malformed metadata, a cache miss
+            entry = None
+    if entry is not None:
+        if stats is not None:
+            stats.from_cache = True
+        _log_stats(stats, output_shapes)
+        return output_shapes
+    output_shapes = _read_step_file_with_names_colors(filename, progress, stats)
+    items = list(output_shapes.items())
+    cache.put(key, _shapes_to_bytes([a_shape for a_shape, _ in items]),
+              {"names": [name for _, (name, _) in items],
+               "colors": [(c.Red(), c.Green(), c.Blue()) for _, (_, c) in items]})
+    _log_stats(stats, output_shapes)
+    return output_shapes
 
+
+def _read_step_document(filename, progress=None, stats=None):
+    """ reads a STEP file into a new XCAF document, with names, colors,
+    layers and materials
+    """
     # create an handle to a document
     doc = TDocStd_Document(TCollection_ExtendedString("pythonocc-doc"))
 
-    # Get root assembly
-    shape_tool = XCAFDoc_DocumentTool_ShapeTool(doc.Main())
-    color_tool = XCAFDoc_DocumentTool_ColorTool(doc.Main())
-    #layer_tool = XCAFDoc_DocumentTool_LayerTool(doc.Main())
-    #mat_tool = XCAFDoc_DocumentTool_MaterialTool(doc.Main())
-
     step_reader = STEPCAFControl_Reader()
     step_reader.SetColorMode(True)
     step_reader.SetLayerMode(True)
@@ -130,184 +517,326 @@ def read_step_file_with_names_colors(filename):
     step_reader.SetMatMode(True)
     step_reader.SetGDTMode(True)
 
+    if progress is not None:
+        progress.start("read", 1)
+    start = time.perf_counter()
     status = step_reader.ReadFile(filename)
+    if stats is not None and status == IFSelect_RetDone:
+        _load_stats(stats, step_reader.ChangeReader(), time.perf_counter() - start)
+    if progress is not None:
+        progress.finish()
     if status == IFSelect_RetDone:
+        if progress is not None:
+            progress.start("transfer", 1)
+        start = time.perf_counter()
         step_reader.Transfer(doc)
+        if stats is not None:
+            _transfer_stats(stats, step_reader.ChangeReader(), time.perf_counter() - start)
+        if progress is not None:
+            progress.finish()
+    return doc
 
 
-    #lvl = 0
-    locs = []
-    #cnt = 0
+def _read_step_file_with_names_colors(filename, progress=None, stats=None):
+    # the list:
+    output_shapes = {}
 
-    def _get_label_name(lab):
-        entry = TCollection_AsciiString()
-        TDF_Tool.Entry(lab, entry)
-        n = TDataStd_Name()
-        lab.FindAttribute(TDataStd_Name_GetID(), n)
-        if n is not None:
-            return n.Get().PrintToString()
-        return "No Name"
-
-    def _get_sub_shapes(lab, loc):
-        #global cnt, lvl
-        #cnt += 1
-        #print("\n[%d] level %d, handling LABEL %s\n" % (cnt, lvl, _get_label_name(lab)))
-        #print()
-        #print(lab.DumpToString())
-        #print()
-        #print("Is Assembly    :", shape_tool.IsAssembly(lab))
-        #print("Is Free        :", shape_tool.IsFree(lab))
-        #print("Is Shape       :", shape_tool.IsShape(lab))
-        #print("Is Compound    :", shape_tool.IsCompound(lab))
-        #print("Is Component   :", shape_tool.IsComponent(lab))
-        #print("Is SimpleShape :", shape_tool.IsSimpleShape(lab))
-        #print("Is Reference   :", shape_tool.IsReference(lab))
-
-        #users = TDF_LabelSequence()
-        #users_cnt = shape_tool.GetUsers(lab, users)
-        #print("Nr Users       :", users_cnt)
-
-        l_subss = TDF_LabelSequence()
-        shape_tool.GetSubShapes(lab, l_subss)
-        #print("Nb subshapes   :", l_subss.Length())
-        l_comps = TDF_LabelSequence()
-        shape_tool.GetComponents(lab, l_comps)
-        #print("Nb components  :", l_comps.Length())
-        #print()
-        name = _get_label_name(lab)
-        print("Name :", name)
+    doc = _read_step_document(filename, progress, stats)
+
+    # Get root assembly
+    shape_tool = XCAFDoc_DocumentTool_ShapeTool(doc.Main())
+    color_tool = XCAFDoc_DocumentTool_ColorTool(doc.Main())
+
+    def _get_color(shape, lab):
+        """ the color of the instance if any, else the color of the label
+        """
+        c = Quantity_Color(0.5, 0.5, 0.5, Quantity_TOC_RGB)  # default color
+        for i in (0, 1, 2):
+            if color_tool.GetInstanceColor(shape, i, c):
+                return c
+        for i in (0, 1, 2):
+            if color_tool.GetColor(lab, i, c):
+                return c
+        return c
+
+    def _add_shape(shape, lab, loc):
+        # the placed shape shares its TShape with all the other instances
+        # of the same part, only its location differs
+        shape_disp = shape.Moved(loc)
+        if not shape_disp in output_shapes:
+            output_shapes[shape_disp] = [_get_label_name(lab), _get_color(shape, lab)]
+
+    labels = TDF_LabelSequence()
+    shape_tool.GetFreeShapes(labels)
+
+    log.debug("Number of shapes at root: %i", labels.Length())
+    # depth first traversal of the assembly tree, with an explicit stack
+    # of (label, location of the label in the global coordinate system)
+    stack = [(labels.Value(i + 1), TopLoc_Location())
+             for i in reversed(range(labels.Length()))]
+    if progress is not None:
+        progress.start("labels")
+    while stack:
+        lab, loc = stack.pop()
+        if progress is not None:
+            progress.advance()
 
         if shape_tool.IsAssembly(lab):
             l_c = TDF_LabelSequence()
             shape_tool.GetComponents(lab, l_c)
+            components = []
             for i in range(l_c.Length()):
                 label = l_c.Value(i+1)
                 if shape_tool.IsReference(label):
-                    #print("\n########  reference label :", label)
                     label_reference = TDF_Label()
                     shape_tool.GetReferredShape(label, label_reference)
-                    loc = shape_tool.GetLocation(label)
-                    #print("    loc          :", loc)
-                    #trans = loc.Transformation()
-                    #print("    tran form    :", trans.Form())
-                    #rot = trans.GetRotation()
-                    #print("    rotation     :", rot)
-                    #print("    X            :", rot.X())
-                    #print("    Y            :", rot.Y())
-                    #print("    Z            :", rot.Z())
-                    #print("    W            :", rot.W())
-                    #tran = trans.TranslationPart()
-                    #print("    translation  :", tran)
-                    #print("    X            :", tran.X())
-                    #print("    Y            :", tran.Y())
-                    #print("    Z            :", tran.Z())
-
-                    locs.append(loc)
-                    #print(">>>>")
-                    #lvl += 1
-                    _get_sub_shapes(label_reference, loc)
-                    #lvl -= 1
-                    #print("<<<<")
-                    locs.pop()
+                    components.append((label_reference,
+                                       loc.Multiplied(shape_tool.GetLocation(label))))
+            stack.extend(reversed(components))
 
         elif shape_tool.IsSimpleShape(lab):
-            #print("\n########  simpleshape label :", lab)
-            shape = shape_tool.GetShape(lab)
-            #print("    all ass locs   :", locs)
-
-            loc = TopLoc_Location()
-            for l in locs:
-                #print("    take loc       :", l)
-                loc = loc.Multiplied(l)
-
-            #trans = loc.Transformation()
-            #print("    FINAL loc    :")
-            #print("    tran form    :", trans.Form())
-            #rot = trans.GetRotation()
-            #print("    rotation     :", rot)
-            #print("    X            :", rot.X())
-            #print("    Y            :", rot.Y())
-            #print("    Z            :", rot.Z())
-            #print("    W            :", rot.W())
-            #tran = trans.TranslationPart()
-            #print("    translation  :", tran)
-            #print("    X            :", tran.X())
-            #print("    Y            :", tran.Y())
-            #print("    Z            :", tran.Z())
-            c = Quantity_Color(0.5, 0.5, 0.5, Quantity_TOC_RGB)  # default color
-            colorSet = False
-            if (color_tool.GetInstanceColor(shape, 0, c) or
-                    color_tool.GetInstanceColor(shape, 1, c) or
-                    color_tool.GetInstanceColor(shape, 2, c)):
-                for i in (0, 1, 2):
-                    color_tool.SetInstanceColor(shape, i, c)
-                colorSet = True
-                n = c.Name(c.Red(), c.Green(), c.Blue())
-                #print('    instance color Name & RGB: ', c, n, c.Red(), c.Green(), c.Blue())
-
-            if not colorSet:
-                if (color_tool.GetColor(lab, 0, c) or
-                        color_tool.GetColor(lab, 1, c) or
-                        color_tool.GetColor(lab, 2, c)):
-                    for i in (0, 1, 2):
-                        color_tool.SetInstanceColor(shape, i, c)
-
-                    n = c.Name(c.Red(), c.Green(), c.Blue())
-                    print('    shape color Name & RGB: ', c, n, c.Red(), c.Green(), c.Blue())
-
-                #n = c.Name(c.Red(), c.Green(), c.Blue())
-                #print('    shape color Name & RGB: ', c, n, c.Red(), c.Green(), c.Blue())
-
-            shape_disp = BRepBuilderAPI_Transform(shape, loc.Transformation()).Shape()
-            if not shape_disp in output_shapes:
-                output_shapes[shape_disp] = [_get_label_name(lab), c]
+            _add_shape(shape_tool.GetShape(lab), lab, loc)
+            l_subss = TDF_LabelSequence()
+            shape_tool.GetSubShapes(lab, l_subss)
             for i in range(l_subss.Length()):
                 lab_subs = l_subss.Value(i+1)
-                #print("\n########  simpleshape subshape label :", lab)
-                shape_sub = shape_tool.GetShape(lab_subs)
-
-                c = Quantity_Color(0.5, 0.5, 0.5, Quantity_TOC_RGB)  # default color
-                colorSet = False
-                if (color_tool.GetInstanceColor(shape_sub, 0, c) or
-                        color_tool.GetInstanceColor(shape_sub, 1, c) or
-                        color_tool.GetInstanceColor(shape_sub, 2, c)):
-                    for i in (0, 1, 2):
-                        color_tool.SetInstanceColor(shape_sub, i, c)
-                    colorSet = True
-                    n = c.Name(c.Red(), c.Green(), c.Blue())
-                    #print('    instance color Name & RGB: ', c, n, c.Red(), c.Green(), c.Blue())
-
-                if not colorSet:
-                    if (color_tool.GetColor(lab_subs, 0, c) or
-                            color_tool.GetColor(lab_subs, 1, c) or
-                            color_tool.GetColor(lab_subs, 2, c)):
-                        for i in (0, 1, 2):
-                            color_tool.SetInstanceColor(shape, i, c)
-
-                        n = c.Name(c.Red(), c.Green(), c.Blue())
-                        #print('    shape color Name & RGB: ', c, n, c.Red(), c.Green(), c.Blue())
-                shape_to_disp = BRepBuilderAPI_Transform(shape_sub, loc.Transformation()).Shape()
-                # position the subshape to display
-                if not shape_to_disp in output_shapes:
-                    output_shapes[shape_to_disp] = [_get_label_name(lab_subs), c]
-
-
-    def _get_shapes():
-        labels = TDF_LabelSequence()
-        shape_tool.GetFreeShapes(labels)
-        #global cnt
-        #cnt += 1
-
-        print()
-        print("Number of shapes at root :", labels.Length())
-        print()
-        for i in range(labels.Length()):
-            root_item = labels.Value(i+1)
-            _get_sub_shapes(root_item, None)
-    _get_shapes()
+                _add_shape(shape_tool.GetShape(lab_subs), lab_subs, loc)
+    if progress is not None:
+        progress.finish()
     return output_shapes
 
 
+def _get_label_name(lab):
+    n = TDataStd_Name()
+    lab.FindAttribute(TDataStd_Name_GetID(), n)
+    if n is not None:
+        return n.Get().PrintToString()
+    return "No Name"
+
+
+def _located_parts(shape_tool, root_label):
+    """ yields (label, global location) for each part of the tree of
+    root_label, depth first, with an explicit stack
+    """
+    stack = [(root_label, TopLoc_Location())]
+    while stack:
+        lab, loc = stack.pop()
+        if shape_tool.IsAssembly(lab):
+            components = TDF_LabelSequence()
+            shape_tool.GetComponents(lab, components)
+            children = []
+            for i in range(components.Length()):
+                component_label = components.Value(i + 1)
+                if shape_tool.IsReference(component_label):
+                    referred_label = TDF_Label()
+                    shape_tool.GetReferredShape(component_label, referred_label)
+                    children.append((referred_label,
+                                     loc.Multiplied(shape_tool.GetLocation(component_label))))
+            stack.extend(reversed(children))
+        elif shape_tool.IsSimpleShape(lab):
+            yield lab, loc
+
+
+def iter_step_file(filename, names=None, roots=None, progress=None):
+    """ Reads a STEP file lazily: yields a (name, location, shape) tuple for
+    each part instance, as soon as the root it belongs to is transferred.
+    Roots are transferred one at a time, with STEPCAFControl_Reader.TransferOneRoot,
+    so that the parts of the first roots are available before the other
+    roots are transferred.
+    Laziness and selection only work at the granularity of the roots: a
+    root is always transferred as a whole, before any of its parts is
+    yielded. A file made of a single root assembly, the most common case,
+    is thus entirely transferred before the first part is available.
+    filename: the file path
+    names: optional, a collection of part names. Only the parts with one of
+           these names are yielded. The filter is applied after the
+           transfer of each root, it does not save any transfer time:
+           use roots for that.
+    roots: optional, the 1-based indices of the roots to transfer, all of
+           them by default. Other roots are not transferred at all.
+    The shape is the part, shared by all its instances, and location its
+    placement in the global coordinate system: shape.Moved(location) is the
+    placed instance.
+    progress: optional, a ProgressIndicator, notified after the parsing and
+              after the transfer of each root
+    """
+    if not os.path.isfile(filename):
+        raise FileNotFoundError("%s not found." % filename)
+    doc = TDocStd_Document(TCollection_ExtendedString("pythonocc-doc"))
+    shape_tool = XCAFDoc_DocumentTool_ShapeTool(doc.Main())
+
+    step_reader = STEPCAFControl_Reader()
+    step_reader.SetColorMode(True)
+    step_reader.SetLayerMode(True)
+    step_reader.SetNameMode(True)
+    step_reader.SetMatMode(True)
+    if progress is not None:
+        progress.start("read", 1)
+    if step_reader.ReadFile(filename) != IFSelect_RetDone:
+        raise AssertionError("Error: can't read file.")
+    if progress is not None:
+        progress.finish()
+    if roots is None:
+        roots = range(1, step_reader.Reader().NbRootsForTransfer() + 1)
+    roots = list(roots)
+    if names is not None:
+        names = set(names)
+
+    # the free shapes already yielded, by TDF entry
+    transferred = set()
+    if progress is not None:
+        progress.start("transfer", len(roots))
+    for root in roots:
+        transfer_result = step_reader.TransferOneRoot(root, doc)
+        if progress is not None:
+            progress.advance()
+        if not transfer_result:
+            continue
+        free_labels = TDF_LabelSequence()
+        shape_tool.GetFreeShapes(free_labels)
+        for i in range(free_labels.Length()):
+            free_label = free_labels.Value(i + 1)
+            entry = TCollection_AsciiString()
+            TDF_Tool.Entry(free_label, entry)
+            entry = entry.PrintToString()
+            if entry in transferred:
+                continue
+            transferred.add(entry)
+            for lab, loc in _located_parts(shape_tool, free_label):
+                name = _get_label_name(lab)
+                if names is None or name in names:
+                    yield name, loc, shape_tool.GetShape(lab)
+    if progress is not None:
+        progress.finish()
+
+
+# The assembly tree of an XCAF document, one item per node. Nodes are
+# the free shapes and the components of the assemblies, in depth first
+# order, so that the parent of a node always comes before it.
+# names: the names of the referred shapes (the products)
+# instance_names: the names of the components, "" for the free shapes
+# entries: the TDF entries of the labels of the referred shapes
+# parents: (N,) int32, the index of the parent node, -1 for free shapes
+# depths: (N,) int32, 0 for free shapes
+# colors: (N, 3) float64 RGB, the color of the component if any, else
+#         the color of the referred shape, nan if there is no color
+# layers: the tuple of the layer names of each node
+# local_transforms: (N, 4, 4) float64, the location of the node in its parent
+# global_transforms: (N, 4, 4) float64, in the global coordinate system
+# part_ids: (N,) int32, the index in parts of the referred shape, -1 for
+#           assemblies
+# parts: the distinct shapes referred to by the nodes that are not
+#        assemblies, not located. The node is parts[i].Moved(global location).
+AssemblyTree = namedtuple("AssemblyTree", ["names", "instance_names", "entries", "parents",
+                                           "depths", "colors", "layers", "local_transforms",
+                                           "global_transforms", "part_ids", "parts"])
+
+
+def xcaf_assembly_tree(doc):
+    """ Returns the AssemblyTree of an XCAF document
+    """
+    # numpy is only required when the assembly tree is built
+    import numpy as np
+    from OCC.Extend.GeometryUtils import trsf_to_matrix
+
+    shape_tool = XCAFDoc_DocumentTool_ShapeTool(doc.Main())
+    color_tool = XCAFDoc_DocumentTool_ColorTool(doc.Main())
+    layer_tool = XCAFDoc_DocumentTool_LayerTool(doc.Main())
+
+    def _label_color(lab):
+        c = Quantity_Color(0.5, 0.5, 0.5, Quantity_TOC_RGB)
+        for i in (0, 1, 2):
+            if color_tool.GetColor(lab, i, c):
+                return c.Red(), c.Green(), c.Blue()
+        return None
+
+    def _label_layers(lab):
+        layer_labels = TDF_LabelSequence()
+        layer_tool.GetLayers(lab, layer_labels)
+        layers = []
+        for i in range(layer_labels.Length()):
+            layer_name = TCollection_ExtendedString()
+            if layer_tool.GetLayer(layer_labels.Value(i + 1), layer_name):
+                layers.append(layer_name.PrintToString())
+        return layers
+
+    names, instance_names, entries, parents, depths = [], [], [], [], []
+    colors, layers, local_transforms, part_ids, parts = [], [], [], [], []
+    part_index = {}
+    identity = np.eye(4)
+
+    free_labels = TDF_LabelSequence()
+    shape_tool.GetFreeShapes(free_labels)
+    # (component label or None, referred label, parent index, depth)
+    stack = [(None, free_labels.Value(i + 1), -1, 0)
+             for i in reversed(range(free_labels.Length()))]
+    while stack:
+        component, lab, parent, depth = stack.pop()
+        node = len(names)
+        entry = TCollection_AsciiString()
+        TDF_Tool.Entry(lab, entry)
+        entries.append(entry.PrintToString())
+        names.append(_get_label_name(lab))
+        parents.append(parent)
+        depths.append(depth)
+        color = None
+        node_layers = []
+        if component is None:
+            instance_names.append("")
+            local_transforms.append(identity)
+        else:
+            instance_names.append(_get_label_name(component))
+            local_transforms.append(trsf_to_matrix(shape_tool.GetLocation(component).Transformation()))
+            color = _label_color(component)
+            node_layers = _label_layers(component)
+        if color is None:
+            color = _label_color(lab)
+        colors.append(color if color is not None else (np.nan, np.nan, np.nan))
+        layers.append(tuple(node_layers + [l for l in _label_layers(lab) if l not in node_layers]))
+
+        if shape_tool.IsAssembly(lab):
+            part_ids.append(-1)
+            components = TDF_LabelSequence()
+            shape_tool.GetComponents(lab, components)
+            children = []
+            for i in range(components.Length()):
+                component_label = components.Value(i + 1)
+                if shape_tool.IsReference(component_label):
+                    referred_label = TDF_Label()
+                    shape_tool.GetReferredShape(component_label, referred_label)
+                    children.append((component_label, referred_label, node, depth + 1))
+            stack.extend(reversed(children))
+        else:
+            if entries[-1] not in part_index:
+                part_index[entries[-1]] = len(parts)
+                parts.append(shape_tool.GetShape(lab))
+            part_ids.append(part_index[entries[-1]])
+
+    parents = np.array(parents, dtype=np.int32)
+    depths = np.array(depths, dtype=np.int32)
+    local_transforms = np.array(local_transforms, dtype=np.float64).reshape(-1, 4, 4)
+    # one matrix product per depth level, all the nodes of a level at once
+    global_transforms = local_transforms.copy()
+    for depth in range(1, int(depths.max()) + 1 if depths.shape[0] else 0):
+        level = np.flatnonzero(depths == depth)
+        global_transforms[level] = np.matmul(global_transforms[parents[level]],
+                                             local_transforms[level])
+    return AssemblyTree(names, instance_names, entries, parents, depths,
+                        np.array(colors, dtype=np.float64).reshape(-1, 3), layers,
+                        local_transforms, global_transforms,
+                        np.array(part_ids, dtype=np.int32), parts)
+
+
+def read_step_assembly_tree(filename, progress=None):
+    """ reads a STEP file and returns its AssemblyTree, see xcaf_assembly_tree
+    progress: optional, a ProgressIndicator, notified after the parsing and
+              after the transfer
+    """
+    if not os.path.isfile(filename):
+        raise FileNotFoundError("%s not found." % filename)
+    return xcaf_assembly_tree(_read_step_document(filename, progress))
+
+
 #########################
 # STL import and export #
 #########################
@@ -325,7 +854,7 @@ def write_stl_file(a_shape, filename, mode="ascii", linear_deflection=0.9, angul
     if mode not in ["ascii", "binary"]:
         raise AssertionError("mode should be either ascii or binary")
     if os.path.isfile(filename):
-        print("Warning: %s file already exists and will be replaced" % filename)
+        log.debug("%s file already exists and will be replaced", filename)
     # first mesh the shape
     mesh = BRepMesh_IncrementalMesh(a_shape, linear_deflection, False, angular_deflection, True)
     #mesh.SetDeflection(0.05)
@@ -344,6 +873,72 @@ def write_stl_file(a_shape, filename, mode="ascii", linear_deflection=0.9, angul
         raise IOError("File not written to disk.")
 
 
+# the 50 bytes of a triangle in a binary STL file, as a numpy dtype description
+STL_BINARY_DTYPE = [("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)),
+                    ("attribute", "<u2")]
+_STL_ASCII_VERTEX = re.compile(br"vertex\s+(\S+)\s+(\S+)\s+(\S+)")
+
+
+def _is_binary_stl(filename):
+    # the size of a binary file is known from its number of triangles. ASCII
+    # files start with "solid", but so do the headers of some binary files
+    size = os.path.getsize(filename)
+    if size < 84:
+        return False
+    with open(filename, "rb") as f:
+        f.seek(80)
+        number_of_triangles = struct.unpack("<I", f.read(4))[0]
+    return size == 84 + 50 * number_of_triangles
+
+
+def read_stl_mesh(filename, weld=True, tolerance=0.):
+    """ Reads an ASCII or binary STL file directly into numpy arrays,
+    without building any TopoDS_Shape.
+    filename: the file path
+    weld: optional, True by default. If True, the vertices shared by
+          several triangles are merged (see MeshUtils.weld_vertices),
+          otherwise each triangle has its own 3 vertices.
+    tolerance: optional, the welding distance, 0 (identical vertices) by default
+    Returns (vertices, triangles): (N, 3) float32 and (M, 3) int32 arrays.
+    Binary files are memory mapped.
+    """
+    # numpy is only required when meshes are read or written
+    import numpy as np
+    from OCC.Extend.MeshUtils import weld_vertices
+
+    if not os.path.isfile(filename):
+        raise FileNotFoundError("%s not found." % filename)
+    if _is_binary_stl(filename):
+        with open(filename, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                records = np.frombuffer(mapped, dtype=STL_BINARY_DTYPE, offset=84)
+                vertices = records["vertices"].reshape(-1, 3).copy()
+                del records
+            finally:
+                mapped.close()
+    else:
+        with open(filename, "rb") as f:
+            coordinates = _STL_ASCII_VERTEX.findall(f.read())
+        vertices = np.array(coordinates, dtype=np.float32).reshape(-1, 3)
+    if vertices.shape[0] % 3 != 0:
+        raise AssertionError("%s is not a valid STL file." % filename)
+    triangles = np.arange(vertices.shape[0], dtype=np.int32).reshape(-1, 3)
+    if weld:
+        vertices, triangles = weld_vertices(vertices, triangles, tolerance)
+    return vertices, triangles
+
+
+def read_stl_file_as_triangulation(filename, tolerance=0.):
+    """ Reads a STL file into a single TopoDS_Face carrying a welded
+    Poly_Triangulation, much lighter than the shape built by read_stl_file,
+    which has one face per triangle.
+    """
+    from OCC.Extend.MeshUtils import mesh_to_face
+    vertices, triangles = read_stl_mesh(filename, True, tolerance)
+    return mesh_to_face(vertices, triangles)
+
+
 def read_stl_file(filename):
     """ opens a stl file, reads the content, and returns a BRep topods_shape object
     """
@@ -359,22 +954,214 @@ def read_stl_file(filename):
 
     return the_shape
 
+##################
+# Mesh exporters #
+##################
+def _triangle_normals(vertices, triangles):
+    import numpy as np
+    corners = vertices[triangles]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    norms = np.linalg.norm(normals, axis=1)
+    norms[norms == 0.] = 1.
+    return normals / norms[:, np.newaxis]
+
+
+def _group_order(groups, number_of_triangles):
+    """ the triangle indices sorted by group, and the (group, start, end) ranges
+    """
+    import numpy as np
+    groups = np.asarray(groups)
+    if groups.shape[0] != number_of_triangles:
+        raise AssertionError("groups must give one group per triangle.")
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    ends = np.r_[starts[1:], number_of_triangles]
+    return order, [(sorted_groups[b], b, e) for b, e in zip(starts, ends)]
+
+
+def write_stl_mesh(filename, vertices, triangles, groups=None):
+    """ Writes a binary STL file from vertices, (N, 3), and triangles,
+    (M, 3) 0-based indices, in a single write. The facet normals are
+    computed from the vertices.
+    groups: optional, an integer per triangle (for instance the face_ids of
+            MeshUtils.shape_triangulation), stored in the attribute field
+            of each facet, the only place binary STL can hold it. This field
+            is 16 bits wide: groups must be between 0 and 65535.
+    """
+    # numpy is only required when meshes are read or written
+    import numpy as np
+    vertices = np.asarray(vertices, dtype=np.float64)
+    triangles = np.asarray(triangles)
+    if groups is not None:
+        groups = np.asarray(groups)
+        if groups.size and (groups.min() < 0 or groups.max() > 0xFFFF):
+            raise AssertionError("STL attributes are 16 bits, groups must be between 0 and 65535.")
+    records = np.zeros(triangles.shape[0], dtype=STL_BINARY_DTYPE)
+    records["normal"] = _triangle_normals(vertices, triangles)
+    records["vertices"] = vertices[triangles]
+    if groups is not None:
+        records["attribute"] = groups
+    header = b"binary STL written by pythonocc".ljust(80, b" ")
+    with open(filename, "wb") as f:
+        f.write(header + np.uint32(triangles.shape[0]).tobytes() + records.tobytes())
+
+
+def write_obj_mesh(filename, vertices, triangles, normals=None, groups=None,
+                   group_names=None):
+    """ Writes a Wavefront OBJ file from vertices, (N, 3), and triangles,
+    (M, 3) 0-based indices. The text is formatted in memory, by numpy, and
+    written at once.
+    normals: optional, (N, 3) vertex normals
+    groups: optional, an integer per triangle. Triangles are written in "g"
+            groups, named group_names[group] if given, else "group_<group>".
+    """
+    # numpy is only required when meshes are read or written
+    import numpy as np
+    vertices = np.asarray(vertices)
+    triangles = np.asarray(triangles) + 1
+    buffer = io.BytesIO()
+    np.savetxt(buffer, vertices, fmt="v %.7g %.7g %.7g")
+    if normals is not None:
+        np.savetxt(buffer, np.asarray(normals), fmt="vn %.7g %.7g %.7g")
+        face_format = "f %d//%d %d//%d %d//%d"
+        faces = np.repeat(triangles, 2, axis=1)
+    else:
+        face_format = "f %d %d %d"
+        faces = triangles
+    if groups is None:
+        np.savetxt(buffer, faces, fmt=face_format)
+    else:
+        order, ranges = _group_order(groups, triangles.shape[0])
+        for group, start, end in ranges:
+            name = group_names[group] if group_names is not None else "group_%i" % group
+            buffer.write(("g %s\n" % name).encode("utf-8"))
+            np.savetxt(buffer, faces[order[start:end]], fmt=face_format)
+    with open(filename, "wb") as f:
+        f.write(buffer.getvalue())
+
+
+def write_ply_mesh(filename, vertices, triangles, normals=None, groups=None):
+    """ Writes a binary little endian PLY file from vertices, (N, 3), and
+    triangles, (M, 3) 0-based indices, in a single write.
+    normals: optional, (N, 3) vertex normals
+    groups: optional, an integer per triangle, written as the "group"
+            property of the faces
+    """
+    # numpy is only required when meshes are read or written
+    import numpy as np
+    vertices = np.asarray(vertices)
+    triangles = np.asarray(triangles)
+    vertex_fields = [("x", "<f4"), ("y", "<f4"), ("z", "<f4")]
+    if normals is not None:
+        vertex_fields += [("nx", "<f4"), ("ny", "<f4"), ("nz", "<f4")]
+    vertex_records = np.empty(vertices.shape[0], dtype=vertex_fields)
+    for i, axis in enumerate("xyz"):
+        vertex_records[axis] = vertices[:, i]
+        if normals is not None:
+            vertex_records["n" + axis] = np.asarray(normals)[:, i]
+    face_fields = [("count", "u1"), ("indices", "<i4", (3,))]
+    if groups is not None:
+        face_fields.append(("group", "<i4"))
+    face_records = np.empty(triangles.shape[0], dtype=face_fields)
+    face_records["count"] = 3
+    face_records["indices"] = triangles
+    if groups is not None:
+        face_records["group"] = groups
+    header = ["ply", "format binary_little_endian 1.0", "comment written by pythonocc",
+              "element vertex %i" % vertices.shape[0],
+              "property float x", "property float y", "property float z"]
+    if normals is not None:
+        header += ["property float nx", "property float ny", "property float nz"]
+    header += ["element face %i" % triangles.shape[0],
+               "property list uchar int vertex_indices"]
+    if groups is not None:
+        header.append("property int group")
+    header.append("end_header\n")
+    with open(filename, "wb") as f:
+        f.write("\n".join(header).encode("ascii") + vertex_records.tobytes() +
+                face_records.tobytes())
+
+
+def write_mesh_file(filename, vertices, triangles, normals=None, groups=None,
+                    group_names=None):
+    """ Writes a mesh to a binary STL, an OBJ or a binary PLY file,
+    depending on the extension of filename. vertices and triangles can be
+    obtained from MeshUtils.shape_triangulation (with face_ids as groups)
+    or from a Tesselator with MeshUtils.tesselator_mesh. group_names are
+    only used by the OBJ format.
+
+    tess = Tesselator(a_shape)
+    tess.Compute()
+    write_mesh_file("part.ply", *tesselator_mesh(tess))
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".stl":
+        write_stl_mesh(filename, vertices, triangles, groups)
+    elif extension == ".obj":
+        write_obj_mesh(filename, vertices, triangles, normals, groups, group_names)
+    elif extension == ".ply":
+        write_ply_mesh(filename, vertices, triangles, normals, groups)
+    else:
+        raise AssertionError("%s is not a stl, obj or ply file." % filename)
+
+
 ######################
 # IGES import/export #
 ######################
-def read_iges_file(filename, return_as_shapes=False, verbosity=False, visible_only=False):
+def read_iges_file(filename, return_as_shapes=False, verbosity=False, visible_only=False,
+                   cache=None, progress=None, stats=None):
     """ read the IGES file and returns a compound
     filename: the file path
     return_as_shapes: optional, False by default. If True returns a list of shapes,
                       else returns a single compound
-    verbosity: optionl, False by default.
+    verbosity: optional, False by default. If True, the load and transfer
+               check lists are printed to the console by OpenCASCADE.
+    cache: optional, an ImportCache. If the same file was already read with
+           the same visible_only option, the shapes are loaded from the cache.
+    progress: optional, a ProgressIndicator, notified after the parsing and
+              after the transfer of each root
+    stats: optional, an ExchangeStats filled with the measures of the import
     """
     if not os.path.isfile(filename):
         raise FileNotFoundError("%s not found." % filename)
 
+    stats = _exchange_stats(stats, filename, "iges", "read")
+    if cache is not None:
+        key = cache.key(filename, reader="iges", visible_only=visible_only)
+        _shapes = cache.get(key, _shapes_from_bytes)
+        if _shapes is not None:
+            if stats is not None:
+                stats.from_cache = True
+        else:
+            _shapes = _read_iges_shapes(filename, verbosity, visible_only, progress, stats)
+            cache.put(key, _shapes_to_bytes(_shapes))
+    else:
+        _shapes = _read_iges_shapes(filename, verbosity, visible_only, progress, stats)
+    _log_stats(stats, _shapes)
+    # if not return as shapes
+    # create a compound and store all shapes
+    if not return_as_shapes:
+        builder = BRep_Builder()
+        compound = TopoDS_Compound()
+        builder.MakeCompound(compound)
+        for s in _shapes:
+            builder.Add(compound, s)
+        _shapes = compound
+    return _shapes
+
+
+def _read_iges_shapes(filename, verbosity, visible_only, progress=None, stats=None):
     iges_reader = IGESControl_Reader()
     iges_reader.SetReadVisible(visible_only)
+    if progress is not None:
+        progress.start("read", 1)
+    start = time.perf_counter()
     status = iges_reader.ReadFile(filename)
+    if stats is not None and status == IFSelect_RetDone:
+        _load_stats(stats, iges_reader, time.perf_counter() - start)
+    if progress is not None:
+        progress.finish()
 
     _shapes = []
 
@@ -383,57 +1170,324 @@ def read_iges_file(filename, return_as_shapes=False, verbosity=False, visible_on
             failsonly = False
             iges_reader.PrintCheckLoad(failsonly, IFSelect_ItemsByEntity)
             iges_reader.PrintCheckTransfer(failsonly, IFSelect_ItemsByEntity)
-        iges_reader.TransferRoots()
         nbr = iges_reader.NbRootsForTransfer()
+        start = time.perf_counter()
+        if progress is None:
+            iges_reader.TransferRoots()
+        else:
+            # one root at a time, to report the progress between two roots
+            progress.start("transfer", nbr)
+            for n in range(1, nbr + 1):
+                iges_reader.TransferOneRoot(n)
+                progress.advance()
+            progress.finish()
+        if stats is not None:
+            _transfer_stats(stats, iges_reader, time.perf_counter() - start)
+        not_transferred = 0
         for n in range(1, nbr+1):
             nbs = iges_reader.NbShapes()
             if nbs == 0:
-                print("At least one shape in IGES cannot be transfered")
+                not_transferred += 1
             elif nbr == 1 and nbs == 1:
                 a_res_shape = iges_reader.Shape(1)
                 if a_res_shape.IsNull():
-                    print("At least one shape in IGES cannot be transferred")
+                    not_transferred += 1
                 else:
                     _shapes.append(a_res_shape)
             else:
                 for i in range(1, nbs+1):
                     a_shape = iges_reader.Shape(i)
                     if a_shape.IsNull():
-                        print("At least one shape in STEP cannot be transferred")
+                        not_transferred += 1
                     else:
                         _shapes.append(a_shape)
-    # if not return as shapes
-    # create a compound and store all shapes
-    if not return_as_shapes:
-        builder = BRep_Builder()
-        compound = TopoDS_Compound()
-        builder.MakeCompound(compound)
-        for s in _shapes:
-            builder.Add(compound, s)
-        _shapes = compound
+        if not_transferred:
+            log.warning("At least one shape in %s cannot be transferred", filename)
     return _shapes
 
-def write_iges_file(a_shape, filename):
+def write_iges_file(a_shape, filename, stats=None):
     """ exports a shape to a STEP file
     a_shape: the topods_shape to export (a compound, a solid etc.)
     filename: the filename
     application protocol: "AP203" or "AP214"
+    stats: optional, an ExchangeStats filled with the measures of the export
     """
     # a few checks
     if a_shape.IsNull():
         raise AssertionError("Shape is null.")
     if os.path.isfile(filename):
-        print("Warning: %s file already exists and will be replaced" % filename)
+        log.debug("%s file already exists and will be replaced", filename)
+    stats = _exchange_stats(stats, filename, "iges", "write")
     # creates and initialise the step exporter
+    start = time.perf_counter()
     iges_writer = IGESControl_Writer()
     iges_writer.AddShape(a_shape)
+    transfer_end = time.perf_counter()
     status = iges_writer.Write(filename)
+    if stats is not None:
+        stats.transfer_time = transfer_end - start
+        stats.write_time = time.perf_counter() - transfer_end
+        stats.number_of_entities = iges_writer.Model().NbEntities()
+        _log_stats(stats, [a_shape])
 
     if status != IFSelect_RetDone:
         raise AssertionError("Not done.")
     if not os.path.isfile(filename):
         raise IOError("File not written to disk.")
 
+##########################
+# BRep import and export #
+##########################
+BREP_COMPRESSIONS = (None, "gzip", "zstd")
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# TopAbs_Orientation to the character used in the BRep format
+_BREP_ORIENTATIONS = "+-ie"
+
+
+def _brep_compression(filename, compression):
+    if compression is None:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension == ".gz":
+            compression = "gzip"
+        elif extension in (".zst", ".zstd"):
+            compression = "zstd"
+    if compression not in BREP_COMPRESSIONS:
+        raise AssertionError("compression must be None, gzip or zstd. You passed %s." % compression)
+    if compression == "zstd" and not HAVE_ZSTD:
+        raise AssertionError("zstd compression requires the zstandard package.")
+    return compression
+
+
+def write_brep_bytes(a_shape, compression=None):
+    """ returns a_shape in the BRep format, as bytes
+    compression: optional, None, "gzip" or "zstd". The compressed data
+                 decompresses to a regular BRep file.
+    """
+    if a_shape.IsNull():
+        raise AssertionError("Shape is null.")
+    compression = _brep_compression("", compression)
+    shape_set = BRepTools_ShapeSet()
+    shape_set.Add(a_shape)
+    # the shape set, then the reference to the shape itself: its orientation,
+    # its TShape (the last one added, numbered 1 since they are written in
+    # reverse order) and its location
+    data = ("%s\n%s1 %i \n" % (shape_set.WriteToString(),
+                                _BREP_ORIENTATIONS[a_shape.Orientation()],
+                                shape_set.Locations().Index(a_shape.Location()))).encode("utf-8")
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def read_brep_bytes(data):
+    """ Rebuilds a shape from bytes (or any buffer, for instance a mmap)
+    in the BRep format, compressed or not (see write_brep_bytes)
+    """
+    magic = bytes(data[:4])
+    if magic.startswith(_GZIP_MAGIC):
+        data = gzip.decompress(data)
+    elif magic == _ZSTD_MAGIC:
+        if not HAVE_ZSTD:
+            raise AssertionError("zstd compression requires the zstandard package.")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    text = bytes(data).decode("utf-8")
+    # the shape reference is the last line, after the shape set
+    reference = text.rstrip().rsplit("\n", 1)[-1].split()
+    if len(reference) != 2 or reference[0][:1] not in _BREP_ORIENTATIONS:
+        raise AssertionError("Data is not in the BRep format.")
+    shape_set = BRepTools_ShapeSet()
+    shape_set.ReadFromString(text)
+    the_shape = shape_set.Shape(shape_set.NbShapes() - int(reference[0][1:]) + 1)
+    the_shape.Location(shape_set.Locations().Location(int(reference[1])))
+    the_shape.Orientation(_BREP_ORIENTATIONS.index(reference[0][0]))
+    return the_shape
+
+
+def write_brep_file(a_shape, filename, compression=None):
+    """ exports a shape to a BRep file, the native format of OpenCASCADE
+    a_shape: the topods_shape to export
+    filename: the filename
+    compression: optional, None, "gzip" or "zstd" (requires the zstandard
+                 package). By default, guessed from the extension of the
+                 file: .gz for gzip, .zst for zstd, not compressed otherwise.
+    """
+    if a_shape.IsNull():
+        raise AssertionError("Shape is null.")
+    compression = _brep_compression(filename, compression)
+    if compression is None:
+        status = breptools_Write(a_shape, filename)
+    else:
+        with open(filename, "wb") as f:
+            f.write(write_brep_bytes(a_shape, compression))
+        status = True
+    if not status or not os.path.isfile(filename):
+        raise IOError("File not written to disk.")
+
+
+def read_brep_file(filename):
+    """ reads a BRep file, compressed with gzip or zstd or not, and returns
+    the shape. Compressed files are memory mapped and decompressed at once.
+    """
+    if not os.path.isfile(filename):
+        raise FileNotFoundError("%s not found." % filename)
+    with open(filename, "rb") as f:
+        magic = f.read(4)
+    if magic.startswith(_GZIP_MAGIC) or magic == _ZSTD_MAGIC:
+        with open(filename, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                return read_brep_bytes(mapped)
+            finally:
+                mapped.close()
+    the_shape = TopoDS_Shape()
+    if not breptools_Read(the_shape, filename, BRep_Builder()) or the_shape.IsNull():
+        raise AssertionError("Error: can't read file.")
+    return the_shape
+
+
+#########################
+# Batch import of files #
+#########################
+STEP_EXTENSIONS = (".stp", ".step")
+IGES_EXTENSIONS = (".igs", ".iges")
+
+# filename: the path of the file
+# shape: the topods_shape read from the file, None if the import failed
+# elapsed: the time spent by the worker on the file, in seconds
+# error: None if the import succeeded, the error message otherwise
+ImportResult = namedtuple("ImportResult", ["filename", "shape", "elapsed", "error"])
+
+
+def read_cad_file(filename, cache=None, progress=None):
+    """ reads a STEP or IGES file, depending on its extension, and returns
+    a single compound
+    cache: optional, an ImportCache
+    progress: optional, a ProgressIndicator
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in STEP_EXTENSIONS:
+        return read_step_file(filename, verbosity=False, cache=cache, progress=progress)
+    if extension in IGES_EXTENSIONS:
+        return read_iges_file(filename, cache=cache, progress=progress)
+    raise AssertionError("%s is neither a STEP nor an IGES file." % filename)
+
+
+def list_cad_files(directory, recursive=False):
+    """ returns the sorted list of the STEP and IGES files of a directory
+    """
+    extensions = STEP_EXTENSIONS + IGES_EXTENSIONS
+    filenames = []
+    for root, _, files in os.walk(directory):
+        filenames.extend(os.path.join(root, f) for f in files
+                         if os.path.splitext(f)[1].lower() in extensions)
+        if not recursive:
+            break
+    return sorted(filenames)
+
+
+def _limit_memory(memory_limit):
+    """ process pool initializer: caps the address space of the worker, so
+    that a huge file makes its import fail instead of exhausting the memory
+    of the host
+    """
+    if memory_limit is not None and HAVE_RESOURCE:
+        _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, hard_limit))
+
+
+def _read_cad_file_serialized(filename, cache):
+    """ the worker task: returns (serialized shape, elapsed, error)
+    """
+    start = time.perf_counter()
+    try:
+        data = serialize_shape(read_cad_file(filename, cache))
+    except MemoryError:
+        return None, time.perf_counter() - start, "memory limit exceeded"
+    except Exception as error:
+        return None, time.perf_counter() - start, "%s: %s" % (type(error).__name__, error)
+    return data, time.perf_counter() - start, None
+
+
+def _import_result(filename, outcome, as_bytes):
+    data, elapsed, error = outcome
+    if error is not None or as_bytes:
+        return ImportResult(filename, data, elapsed, error)
+    return ImportResult(filename, deserialize_shape(data), elapsed, None)
+
+
+def batch_read_files(filenames, max_workers=None, memory_limit=None, as_bytes=False,
+                     cache=None, progress=None):
+    """ Reads many STEP and IGES files in a pool of processes.
+    filenames: a list of files, or a directory (see list_cad_files)
+    max_workers: optional, the number of processes, os.cpu_count() by default
+    memory_limit: optional, the maximum size of the address space of each
+                  worker, in bytes (only on platforms that provide the
+                  resource module). A file that requires more memory fails,
+                  the other ones are still imported.
+    as_bytes: optional, False by default. If True, the shape field of the
+              results holds the serialized shape (see
+              OCC.Extend.ParallelUtils.deserialize_shape), which is cheaper
+              when the shapes are sent to another process or stored.
+    cache: optional, an ImportCache shared by the workers
+    progress: optional, a ProgressIndicator, notified each time a file is
+              imported. On cancellation, the files not started yet are
+              skipped, the ones being imported are waited for, then
+              OperationCancelled is raised.
+    Returns the list of ImportResult, in the order of filenames. Shapes are
+    sent back from the workers serialized in the BRep format.
+    """
+    # the process pools are only required by batch imports
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    if isinstance(filenames, str) and os.path.isdir(filenames):
+        filenames = list_cad_files(filenames)
+    filenames = list(filenames)
+    results = [None] * len(filenames)
+    crashed = []
+    if progress is not None:
+        progress.start("batch", len(filenames))
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_limit_memory,
+                             initargs=(memory_limit,)) as executor:
+        futures = [executor.submit(_read_cad_file_serialized, f, cache)
+                   for f in filenames]
+        try:
+            for i, future in enumerate(futures):
+                try:
+                    results[i] = _import_result(filenames[i], future.result(), as_bytes)
+                except BrokenProcessPool:
+                    crashed.append(i)
+                    continue
+                if progress is not None:
+                    progress.advance()
+        except OperationCancelled:
+            for future in futures:
+                future.cancel()
+            raise
+    # a worker died (segmentation fault, killed by the system...) and took
+    # the pool down: the files that were not imported are read again, each
+    # one in its own process, to find out which file is responsible
+    for i in crashed:
+        start = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(max_workers=1, initializer=_limit_memory,
+                                     initargs=(memory_limit,)) as executor:
+                outcome = executor.submit(_read_cad_file_serialized, filenames[i],
+                                          cache).result()
+            results[i] = _import_result(filenames[i], outcome, as_bytes)
+        except BrokenProcessPool:
+            results[i] = ImportResult(filenames[i], None, time.perf_counter() - start,
+                                      "worker process terminated abruptly")
+        if progress is not None:
+            progress.advance()
+    if progress is not None:
+        progress.finish()
+    return results
+
+
 if __name__ == "__main__":
     from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeSphere
     sphere_shape = BRepPrimAPI_MakeSphere(30.).Shape()
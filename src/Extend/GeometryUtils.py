@@ -0,0 +1,293 @@
+##Copyright 2018 The pythonOCC developers
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+""" Batch evaluation of curves and surfaces, and batch transformations,
+over numpy arrays.
+
+The evaluators accept a float64 array of N parameters (curves) or a (N, 2)
+array of UV parameters (surfaces) and return (N, 3) float64 arrays. The
+whole array is evaluated by a single call to the EvaluateArray extension of
+Geom_Curve, Adaptor3d_Curve, Geom_Surface and Adaptor3d_Surface, which
+releases the GIL: normals and curvatures are then computed by numpy from
+the points and derivatives, without any other call to OCC.
+
+gp_Trsf and gp_GTrsf are converted to 4x4 numpy matrices, so that
+transforming point arrays and composing transformations is done by numpy
+as well.
+"""
+
+import numpy as np
+
+from OCC.Core.BRepAdaptor import BRepAdaptor_Curve, BRepAdaptor_Surface
+from OCC.Core.TopAbs import TopAbs_EDGE, TopAbs_FACE, TopAbs_REVERSED
+from OCC.Core.TopoDS import TopoDS_Shape, topods_Edge, topods_Face
+from OCC.Core.gp import gp_Trsf, gp_GTrsf
+
+
+def _as_curve(curve):
+    """ accepts a TopoDS_Edge, a BRepAdaptor_Curve, a GeomAdaptor_Curve or a Geom_Curve
+    """
+    if isinstance(curve, TopoDS_Shape):
+        if curve.ShapeType() != TopAbs_EDGE:
+            raise AssertionError("You must provide a TopoDS_Edge or a curve.")
+        return BRepAdaptor_Curve(topods_Edge(curve))
+    return curve
+
+
+def _as_surface(surface):
+    """ accepts a TopoDS_Face, a BRepAdaptor_Surface, a GeomAdaptor_Surface or a Geom_Surface.
+    Also returns True if the normals have to be reversed, i.e. for reversed faces.
+    """
+    if isinstance(surface, TopoDS_Shape):
+        if surface.ShapeType() != TopAbs_FACE:
+            raise AssertionError("You must provide a TopoDS_Face or a surface.")
+        return BRepAdaptor_Surface(topods_Face(surface)), surface.Orientation() == TopAbs_REVERSED
+    return surface, False
+
+
+def _as_parameters(parameters):
+    parameters = np.ascontiguousarray(parameters, dtype=np.float64)
+    if parameters.ndim != 1:
+        raise AssertionError("parameters must be a 1D array.")
+    return parameters
+
+
+def _as_uv(uv):
+    uv = np.ascontiguousarray(uv, dtype=np.float64)
+    if uv.ndim != 2 or uv.shape[1] != 2:
+        raise AssertionError("uv must be a (N, 2) array.")
+    return uv
+
+
+def _evaluate_array(geometry, parameters, order):
+    """ the (N, 3) arrays of the points and derivatives returned by EvaluateArray
+    """
+    return tuple(np.frombuffer(values, dtype=np.float64).reshape(-1, 3)
+                 for values in geometry.EvaluateArray(parameters, order))
+
+
+def _normalized(vectors):
+    norms = np.linalg.norm(vectors, axis=1)
+    result = np.zeros_like(vectors)
+    np.divide(vectors, norms[:, np.newaxis], out=result, where=norms[:, np.newaxis] > 0.)
+    return result
+
+
+#
+# Curves
+#
+def curve_values(curve, parameters):
+    """ Returns the (N, 3) array of the points of curve at the given parameters
+    """
+    return _evaluate_array(_as_curve(curve), _as_parameters(parameters), 0)[0]
+
+
+def curve_derivatives(curve, parameters, order=1):
+    """ Returns the points and the derivatives of curve at the given parameters,
+    as a tuple of (N, 3) arrays: (points, d1) if order is 1, (points, d1, d2)
+    if order is 2.
+    """
+    if order not in (1, 2):
+        raise AssertionError("order must be either 1 or 2.")
+    return _evaluate_array(_as_curve(curve), _as_parameters(parameters), order)
+
+
+def curve_tangents(curve, parameters):
+    """ Returns the (N, 3) array of unit tangents, zero where the tangent is undefined
+    """
+    _, d1 = curve_derivatives(curve, parameters, order=1)
+    return _normalized(d1)
+
+
+def curve_curvatures(curve, parameters):
+    """ Returns the (N,) array of the curvatures of curve at the given parameters,
+    computed as |d1 x d2| / |d1|^3. Curvature is 0 where d1 vanishes.
+    """
+    _, d1, d2 = curve_derivatives(curve, parameters, order=2)
+    speed = np.linalg.norm(d1, axis=1)
+    curvatures = np.zeros_like(speed)
+    np.divide(np.linalg.norm(np.cross(d1, d2), axis=1), speed ** 3,
+              out=curvatures, where=speed > 0.)
+    return curvatures
+
+
+#
+# Surfaces
+#
+def surface_values(surface, uv):
+    """ Returns the (N, 3) array of the points of surface at the given (N, 2) uv parameters
+    """
+    surface, _ = _as_surface(surface)
+    return _evaluate_array(surface, _as_uv(uv), 0)[0]
+
+
+def surface_derivatives(surface, uv, order=1):
+    """ Returns the points and the partial derivatives of surface at the given
+    uv parameters, as a tuple of (N, 3) arrays:
+    * (points, d1u, d1v) if order is 1,
+    * (points, d1u, d1v, d2u, d2v, d2uv) if order is 2.
+    """
+    if order not in (1, 2):
+        raise AssertionError("order must be either 1 or 2.")
+    surface, _ = _as_surface(surface)
+    return _evaluate_array(surface, _as_uv(uv), order)
+
+
+def surface_normals(surface, uv):
+    """ Returns the (N, 3) array of unit normals, zero where the normal is undefined.
+    If surface is a reversed TopoDS_Face, the normals are reversed as well.
+    """
+    _, reversed_face = _as_surface(surface)
+    _, d1u, d1v = surface_derivatives(surface, uv, order=1)
+    normals = _normalized(np.cross(d1u, d1v))
+    if reversed_face:
+        normals = -normals
+    return normals
+
+
+def surface_curvatures(surface, uv):
+    """ Returns the gaussian, mean, min and max curvatures of surface at the
+    given uv parameters, as a tuple of four (N,) arrays. The values are
+    computed from the first and second fundamental forms. They are 0 where
+    the normal is undefined. The sign of the mean, min and max curvatures
+    follows the orientation of the normal returned by surface_normals.
+    """
+    _, reversed_face = _as_surface(surface)
+    _, d1u, d1v, d2u, d2v, d2uv = surface_derivatives(surface, uv, order=2)
+    cross = np.cross(d1u, d1v)
+    normals = _normalized(cross)
+    if reversed_face:
+        normals = -normals
+    # first fundamental form
+    e = np.einsum('ij,ij->i', d1u, d1u)
+    f = np.einsum('ij,ij->i', d1u, d1v)
+    g = np.einsum('ij,ij->i', d1v, d1v)
+    # second fundamental form
+    l = np.einsum('ij,ij->i', d2u, normals)
+    m = np.einsum('ij,ij->i', d2uv, normals)
+    n = np.einsum('ij,ij->i', d2v, normals)
+    det = e * g - f * f
+    valid = det > 0.
+    gaussian = np.zeros_like(det)
+    mean = np.zeros_like(det)
+    np.divide(l * n - m * m, det, out=gaussian, where=valid)
+    np.divide(e * n - 2. * f * m + g * l, 2. * det, out=mean, where=valid)
+    delta = np.sqrt(np.maximum(mean * mean - gaussian, 0.))
+    return gaussian, mean, mean - delta, mean + delta
+
+
+#
+# Transformations
+#
+def trsf_to_matrix(trsf):
+    """ Returns the 4x4 float64 matrix of a gp_Trsf or a gp_GTrsf, such that
+    the transformed point p' = M.dot([x, y, z, 1]). The last row is [0, 0, 0, 1].
+    """
+    matrix = np.identity(4)
+    value = trsf.Value
+    for i in range(3):
+        for j in range(4):
+            matrix[i, j] = value(i + 1, j + 1)
+    return matrix
+
+
+def matrix_to_trsf(matrix):
+    """ Returns the gp_Trsf of a 4x4 (or 3x4) matrix. The 3x3 part must be
+    a rotation, possibly multiplied by a scale factor, otherwise gp_Trsf
+    raises an exception: use matrix_to_gtrsf for affine transformations.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.shape not in ((4, 4), (3, 4)):
+        raise AssertionError("matrix must be a 4x4 or 3x4 array.")
+    trsf = gp_Trsf()
+    trsf.SetValues(*matrix[:3, :].ravel().tolist())
+    return trsf
+
+
+def matrix_to_gtrsf(matrix):
+    """ Returns the gp_GTrsf of a 4x4 (or 3x4) matrix
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.shape not in ((4, 4), (3, 4)):
+        raise AssertionError("matrix must be a 4x4 or 3x4 array.")
+    gtrsf = gp_GTrsf()
+    for i in range(3):
+        for j in range(4):
+            gtrsf.SetValue(i + 1, j + 1, float(matrix[i, j]))
+    return gtrsf
+
+
+def _as_matrices(transformations):
+    """ a gp_Trsf, a gp_GTrsf, a (4, 4) array, a sequence of them or a
+    (K, 4, 4) array to a float64 array of shape (4, 4) or (K, 4, 4)
+    """
+    if isinstance(transformations, (gp_Trsf, gp_GTrsf)):
+        return trsf_to_matrix(transformations)
+    if isinstance(transformations, (list, tuple)) and transformations and \
+            isinstance(transformations[0], (gp_Trsf, gp_GTrsf)):
+        return np.array([trsf_to_matrix(t) for t in transformations])
+    matrices = np.asarray(transformations, dtype=np.float64)
+    if matrices.shape[-2:] != (4, 4) or matrices.ndim not in (2, 3):
+        raise AssertionError("transformations must be 4x4 matrices.")
+    return matrices
+
+
+def _as_points(points):
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] != 3:
+        raise AssertionError("points must be a (N, 3) array.")
+    return points
+
+
+def transform_points(points, transformation):
+    """ Applies a transformation to an (N, 3) array of points.
+    transformation: a gp_Trsf, a gp_GTrsf or a 4x4 matrix.
+    If a sequence of K transformations (or a (K, 4, 4) array) is given, the
+    points are placed by each of them and a (K, N, 3) array is returned,
+    which is what is needed to place all the instances of an assembly part.
+    """
+    points = _as_points(points)
+    matrices = _as_matrices(transformation)
+    if matrices.ndim == 2:
+        return points.dot(matrices[:3, :3].T) + matrices[:3, 3]
+    return np.einsum('kij,nj->kni', matrices[:, :3, :3], points) + matrices[:, np.newaxis, :3, 3]
+
+
+def transform_vectors(vectors, transformation):
+    """ Applies the vectorial part of a transformation (no translation) to an
+    (N, 3) array of vectors. Same conventions as transform_points.
+    """
+    vectors = _as_points(vectors)
+    matrices = _as_matrices(transformation)
+    if matrices.ndim == 2:
+        return vectors.dot(matrices[:3, :3].T)
+    return np.einsum('kij,nj->kni', matrices[:, :3, :3], vectors)
+
+
+def compose_transformations(first, second):
+    """ Returns the matrices of the transformations "first, then second",
+    i.e. second * first, as gp_Trsf.Multiplied would do. Both arguments
+    accept the same types as transform_points, with numpy broadcasting:
+    a single transformation can be composed with an array of K of them.
+    """
+    return np.matmul(_as_matrices(second), _as_matrices(first))
+
+
+def invert_transformations(transformations):
+    """ Returns the inverse matrices of one or several transformations
+    """
+    return np.linalg.inv(_as_matrices(transformations))
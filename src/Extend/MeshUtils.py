@@ -0,0 +1,352 @@
+##Copyright 2018 The pythonOCC developers
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+""" Access to the Poly_Triangulation of faces, and to the discretization
+of edges, as numpy arrays.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from OCC.Core.BRep import BRep_Tool, BRep_Builder
+from OCC.Core.BRepAdaptor import BRepAdaptor_Curve
+from OCC.Core.BRepBndLib import brepbndlib_Add
+from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+from OCC.Core.Bnd import Bnd_Box
+from OCC.Core.GCPnts import GCPnts_UniformAbscissa, GCPnts_QuasiUniformDeflection
+from OCC.Core.Poly import Poly_Array1OfTriangle, Poly_Triangle, Poly_Triangulation
+from OCC.Core.TColgp import TColgp_Array1OfPnt
+from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_EDGE, TopAbs_REVERSED, TopAbs_COMPOUND
+from OCC.Core.TopExp import TopExp_Explorer, topexp_MapShapes
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.TopTools import TopTools_IndexedMapOfShape
+from OCC.Core.TopoDS import TopoDS_Face, TopoDS_Iterator, topods_Face, topods_Edge
+from OCC.Core.gp import gp_Pnt
+
+from OCC.Extend.GeometryUtils import surface_normals, trsf_to_matrix, curve_values
+from OCC.Extend.ParallelUtils import get_shape, process_cached, map_array_chunks
+
+# nodes: (N, 3) float64, in the global coordinate system
+# triangles: (M, 3) int32, 0-based indices in nodes
+# uv_nodes: (N, 2) float64, or None if the triangulation has no UV nodes
+# normals: (N, 3) float64 unit normals, or None if not requested
+FaceMesh = namedtuple("FaceMesh", ["nodes", "triangles", "uv_nodes", "normals"])
+
+# the FaceMesh fields of all faces concatenated, triangle indices refer to
+# the concatenated nodes. face_ids gives, for each triangle, the index of its
+# face in the TopExp_Explorer order, node_offsets the index of the first
+# node of each meshed face (with a last item equal to the total number of nodes)
+ShapeMesh = namedtuple("ShapeMesh", ["nodes", "triangles", "uv_nodes", "normals",
+                                     "face_ids", "node_offsets"])
+
+# points: (N, 3) float32, the points of all the edges, packed
+# offsets: (E + 1,) int64, the points of the k-th edge are
+#          points[offsets[k]:offsets[k + 1]], empty for degenerated edges
+# edge_ids: (E,) int32, the 0-based index of each edge in the
+#           TopExp::MapShapes order (see OCC.Extend.TopologyIndex)
+EdgesDiscretization = namedtuple("EdgesDiscretization", ["points", "offsets", "edge_ids"])
+
+
+def _mesh_parts(a_shape):
+    """ the items of the compounds of a_shape, recursively
+    """
+    parts = []
+    stack = [a_shape]
+    while stack:
+        current = stack.pop()
+        if current.ShapeType() != TopAbs_COMPOUND:
+            parts.append(current)
+            continue
+        children = []
+        iterator = TopoDS_Iterator(current)
+        while iterator.More():
+            children.append(iterator.Value())
+            iterator.Next()
+        stack.extend(reversed(children))
+    return parts
+
+
+def mesh_shape(a_shape, linear_deflection=0.1, angular_deflection=0.5,
+               is_relative=False, parallel=False, progress=None):
+    """ computes the triangulation of all the faces of a_shape
+    progress: optional, an OCC.Extend.ProgressUtils.ProgressIndicator. The
+              shape is then meshed one part (item of its compounds) at a
+              time, the progress being reported, and cancellation checked,
+              between two parts. Faces shared by several parts are only
+              meshed once.
+    """
+    if progress is None:
+        parts = [a_shape]
+    else:
+        parts = _mesh_parts(a_shape)
+        progress.start("mesh", len(parts))
+    for part in parts:
+        mesh = BRepMesh_IncrementalMesh(part, linear_deflection, is_relative,
+                                        angular_deflection, parallel)
+        mesh.Perform()
+        if not mesh.IsDone():
+            raise AssertionError("Mesh is not done.")
+        if progress is not None:
+            progress.advance()
+    if progress is not None:
+        progress.finish()
+
+
+def tesselate(a_shape, mesh_quality=1.0, uv_coords=True, compute_edges=False,
+              parallel=False, deviation=None, progress=None):
+    """ Returns an OCC.Core.Visualization.Tesselator of a_shape, computed
+    with the given options (see Tesselator.Compute).
+    deviation: optional, the linear deflection of the mesh for a
+               mesh_quality of 1. By default, 2% of the largest dimension of
+               the bounding box of the shape, as the Tesselator does.
+    progress: optional, a ProgressIndicator. The shape is first meshed part
+              by part by mesh_shape, and the same deviation is given to the
+              tesselator, so that Tesselator.Compute reuses these
+              triangulations and only converts them.
+    """
+    from OCC.Core.Visualization import Tesselator
+    if deviation is None and progress is not None:
+        box = Bnd_Box()
+        brepbndlib_Add(a_shape, box)
+        xmin, ymin, zmin, xmax, ymax, zmax = box.Get()
+        deviation = max(xmax - xmin, ymax - ymin, zmax - zmin) * 2e-2
+    tess = Tesselator(a_shape)
+    if deviation is not None:
+        tess.SetDeviation(deviation)
+    if progress is not None:
+        # Compute takes mesh_quality as a C++ float: the same rounding
+        # gives the same deflections, and the triangulations are reused
+        quality = float(np.float32(mesh_quality))
+        mesh_shape(a_shape, deviation * quality, 0.5 * quality, False,
+                   parallel, progress)
+        progress.start("tesselate", 1)
+    tess.Compute(uv_coords=uv_coords, compute_edges=compute_edges,
+                 mesh_quality=mesh_quality, parallel=parallel)
+    if progress is not None:
+        progress.finish()
+    return tess
+
+
+def weld_vertices(nodes, triangles, tolerance=0.):
+    """ Merges the nodes closer than tolerance (identical nodes if tolerance
+    is 0) and returns the (nodes, triangles) of the welded mesh. Triangles
+    that become degenerated are removed.
+    """
+    nodes = np.asarray(nodes)
+    if tolerance > 0.:
+        keys = np.floor(nodes / tolerance + 0.5).astype(np.int64)
+    else:
+        keys = nodes
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    triangles = inverse.reshape(-1)[np.asarray(triangles)].astype(np.int32)
+    valid = ((triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) &
+             (triangles[:, 0] != triangles[:, 2]))
+    return nodes[first], triangles[valid]
+
+
+def mesh_to_face(nodes, triangles):
+    """ Returns a TopoDS_Face without surface, carrying a single
+    Poly_Triangulation built from nodes, (N, 3), and triangles, (M, 3)
+    0-based indices.
+    """
+    nodes = np.asarray(nodes, dtype=np.float64)
+    triangles = np.asarray(triangles, dtype=np.int32) + 1
+    occ_nodes = TColgp_Array1OfPnt(1, nodes.shape[0])
+    for i, (x, y, z) in enumerate(nodes.tolist()):
+        occ_nodes.SetValue(i + 1, gp_Pnt(x, y, z))
+    occ_triangles = Poly_Array1OfTriangle(1, triangles.shape[0])
+    for i, (n1, n2, n3) in enumerate(triangles.tolist()):
+        occ_triangles.SetValue(i + 1, Poly_Triangle(n1, n2, n3))
+    face = TopoDS_Face()
+    BRep_Builder().MakeFace(face, Poly_Triangulation(occ_nodes, occ_triangles))
+    return face
+
+
+def tesselator_mesh(tesselator, weld=True):
+    """ Returns the (nodes, triangles) arrays of a computed
+    OCC.Core.Visualization.Tesselator: (N, 3) float32 and (M, 3) int32.
+    The tesselator provides three nodes per triangle, that are merged if
+    weld is True.
+    """
+    nodes = np.array(tesselator.GetVerticesPositionAsTuple(), dtype=np.float32).reshape(-1, 3)
+    triangles = np.arange(nodes.shape[0], dtype=np.int32).reshape(-1, 3)
+    if weld:
+        return weld_vertices(nodes, triangles)
+    return nodes, triangles
+
+
+def face_triangulation(a_face, compute_normals=True, linear_deflection=None):
+    """ Returns the triangulation of a_face as a FaceMesh, None if the face
+    has no triangulation.
+    a_face: a TopoDS_Face
+    compute_normals: optional, True by default. The normals stored in the
+                     triangulation are used if any, otherwise they are
+                     computed from the surface at the UV nodes.
+    linear_deflection: optional. If set, and if the face is not meshed yet,
+                       the face is meshed with that deflection.
+    Triangles of reversed faces are reordered, so that the winding of every
+    triangle is consistent with the outward normal.
+    """
+    brt = BRep_Tool()
+    location = TopLoc_Location()
+    triangulation = brt.Triangulation(a_face, location)
+    if triangulation is None and linear_deflection is not None:
+        mesh_shape(a_face, linear_deflection)
+        triangulation = brt.Triangulation(a_face, location)
+    if triangulation is None:
+        return None
+
+    # all the arrays are copied by a single call to the wrapper
+    nodes, triangles, uv_nodes, occ_normals = triangulation.Buffers()
+    nodes = np.frombuffer(nodes, dtype=np.float64).reshape(-1, 3)
+    triangles = np.frombuffer(triangles, dtype=np.intc).reshape(-1, 3).astype(np.int32, copy=False)
+    if a_face.Orientation() == TopAbs_REVERSED:
+        triangles = triangles[:, [0, 2, 1]]
+    if uv_nodes is not None:
+        uv_nodes = np.frombuffer(uv_nodes, dtype=np.float64).reshape(-1, 2)
+
+    matrix = None
+    if not location.IsIdentity():
+        matrix = trsf_to_matrix(location.Transformation())
+        nodes = nodes.dot(matrix[:3, :3].T) + matrix[:3, 3]
+
+    normals = None
+    if compute_normals:
+        if occ_normals is not None:
+            normals = np.frombuffer(occ_normals, dtype=np.float32).reshape(-1, 3).astype(np.float64)
+            if matrix is not None:
+                normals = normals.dot(matrix[:3, :3].T)
+            if a_face.Orientation() == TopAbs_REVERSED:
+                normals = -normals
+        elif uv_nodes is not None:
+            # the surface adaptor already takes the face location into account
+            normals = surface_normals(a_face, uv_nodes)
+    return FaceMesh(nodes, triangles, uv_nodes, normals)
+
+
+def shape_triangulation(a_shape, compute_normals=True, linear_deflection=None):
+    """ Returns the triangulation of all the faces of a_shape as a ShapeMesh.
+    Faces without triangulation are skipped. If linear_deflection is set,
+    the shape is meshed first, in one BRepMesh_IncrementalMesh call.
+    uv_nodes (resp. normals) is None if at least one face does not provide
+    them.
+    """
+    if linear_deflection is not None:
+        mesh_shape(a_shape, linear_deflection)
+    face_meshes = []
+    face_ids = []
+    explorer = TopExp_Explorer(a_shape, TopAbs_FACE)
+    face_id = 0
+    while explorer.More():
+        face_mesh = face_triangulation(topods_Face(explorer.Current()), compute_normals)
+        if face_mesh is not None:
+            face_meshes.append(face_mesh)
+            face_ids.append(np.full(face_mesh.triangles.shape[0], face_id, dtype=np.int32))
+        face_id += 1
+        explorer.Next()
+
+    if not face_meshes:
+        return ShapeMesh(np.empty((0, 3)), np.empty((0, 3), dtype=np.int32), None, None,
+                         np.empty(0, dtype=np.int32), np.zeros(1, dtype=np.int64))
+
+    node_offsets = np.zeros(len(face_meshes) + 1, dtype=np.int64)
+    node_offsets[1:] = np.cumsum([m.nodes.shape[0] for m in face_meshes])
+    nodes = np.concatenate([m.nodes for m in face_meshes])
+    triangles = np.concatenate([m.triangles + offset
+                                for m, offset in zip(face_meshes, node_offsets[:-1])]).astype(np.int32)
+    uv_nodes = None
+    if all(m.uv_nodes is not None for m in face_meshes):
+        uv_nodes = np.concatenate([m.uv_nodes for m in face_meshes])
+    normals = None
+    if all(m.normals is not None for m in face_meshes):
+        normals = np.concatenate([m.normals for m in face_meshes])
+    return ShapeMesh(nodes, triangles, uv_nodes, normals,
+                     np.concatenate(face_ids), node_offsets)
+
+
+def edge_points(an_edge, deflection=0.1, abscissa=None):
+    """ Returns the (N, 3) float64 array of the points that discretize
+    an_edge, in the direction of its curve. The curve is discretized with a
+    GCPnts_QuasiUniformDeflection, or with a GCPnts_UniformAbscissa if
+    abscissa (the distance between two points) is set. Degenerated edges
+    return an empty array.
+    """
+    if BRep_Tool().Degenerated(an_edge):
+        return np.empty((0, 3))
+    curve_adaptator = BRepAdaptor_Curve(an_edge)
+    first = curve_adaptator.FirstParameter()
+    last = curve_adaptator.LastParameter()
+    if abscissa is not None:
+        discretizer = GCPnts_UniformAbscissa()
+        discretizer.Initialize(curve_adaptator, float(abscissa), first, last)
+    else:
+        discretizer = GCPnts_QuasiUniformDeflection()
+        discretizer.Initialize(curve_adaptator, float(deflection), first, last)
+    if not discretizer.IsDone() or discretizer.NbPoints() < 2:
+        # edge shorter than the abscissa: its ends are enough
+        return curve_values(curve_adaptator, [first, last])
+    parameters = [discretizer.Parameter(i) for i in range(1, discretizer.NbPoints() + 1)]
+    return curve_values(curve_adaptator, parameters)
+
+
+def _edges_map(a_shape):
+    _map = TopTools_IndexedMapOfShape()
+    topexp_MapShapes(a_shape, TopAbs_EDGE, _map)
+    return _map
+
+
+def _discretize_edges_chunk(a_shape, edge_ids, deflection, abscissa):
+    edges_map = process_cached(a_shape, "edges_map", _edges_map)
+    points = []
+    counts = np.zeros(edge_ids.shape[0], dtype=np.int64)
+    for k, edge_id in enumerate(edge_ids.tolist()):
+        an_edge = topods_Edge(edges_map.FindKey(edge_id + 1))
+        edge_points_array = edge_points(an_edge, deflection, abscissa)
+        if edge_points_array.shape[0] > 0:
+            points.append(edge_points_array.astype(np.float32))
+            counts[k] = edge_points_array.shape[0]
+    if not points:
+        return np.empty((0, 3), dtype=np.float32), counts
+    return np.concatenate(points), counts
+
+
+def discretize_edges(a_shape, deflection=0.1, abscissa=None, edge_ids=None,
+                     max_workers=None, chunk_size=1024):
+    """ Discretizes all the edges of a_shape at once, see edge_points.
+    Returns an EdgesDiscretization: the points of all the edges packed in a
+    single float32 array, the offsets of each edge in that array and the
+    edge ids. Each edge is discretized once, even if it is shared by several
+    faces. Points follow the direction of the edge curve, whatever the
+    orientation of the edge.
+    edge_ids: optional, the ids of the edges to discretize, all by default
+    max_workers, chunk_size: see ParallelUtils.map_array_chunks. Edges are
+              discretized by a process pool if there are more than
+              chunk_size of them.
+    """
+    if edge_ids is None:
+        edge_ids = np.arange(_edges_map(get_shape(a_shape)).Extent(), dtype=np.int32)
+    edge_ids = np.asarray(edge_ids, dtype=np.int32)
+    if edge_ids.shape[0] == 0:
+        return EdgesDiscretization(np.empty((0, 3), dtype=np.float32),
+                                   np.zeros(1, dtype=np.int64), edge_ids)
+    points, counts = map_array_chunks(_discretize_edges_chunk, a_shape, edge_ids,
+                                      args=(deflection, abscissa),
+                                      max_workers=max_workers, chunk_size=chunk_size)
+    offsets = np.zeros(edge_ids.shape[0] + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+    return EdgesDiscretization(points, offsets, edge_ids)
@@ -0,0 +1,348 @@
+##Copyright 2018 The pythonOCC developers
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+""" Helpers to share a TopoDS_Shape between the processes of a pool.
+
+The shape is serialized only once, by the parent process, into a shared
+memory segment (or a memory mapped temporary file). What is sent to the
+workers is only the name of that segment, so that each worker rebuilds the
+shape at most once, whatever the number of tasks it runs. Sub-shapes are
+referred to by their integer index in the TopExp::MapShapes order, which
+is the same in every process since all of them read the same data.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from multiprocessing import shared_memory
+    HAVE_SHARED_MEMORY = True
+except ImportError:  # python < 3.8
+    HAVE_SHARED_MEMORY = False
+
+from OCC.Core.BRepTools import BRepTools_ShapeSet
+from OCC.Core.TopAbs import TopAbs_SOLID
+from OCC.Core.TopExp import topexp_MapShapes
+from OCC.Core.TopTools import TopTools_IndexedMapOfShape
+
+# magic, format version, location index, orientation, payload size
+_HEADER = struct.Struct("<8sIiiQ")
+_MAGIC = b"OCCSHAPE"
+_VERSION = 1
+
+# shapes already rebuilt in the current process, by segment name, the
+# most recently used last. Workers of a long-lived pool never see the
+# owner close the shared shapes, so only the MAX_ATTACHED_SHAPES last ones
+# are kept, with the objects of _PROCESS_CACHE computed from them.
+MAX_ATTACHED_SHAPES = 16
+_ATTACHED_SHAPES = OrderedDict()
+# objects computed from a shared shape in the current process,
+# by (segment name, tag)
+_PROCESS_CACHE = {}
+
+
+def _forget_shape(name):
+    _ATTACHED_SHAPES.pop(name, None)
+    for key in [k for k in _PROCESS_CACHE if k[0] == name]:
+        del _PROCESS_CACHE[key]
+
+
+def _attach_shape(name, a_shape):
+    _ATTACHED_SHAPES[name] = a_shape
+    while len(_ATTACHED_SHAPES) > MAX_ATTACHED_SHAPES:
+        _forget_shape(next(iter(_ATTACHED_SHAPES)))
+
+
+def serialize_shape(a_shape):
+    """ Returns the bytes that describe a_shape, header included.
+    This is the format stored in the shared segment, it can also be written
+    to disk or sent over a socket and read back with deserialize_shape.
+    """
+    if a_shape.IsNull():
+        raise AssertionError("Shape is null.")
+    shape_set = BRepTools_ShapeSet()
+    shape_set.Add(a_shape)
+    payload = shape_set.WriteToString().encode("utf-8")
+    location_index = shape_set.Locations().Index(a_shape.Location())
+    header = _HEADER.pack(_MAGIC, _VERSION, location_index,
+                          int(a_shape.Orientation()), len(payload))
+    return header + payload
+
+
+def deserialize_shape(buffer):
+    """ Rebuilds a TopoDS_Shape from bytes (or any buffer, for instance a
+    memoryview over a shared memory segment) produced by serialize_shape
+    """
+    magic, version, location_index, orientation, size = _HEADER.unpack_from(buffer, 0)
+    if magic != _MAGIC:
+        raise AssertionError("Buffer does not contain a serialized shape.")
+    if version != _VERSION:
+        raise AssertionError("Unsupported shape serialization version %i." % version)
+    start = _HEADER.size
+    payload = bytes(buffer[start:start + size]).decode("utf-8")
+    shape_set = BRepTools_ShapeSet()
+    shape_set.ReadFromString(payload)
+    the_shape = shape_set.Shape(shape_set.NbShapes())
+    the_shape.Location(shape_set.Locations().Location(location_index))
+    the_shape.Orientation(orientation)
+    return the_shape
+
+
+class SharedShape(object):
+    """ A TopoDS_Shape serialized once and shared by several processes.
+
+    The process that creates the SharedShape owns the underlying memory and
+    is responsible for releasing it with unlink() (or by using the object as
+    a context manager). Pickling a SharedShape only transmits the name of the
+    segment: pass it as an argument to ProcessPoolExecutor tasks and call
+    shape() or sub_shape(index) from the worker.
+
+    shared = SharedShape(big_assembly)
+    with ProcessPoolExecutor() as pool:
+        volumes = list(pool.map(compute_volume, [shared] * n, range(n)))
+    shared.unlink()
+    """
+    def __init__(self, a_shape, use_mmap=False, directory=None):
+        """
+        a_shape: the topods_shape to share
+        use_mmap: optional, False by default. If True, or if the python
+                  interpreter does not provide multiprocessing.shared_memory,
+                  the data is stored in a memory mapped temporary file.
+        directory: optional, the folder where the temporary file is created
+                   when the mmap backend is used.
+        """
+        data = serialize_shape(a_shape)
+        self._size = len(data)
+        self._owner = True
+        self._shape = a_shape
+        self._maps = {}
+        if HAVE_SHARED_MEMORY and not use_mmap:
+            self._backend = "shm"
+            self._segment = shared_memory.SharedMemory(create=True, size=self._size)
+            self._segment.buf[:self._size] = data
+            self._name = self._segment.name
+        else:
+            self._backend = "mmap"
+            file_descriptor, self._name = tempfile.mkstemp(prefix="occ_shape_",
+                                                           suffix=".bin",
+                                                           dir=directory)
+            with os.fdopen(file_descriptor, "wb") as f:
+                f.write(data)
+            self._segment = None
+        _attach_shape(self._name, a_shape)
+
+    @property
+    def name(self):
+        """ the name of the shared memory segment, or the path of the mmap-ed file
+        """
+        return self._name
+
+    @property
+    def nbytes(self):
+        return self._size
+
+    def __getstate__(self):
+        return {"backend": self._backend, "name": self._name, "size": self._size}
+
+    def __setstate__(self, state):
+        self._backend = state["backend"]
+        self._name = state["name"]
+        self._size = state["size"]
+        self._owner = False
+        self._segment = None
+        self._maps = {}
+        self._shape = _ATTACHED_SHAPES.get(self._name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unlink()
+
+    def _read(self):
+        if self._backend == "shm":
+            try:
+                segment = shared_memory.SharedMemory(name=self._name, track=False)
+            except TypeError:  # python < 3.13, no track parameter
+                from multiprocessing import resource_tracker
+                segment = shared_memory.SharedMemory(name=self._name)
+                # the owner process is in charge of unlinking the segment
+                resource_tracker.unregister(segment._name, "shared_memory")
+            try:
+                return deserialize_shape(segment.buf)
+            finally:
+                segment.close()
+        with open(self._name, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                return deserialize_shape(mapped)
+            finally:
+                mapped.close()
+
+    def shape(self):
+        """ returns the shared shape. Rebuilt once per process, then cached.
+        """
+        if self._shape is None:
+            if self._name in _ATTACHED_SHAPES:
+                _ATTACHED_SHAPES.move_to_end(self._name)
+            else:
+                _attach_shape(self._name, self._read())
+            self._shape = _ATTACHED_SHAPES[self._name]
+        return self._shape
+
+    def _sub_shapes_map(self, topology_type):
+        if topology_type not in self._maps:
+            _map = TopTools_IndexedMapOfShape()
+            topexp_MapShapes(self.shape(), topology_type, _map)
+            self._maps[topology_type] = _map
+        return self._maps[topology_type]
+
+    def number_of_sub_shapes(self, topology_type=TopAbs_SOLID):
+        """ size of the shape index table for the given topology type
+        """
+        return self._sub_shapes_map(topology_type).Extent()
+
+    def sub_shape(self, index, topology_type=TopAbs_SOLID):
+        """ returns the sub-shape of the given type and 0-based index.
+        Indices follow the TopExp::MapShapes order, they are the same in
+        every process that attached the shared shape.
+        """
+        _map = self._sub_shapes_map(topology_type)
+        if not 0 <= index < _map.Extent():
+            raise IndexError("sub-shape index %i out of range" % index)
+        return _map.FindKey(index + 1)
+
+    def sub_shape_index(self, a_sub_shape, topology_type=TopAbs_SOLID):
+        """ the 0-based index of a sub-shape, -1 if it is not part of the shape
+        """
+        return self._sub_shapes_map(topology_type).FindIndex(a_sub_shape) - 1
+
+    def close(self):
+        """ forgets the shape rebuilt in this process
+        """
+        _forget_shape(self._name)
+        self._shape = None
+        self._maps = {}
+
+    def unlink(self):
+        """ releases the shared memory. Only the owner process can do that.
+        """
+        self.close()
+        if not self._owner:
+            return
+        if self._backend == "shm":
+            if self._segment is not None:
+                self._segment.close()
+                self._segment.unlink()
+                self._segment = None
+        elif os.path.isfile(self._name):
+            os.remove(self._name)
+
+
+def get_shape(a_shape):
+    """ returns a_shape, or the shape shared by a_shape if it is a SharedShape
+    """
+    if isinstance(a_shape, SharedShape):
+        return a_shape.shape()
+    return a_shape
+
+
+def process_cached(a_shape, tag, factory):
+    """ Returns factory(shape), computed only once per process when a_shape
+    is a SharedShape. Used by workers to keep acceleration structures
+    (classifiers, distance tools...) built for a shape from one task to
+    the next. tag identifies the kind of object built by factory.
+    """
+    if not isinstance(a_shape, SharedShape):
+        return factory(a_shape)
+    key = (a_shape.name, tag)
+    if key not in _PROCESS_CACHE:
+        _PROCESS_CACHE[key] = factory(a_shape.shape())
+    return _PROCESS_CACHE[key]
+
+
+def _concatenate_results(results):
+    import numpy as np
+    if isinstance(results[0], tuple):
+        return tuple(np.concatenate(r) for r in zip(*results))
+    return np.concatenate(results)
+
+
+def map_array_chunks(function, a_shape, array, args=(), max_workers=None, chunk_size=65536):
+    """ Calls function(shape, chunk, *args) on consecutive chunks of array
+    (split along the first axis) and concatenates the results. function
+    returns a numpy array, or a tuple of numpy arrays, with one item per
+    row of the chunk. It must be picklable, and should use get_shape and
+    process_cached to access the shape, which is a SharedShape in workers.
+    If array has less than chunk_size rows, or if max_workers is 1, the
+    function is called once in the current process. Otherwise the chunks
+    are processed by a pool of max_workers processes (os.cpu_count() by
+    default).
+    """
+    # numpy is only required when arrays are mapped
+    import numpy as np
+    array = np.asarray(array)
+    if max_workers == 1 or array.shape[0] <= chunk_size:
+        return function(a_shape, array, *args)
+    if isinstance(a_shape, SharedShape):
+        shared, owned = a_shape, False
+    else:
+        shared, owned = SharedShape(a_shape), True
+    try:
+        chunks = [array[i:i + chunk_size] for i in range(0, array.shape[0], chunk_size)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(function, shared, chunk, *args) for chunk in chunks]
+            return _concatenate_results([f.result() for f in futures])
+    finally:
+        if owned:
+            shared.unlink()
+
+
+def _apply_to_sub_shape(function, shared_shape, index, topology_type, args):
+    return function(shared_shape.sub_shape(index, topology_type), *args)
+
+
+def map_sub_shapes(function, a_shape, topology_type=TopAbs_SOLID, indices=None,
+                   args=(), max_workers=None, chunksize=1):
+    """ Calls function(sub_shape, *args) for each sub-shape of a_shape, in
+    a process pool, and returns the list of results in the index order.
+    function must be picklable, i.e. defined at the module level.
+    a_shape: a topods_shape, or a SharedShape to avoid serializing it again
+    indices: optional, the 0-based indices of the sub-shapes to process,
+             all of them by default
+    """
+    if isinstance(a_shape, SharedShape):
+        shared, owned = a_shape, False
+    else:
+        shared, owned = SharedShape(a_shape), True
+    try:
+        if indices is None:
+            indices = range(shared.number_of_sub_shapes(topology_type))
+        indices = list(indices)
+        n = len(indices)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(_apply_to_sub_shape, [function] * n, [shared] * n,
+                                   indices, [topology_type] * n, [args] * n,
+                                   chunksize=chunksize)
+            return list(results)
+    finally:
+        if owned:
+            shared.unlink()
@@ -0,0 +1,124 @@
+##Copyright 2018 The pythonOCC developers
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+
+""" Progress reporting and cancellation of long operations.
+
+A ProgressIndicator is passed to the DataExchange readers and to the
+MeshUtils meshing helpers. They split their work into phases and steps
+(roots of a file, parts of an assembly, files of a batch...) and, between
+two steps, report their progress and raise OperationCancelled if the
+indicator was cancelled or its deadline has passed. A step that runs in
+OpenCASCADE (the transfer of a root, the meshing of a part) cannot be
+interrupted: cancellation takes effect at the end of the step.
+
+progress = ProgressIndicator(callback=print, timeout=60.)
+try:
+    shape = read_step_file("part.stp", progress=progress)
+except OperationCancelled:
+    ...
+"""
+
+import time
+
+
+class OperationCancelled(Exception):
+    """ raised by an operation that was cancelled, or that timed out
+    """
+    pass
+
+
+class ProgressIndicator(object):
+    """ Tracks the progress of the current phase of an operation.
+
+    callback: optional, called as callback(name, value, total) with the name
+              of the phase, the number of steps done and the total number of
+              steps (None if unknown). Calls are throttled: at most one every
+              interval seconds, except at the end of each phase, which is
+              always reported. The callback can call cancel().
+    interval: optional, the minimum time between two callbacks, in seconds
+    timeout: optional, the operation is cancelled when it runs for longer
+             than timeout seconds, counted from the creation of the indicator
+    """
+    def __init__(self, callback=None, interval=0.1, timeout=None):
+        self._callback = callback
+        self._interval = interval
+        self._start = time.monotonic()
+        self._deadline = None if timeout is None else self._start + timeout
+        self._last_report = None
+        self._cancelled = False
+        self.name = None
+        self.value = 0
+        self.total = None
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self._start
+
+    @property
+    def cancelled(self):
+        """ True once cancel() was called or the deadline has passed
+        """
+        if not self._cancelled and self._deadline is not None:
+            self._cancelled = time.monotonic() > self._deadline
+        return self._cancelled
+
+    def cancel(self):
+        """ requests the cancellation of the operation, which stops at the
+        end of its current step. Can be called from another thread.
+        """
+        self._cancelled = True
+
+    def check(self):
+        """ raises OperationCancelled if the operation has to stop
+        """
+        if self.cancelled:
+            raise OperationCancelled("%s cancelled after %.2fs" % (self.name or "operation",
+                                                                  self.elapsed))
+
+    def start(self, name, total=None):
+        """ begins a new phase of total steps (None if unknown)
+        """
+        self.check()
+        self.name = name
+        self.value = 0
+        self.total = total
+        self._report(force=True)
+
+    def advance(self, steps=1):
+        """ marks steps as done, reports them and checks for cancellation
+        """
+        self.value += steps
+        self._report(force=False)
+        self.check()
+
+    def finish(self):
+        """ ends the current phase
+        """
+        if self.total is not None:
+            self.value = self.total
+        self._report(force=True)
+        self.check()
+
+    def _report(self, force):
+        if self._callback is None:
+            return
+        now = time.monotonic()
+        if force or self._last_report is None or now - self._last_report >= self._interval:
+            self._last_report = now
+            self._callback(self.name, self.value, self.total)
+
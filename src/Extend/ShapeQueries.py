@@ -0,0 +1,538 @@
+##Copyright 2018 The pythonOCC developers
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+""" Geometric queries on a shape for large arrays of points.
+
+The SWIG wrappers hold the GIL, so that the work is split between the
+processes of a pool rather than threads (see OCC.Extend.ParallelUtils).
+Each worker rebuilds the shape and its acceleration structures only once.
+"""
+
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+    HAVE_SCIPY = True
+except ImportError:
+    HAVE_SCIPY = False
+
+from OCC.Core.Bnd import Bnd_Box
+from OCC.Core.BRep import BRep_Builder, BRep_Tool
+from OCC.Core.BRepBndLib import brepbndlib_Add
+from OCC.Core.BRepClass3d import BRepClass3d_SolidClassifier
+from OCC.Core.BRepExtrema import BRepExtrema_DistShapeShape
+from OCC.Core.BRepGProp import brepgprop_VolumeProperties, brepgprop_SurfaceProperties
+from OCC.Core.GProp import GProp_GProps
+from OCC.Core.IntCurvesFace import IntCurvesFace_ShapeIntersector
+from OCC.Core.TopAbs import (TopAbs_IN, TopAbs_OUT, TopAbs_ON, TopAbs_UNKNOWN,
+                             TopAbs_FACE, TopAbs_SOLID, TopAbs_VERTEX)
+from OCC.Core.TopExp import TopExp_Explorer, topexp_MapShapes
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.TopTools import TopTools_IndexedMapOfShape
+from OCC.Core.TopoDS import TopoDS_Vertex, topods_Face, topods_Vertex
+from OCC.Core.gp import gp_Pnt, gp_Dir, gp_Lin
+
+from OCC.Extend.GeometryUtils import trsf_to_matrix
+from OCC.Extend.ParallelUtils import (SharedShape, get_shape, process_cached,
+                                      map_array_chunks, serialize_shape,
+                                      deserialize_shape)
+from OCC.Extend.TopologyUtils import ShapeDict
+
+# values of the state arrays returned by classify_points
+STATE_IN = TopAbs_IN
+STATE_OUT = TopAbs_OUT
+STATE_ON = TopAbs_ON
+STATE_UNKNOWN = TopAbs_UNKNOWN
+
+
+def _as_points(points):
+    points = np.ascontiguousarray(points, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] != 3:
+        raise AssertionError("points must be a (N, 3) array.")
+    return points
+
+
+def bounding_box(a_shape, tolerance=0., use_triangulation=False):
+    """ Returns the (2, 3) array [[xmin, ymin, zmin], [xmax, ymax, zmax]]
+    of the bounding box of a_shape, enlarged by tolerance.
+    By default the box is computed from the exact geometry, so that it is
+    guaranteed to contain the shape. With use_triangulation=True the
+    triangulation is used if any: the box is tighter, but only contains
+    the mesh.
+    """
+    box = Bnd_Box()
+    brepbndlib_Add(a_shape, box, use_triangulation)
+    if tolerance > 0.:
+        box.Enlarge(tolerance)
+    xmin, ymin, zmin, xmax, ymax, zmax = box.Get()
+    return np.array([[xmin, ymin, zmin], [xmax, ymax, zmax]])
+
+
+def _in_box(points, box):
+    return np.all((points >= box[0]) & (points <= box[1]), axis=1)
+
+
+def _classifier_data(a_solid):
+    return BRepClass3d_SolidClassifier(a_solid), bounding_box(a_solid)
+
+
+def _classify_chunk(a_solid, points, tolerance):
+    classifier, box = process_cached(a_solid, "classifier", _classifier_data)
+    states = np.full(points.shape[0], STATE_OUT, dtype=np.int8)
+    # only the points of the bounding box are sent to the classifier
+    candidates = np.nonzero(_in_box(points, box + [[-tolerance], [tolerance]]))[0]
+    pnt = gp_Pnt()
+    perform, state = classifier.Perform, classifier.State
+    for i, (x, y, z) in zip(candidates.tolist(), points[candidates].tolist()):
+        pnt.SetCoord(x, y, z)
+        perform(pnt, tolerance)
+        states[i] = state()
+    return states
+
+
+def classify_points(a_solid, points, tolerance=1e-7, max_workers=None, chunk_size=65536):
+    """ Classifies points against a solid.
+    a_solid: a TopoDS_Solid (or any closed shape), or a SharedShape of it
+    points: a (N, 3) array
+    tolerance: optional, the tolerance passed to BRepClass3d_SolidClassifier
+    max_workers, chunk_size: see ParallelUtils.map_array_chunks
+    Returns a (N,) int8 array of STATE_IN, STATE_OUT, STATE_ON (or STATE_UNKNOWN).
+    The solid classifier is built once per process, and points outside the
+    bounding box of the solid are classified OUT without calling it.
+    """
+    points = _as_points(points)
+    return map_array_chunks(_classify_chunk, a_solid, points, args=(tolerance,),
+                            max_workers=max_workers, chunk_size=chunk_size)
+
+
+def _map_shapes(a_shape, topology_type):
+    """ the list of the sub-shapes of a_shape, in the TopExp::MapShapes order
+    """
+    _map = TopTools_IndexedMapOfShape()
+    topexp_MapShapes(a_shape, topology_type, _map)
+    return [_map.FindKey(i) for i in range(1, _map.Extent() + 1)]
+
+
+def _box_distances(points, box):
+    """ distances from points to an axis aligned box, 0 inside the box
+    """
+    delta = np.maximum(np.maximum(box[0] - points, points - box[1]), 0.)
+    return np.sqrt(np.einsum('ij,ij->i', delta, delta))
+
+
+class _DistanceData(object):
+    """ what a process needs to compute distances to a shape
+    """
+    def __init__(self, a_shape):
+        self.faces = [topods_Face(f) for f in _map_shapes(a_shape, TopAbs_FACE)]
+        if not self.faces:
+            raise AssertionError("The shape has no face.")
+        self.boxes = np.array([bounding_box(f) for f in self.faces])
+        # points known to lie on the shape give an upper bound of the distance
+        brt = BRep_Tool()
+        self.vertices = np.array([brt.Pnt(topods_Vertex(v)).Coord()
+                                  for v in _map_shapes(a_shape, TopAbs_VERTEX)]).reshape(-1, 3)
+        self.tree = cKDTree(self.vertices) if HAVE_SCIPY and len(self.vertices) else None
+        self.tools = {}
+        self.vertex = TopoDS_Vertex()
+        self.builder = BRep_Builder()
+        self.builder.MakeVertex(self.vertex, gp_Pnt(), 1e-7)
+
+    def upper_bounds(self, points):
+        if len(self.vertices) == 0:
+            return np.full(points.shape[0], np.inf)
+        if self.tree is not None:
+            return self.tree.query(points)[0]
+        upper_bounds = np.full(points.shape[0], np.inf)
+        for vertex in self.vertices:
+            np.minimum(upper_bounds, np.linalg.norm(points - vertex, axis=1), out=upper_bounds)
+        return upper_bounds
+
+    def tool(self, face_index):
+        if face_index not in self.tools:
+            tool = BRepExtrema_DistShapeShape()
+            tool.LoadS2(self.faces[face_index])
+            self.tools[face_index] = tool
+        return self.tools[face_index]
+
+
+def _distance_chunk(a_shape, points):
+    data = process_cached(a_shape, "distance", _DistanceData)
+    n = points.shape[0]
+    upper_bounds = data.upper_bounds(points)
+    # candidate (lower bound, point, face) triplets, lower bounds being the
+    # distances to the face boxes
+    lower_bounds, point_ids, face_ids = [], [], []
+    for face_index, box in enumerate(data.boxes):
+        face_lower_bounds = _box_distances(points, box)
+        candidates = np.nonzero(face_lower_bounds <= upper_bounds)[0]
+        lower_bounds.append(face_lower_bounds[candidates])
+        point_ids.append(candidates)
+        face_ids.append(np.full(candidates.shape[0], face_index, dtype=np.int32))
+    lower_bounds = np.concatenate(lower_bounds)
+    order = np.argsort(lower_bounds, kind="stable")
+    lower_bounds = lower_bounds[order].tolist()
+    point_ids = np.concatenate(point_ids)[order].tolist()
+    face_ids = np.concatenate(face_ids)[order].tolist()
+
+    distances = np.full(n, np.inf)
+    closest_points = np.full((n, 3), np.nan)
+    closest_faces = np.full(n, -1, dtype=np.int32)
+    best = distances  # updated in place
+    pnt = gp_Pnt()
+    vertex, builder = data.vertex, data.builder
+    coords = points.tolist()
+    for lower_bound, i, face_index in zip(lower_bounds, point_ids, face_ids):
+        # faces are visited by increasing lower bound: stop as soon as the
+        # box of the face is farther than the best distance already found
+        if lower_bound > best[i]:
+            continue
+        pnt.SetCoord(*coords[i])
+        builder.UpdateVertex(vertex, pnt, 1e-7)
+        tool = data.tool(face_index)
+        tool.LoadS1(vertex)
+        if not tool.Perform() or tool.NbSolution() == 0:
+            continue
+        value = tool.Value()
+        if value < best[i]:
+            best[i] = value
+            closest_points[i] = tool.PointOnShape2(1).Coord()
+            closest_faces[i] = face_index
+    return distances, closest_points, closest_faces
+
+
+def distances_to_shape(a_shape, points, max_workers=None, chunk_size=65536):
+    """ Computes the distances from points to a shape.
+    a_shape: a topods_shape with faces, or a SharedShape of it
+    points: a (N, 3) array
+    max_workers, chunk_size: see ParallelUtils.map_array_chunks
+    Returns a tuple of three arrays:
+    * distances, (N,) float64
+    * closest points on the shape, (N, 3) float64
+    * face ids, (N,) int32: 0-based index of the closest face, in the
+      TopExp::MapShapes order (see SharedShape.sub_shape)
+    The bounding boxes of the faces, and the distances to the vertices of
+    the shape (in a KD-tree if scipy is installed), are used to call
+    BRepExtrema_DistShapeShape only for the faces that can be the closest.
+    """
+    points = _as_points(points)
+    return map_array_chunks(_distance_chunk, a_shape, points,
+                            max_workers=max_workers, chunk_size=chunk_size)
+
+
+# Precision::Infinite()
+_INFINITE = 2e100
+
+
+def _ray_caster_factory(tolerance):
+    def factory(a_shape):
+        return RayCaster(a_shape, tolerance)
+    return factory
+
+
+def _cast_chunk(a_shape, rays, tolerance, max_distance, all_hits):
+    ray_caster = process_cached(a_shape, ("ray_caster", tolerance), _ray_caster_factory(tolerance))
+    return ray_caster._cast(rays, max_distance, all_hits)
+
+
+class RayCaster(object):
+    """ Casts rays against the faces of a shape.
+
+    The IntCurvesFace_ShapeIntersector, which builds the face classifiers
+    and polyhedral approximations used to accelerate the intersections,
+    is built once when the RayCaster is created, and reused for all the
+    subsequent queries.
+
+    ray_caster = RayCaster(assembly)
+    distances, points, face_ids, uv = ray_caster.cast(origins, directions)
+
+    Parallel queries share the shape with the workers through a SharedShape
+    created at the first of them, and released by close(), at the end of a
+    with block, or when the RayCaster is garbage collected.
+
+    with RayCaster(assembly) as ray_caster:
+        hits = ray_caster.cast(origins, directions, max_workers=8)
+    """
+    def __init__(self, a_shape, tolerance=1e-7):
+        """
+        a_shape: the topods_shape to intersect, or a SharedShape of it
+        tolerance: optional, the tolerance of the intersections
+        """
+        self._shared = a_shape if isinstance(a_shape, SharedShape) else None
+        self._finalizer = None
+        self._shape = get_shape(a_shape)
+        self._tolerance = tolerance
+        self._intersector = IntCurvesFace_ShapeIntersector()
+        self._intersector.Load(self._shape, tolerance)
+        self._faces = TopTools_IndexedMapOfShape()
+        topexp_MapShapes(self._shape, TopAbs_FACE, self._faces)
+        self._box = bounding_box(self._shape, tolerance)
+
+    def close(self):
+        """ releases the shared memory used by parallel queries, if any
+        """
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+            self._shared = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _rays(self, origins, directions):
+        origins = _as_points(origins)
+        directions = _as_points(directions)
+        if origins.shape != directions.shape:
+            raise AssertionError("origins and directions must have the same shape.")
+        norms = np.linalg.norm(directions, axis=1)
+        if np.any(norms == 0.):
+            raise AssertionError("directions must not be null.")
+        # the ray index is stored in the last column, so that chunks
+        # processed by different workers keep track of their rays
+        return np.column_stack([origins, directions / norms[:, np.newaxis],
+                                np.arange(origins.shape[0], dtype=np.float64)])
+
+    def _hit_box(self, rays, max_distance):
+        """ slab test of the rays against the bounding box of the shape
+        """
+        origins, directions = rays[:, :3], rays[:, 3:6]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t1 = (self._box[0] - origins) / directions
+            t2 = (self._box[1] - origins) / directions
+        t_near = np.minimum(t1, t2)
+        t_far = np.maximum(t1, t2)
+        # rays parallel to a slab hit it everywhere or nowhere
+        parallel = directions == 0.
+        inside = (origins >= self._box[0]) & (origins <= self._box[1])
+        t_near[parallel] = np.where(inside, -np.inf, np.inf)[parallel]
+        t_far[parallel] = np.where(inside, np.inf, -np.inf)[parallel]
+        t_near = t_near.max(axis=1)
+        t_far = t_far.min(axis=1)
+        return (t_far >= np.maximum(t_near, 0.)) & (t_near <= max_distance)
+
+    def _cast(self, rays, max_distance, all_hits):
+        p_sup = min(max_distance, _INFINITE)
+        intersector = self._intersector
+        perform = intersector.Perform if all_hits else intersector.PerformNearest
+        find_face = self._faces.FindIndex
+        pnt, direction = gp_Pnt(), gp_Dir()
+        line = gp_Lin()
+        ray_ids, distances, points, face_ids, uv = [], [], [], [], []
+        candidates = np.nonzero(self._hit_box(rays, max_distance))[0]
+        for x, y, z, dx, dy, dz, ray_id in rays[candidates].tolist():
+            pnt.SetCoord(x, y, z)
+            direction.SetCoord(dx, dy, dz)
+            line.SetLocation(pnt)
+            line.SetDirection(direction)
+            perform(line, 0., p_sup)
+            if not intersector.IsDone():
+                continue
+            for i in range(1, intersector.NbPnt() + 1):
+                ray_ids.append(int(ray_id))
+                distances.append(intersector.WParameter(i))
+                points.append(intersector.Pnt(i).Coord())
+                face_ids.append(find_face(intersector.Face(i)) - 1)
+                uv.append((intersector.UParameter(i), intersector.VParameter(i)))
+        return (np.array(ray_ids, dtype=np.int64),
+                np.array(distances, dtype=np.float64),
+                np.array(points, dtype=np.float64).reshape(-1, 3),
+                np.array(face_ids, dtype=np.int32),
+                np.array(uv, dtype=np.float64).reshape(-1, 2))
+
+    def _run(self, rays, max_distance, all_hits, max_workers, chunk_size):
+        if max_workers == 1 or rays.shape[0] <= chunk_size:
+            return self._cast(rays, max_distance, all_hits)
+        if self._shared is None:
+            self._shared = SharedShape(self._shape)
+            # unlinks the segment if the caster is garbage collected, or at exit
+            self._finalizer = weakref.finalize(self, self._shared.unlink)
+        return map_array_chunks(_cast_chunk, self._shared, rays,
+                                args=(self._tolerance, max_distance, all_hits),
+                                max_workers=max_workers, chunk_size=chunk_size)
+
+    def cast(self, origins, directions, max_distance=np.inf, max_workers=None, chunk_size=65536):
+        """ Returns the first hit of each ray, as a tuple of four arrays:
+        * distances (N,) float64, inf if the ray does not hit the shape
+        * hit points (N, 3) float64, nan for misses
+        * face ids (N,) int32, 0-based index of the face hit in the
+          TopExp::MapShapes order, -1 for misses
+        * uv (N, 2) float64, parameters of the hit on the face, nan for misses
+        origins, directions: (N, 3) arrays. Directions need not be normalized,
+                             distances are always euclidean.
+        max_distance: optional, hits farther than that are ignored
+        max_workers, chunk_size: see ParallelUtils.map_array_chunks
+        """
+        rays = self._rays(origins, directions)
+        n = rays.shape[0]
+        ray_ids, hit_distances, hit_points, hit_faces, hit_uv = \
+            self._run(rays, max_distance, False, max_workers, chunk_size)
+        distances = np.full(n, np.inf)
+        points = np.full((n, 3), np.nan)
+        face_ids = np.full(n, -1, dtype=np.int32)
+        uv = np.full((n, 2), np.nan)
+        distances[ray_ids] = hit_distances
+        points[ray_ids] = hit_points
+        face_ids[ray_ids] = hit_faces
+        uv[ray_ids] = hit_uv
+        return distances, points, face_ids, uv
+
+    def cast_all(self, origins, directions, max_distance=np.inf, max_workers=None, chunk_size=65536):
+        """ Returns all the hits of the rays, sorted by ray and by distance, as
+        a tuple of five arrays with one item per hit: ray ids (int64),
+        distances, points, face ids and uv, as in cast.
+        Used for thickness analysis or line of sight checks through several
+        parts.
+        """
+        rays = self._rays(origins, directions)
+        ray_ids, distances, points, face_ids, uv = \
+            self._run(rays, max_distance, True, max_workers, chunk_size)
+        order = np.lexsort((distances, ray_ids))
+        return ray_ids[order], distances[order], points[order], face_ids[order], uv[order]
+
+
+# one record per shape returned by mass_properties
+MASS_PROPERTIES_DTYPE = np.dtype([("volume", np.float64),
+                                  ("area", np.float64),
+                                  ("center_of_mass", np.float64, (3,)),
+                                  ("inertia", np.float64, (3, 3))])
+
+
+class MassPropertiesCache(object):
+    """ Mass properties already computed, keyed by TShape and orientation.
+    The properties are stored in the local frame of the TShape, so that
+    all the instances of a part placed with different locations share the
+    same entry: only the first query of a part costs an integration.
+    """
+    def __init__(self):
+        self._records = ShapeDict(use_orientation=True)
+
+    def __len__(self):
+        return len(self._records)
+
+    def clear(self):
+        self._records.clear()
+
+    def get(self, a_shape, default=None):
+        return self._records.get(a_shape, default)
+
+    def __setitem__(self, a_shape, record):
+        self._records[a_shape] = record
+
+
+def _unlocated(a_shape):
+    return a_shape.Located(TopLoc_Location())
+
+
+def _compute_mass_properties(a_shape, tolerance):
+    record = np.zeros((), dtype=MASS_PROPERTIES_DTYPE)
+    surface_props = GProp_GProps()
+    if tolerance is None:
+        brepgprop_SurfaceProperties(a_shape, surface_props)
+    else:
+        brepgprop_SurfaceProperties(a_shape, surface_props, tolerance)
+    record["area"] = surface_props.Mass()
+    # shells and faces have no volume, the one BRepGProp would give is
+    # measured from the origin: use their surface properties instead
+    props = surface_props
+    if TopExp_Explorer(a_shape, TopAbs_SOLID).More():
+        props = GProp_GProps()
+        if tolerance is None:
+            brepgprop_VolumeProperties(a_shape, props)
+        else:
+            brepgprop_VolumeProperties(a_shape, props, tolerance)
+        record["volume"] = props.Mass()
+    if abs(props.Mass()) > 0.:
+        record["center_of_mass"] = props.CentreOfMass().Coord()
+        inertia = props.MatrixOfInertia()
+        record["inertia"] = [[inertia.Value(i, j) for j in (1, 2, 3)] for i in (1, 2, 3)]
+    return record
+
+
+def _mass_properties_chunk(serialized_shapes, tolerance):
+    return np.array([_compute_mass_properties(deserialize_shape(data), tolerance)
+                     for data in serialized_shapes], dtype=MASS_PROPERTIES_DTYPE)
+
+
+def _located_record(record, location):
+    """ moves the properties of an unlocated shape to its location
+    """
+    if location.IsIdentity():
+        return record
+    matrix = trsf_to_matrix(location.Transformation())
+    scale = abs(location.Transformation().ScaleFactor())
+    rotation = matrix[:3, :3] / scale
+    located = record.copy()
+    located["volume"] = record["volume"] * scale ** 3
+    located["area"] = record["area"] * scale ** 2
+    located["center_of_mass"] = matrix[:3, :3].dot(record["center_of_mass"]) + matrix[:3, 3]
+    # the inertia of a volume scales as length ** 5, the one of an area
+    # (shapes without solid have a null volume) as length ** 4
+    inertia_scale = scale ** 5 if record["volume"] != 0. else scale ** 4
+    located["inertia"] = rotation.dot(record["inertia"]).dot(rotation.T) * inertia_scale
+    return located
+
+
+def mass_properties(shapes, tolerance=None, cache=None, max_workers=None, chunk_size=16):
+    """ Computes the mass properties of a list of shapes.
+    shapes: a list of topods_shapes (solids, or shells and faces)
+    tolerance: optional, the relative precision of the integration, see
+               BRepGProp. The default BRepGProp algorithm is used if None.
+    cache: optional, a MassPropertiesCache. Shapes sharing a TShape (and
+           an orientation) with a shape of the cache are not integrated
+           again, whatever their location.
+    max_workers: optional, the number of processes used to integrate the
+                 shapes. Parts are integrated in the current process if 1.
+    chunk_size: optional, number of shapes sent to a worker at once
+    Returns a structured array of MASS_PROPERTIES_DTYPE, one record per
+    shape: volume, area, center_of_mass (3,) and inertia (3, 3), the matrix
+    of inertia at the center of mass as given by GProp_GProps. The center
+    of mass and the inertia are computed from the volume of shapes holding
+    solids, and from the area of the other shapes, whose volume is 0.
+    """
+    if cache is None:
+        cache = MassPropertiesCache()
+    shapes = list(shapes)
+    # the distinct TShapes that are not in the cache yet
+    todo = ShapeDict(use_orientation=True)
+    for a_shape in shapes:
+        unlocated = _unlocated(a_shape)
+        if cache.get(unlocated) is None:
+            todo[unlocated] = None
+    todo = list(todo)
+    if todo:
+        if max_workers == 1 or len(todo) <= chunk_size:
+            records = [_compute_mass_properties(s, tolerance) for s in todo]
+        else:
+            chunks = [[serialize_shape(s) for s in todo[i:i + chunk_size]]
+                      for i in range(0, len(todo), chunk_size)]
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_mass_properties_chunk, chunk, tolerance)
+                           for chunk in chunks]
+                records = np.concatenate([f.result() for f in futures])
+        for a_shape, record in zip(todo, records):
+            cache[a_shape] = np.array(record, dtype=MASS_PROPERTIES_DTYPE)
+
+    result = np.zeros(len(shapes), dtype=MASS_PROPERTIES_DTYPE)
+    for i, a_shape in enumerate(shapes):
+        result[i] = _located_record(cache.get(_unlocated(a_shape)), a_shape.Location())
+    return result
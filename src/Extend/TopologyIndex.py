@@ -0,0 +1,290 @@
+##Copyright 2018 The pythonOCC developers
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+
+""" Integer ids for the sub-shapes of a shape, and adjacency as arrays.
+
+Ids are 0-based indices in the TopExp::MapShapes order: they are stable for
+a given shape, whatever the process or the session that computes them.
+Adjacency relations are stored in the compressed sparse row (CSR) format:
+the ids related to item i are indices[indptr[i]:indptr[i + 1]].
+
+Since ids only depend on the structure of the shape, they can be stored
+and resolved again after the same file is read in another session. A
+reference (see TopologyIndex.reference) also records a geometric
+fingerprint of the sub-shape, which is used to check the id, and to find
+the sub-shape again if the ids have changed.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from scipy.sparse import csr_matrix
+    HAVE_SCIPY = True
+except ImportError:
+    HAVE_SCIPY = False
+
+from OCC.Core.BRep import BRep_Tool
+from OCC.Core.BRepGProp import (brepgprop_LinearProperties, brepgprop_SurfaceProperties,
+                                brepgprop_VolumeProperties)
+from OCC.Core.GProp import GProp_GProps
+from OCC.Core.TopAbs import (TopAbs_SOLID, TopAbs_SHELL, TopAbs_FACE, TopAbs_WIRE,
+                             TopAbs_EDGE, TopAbs_VERTEX)
+from OCC.Core.TopExp import TopExp_Explorer, topexp_MapShapes
+from OCC.Core.TopTools import TopTools_IndexedMapOfShape
+from OCC.Core.TopoDS import topods_Vertex
+
+# indptr: (N + 1,) int64, indices: int32
+CSRAdjacency = namedtuple("CSRAdjacency", ["indptr", "indices"])
+
+TOPOLOGY_TYPES = (TopAbs_SOLID, TopAbs_SHELL, TopAbs_FACE, TopAbs_WIRE,
+                  TopAbs_EDGE, TopAbs_VERTEX)
+
+
+def fingerprint(a_shape):
+    """ Returns a geometric fingerprint of a_shape: its measure (length of
+    edges and wires, area of faces and shells, volume of solids, 0 for
+    vertices) followed by the coordinates of its center of mass.
+    """
+    shape_type = a_shape.ShapeType()
+    if shape_type == TopAbs_VERTEX:
+        return (0.,) + BRep_Tool().Pnt(topods_Vertex(a_shape)).Coord()
+    props = GProp_GProps()
+    if shape_type in (TopAbs_EDGE, TopAbs_WIRE):
+        brepgprop_LinearProperties(a_shape, props)
+    elif shape_type in (TopAbs_FACE, TopAbs_SHELL):
+        brepgprop_SurfaceProperties(a_shape, props)
+    else:
+        brepgprop_VolumeProperties(a_shape, props)
+    return (props.Mass(),) + props.CentreOfMass().Coord()
+
+
+def transpose_adjacency(adjacency, number_of_columns):
+    """ the CSRAdjacency of the transposed relation, for instance the faces
+    of each edge from the edges of each face
+    """
+    indptr, indices = adjacency
+    rows = np.repeat(np.arange(indptr.shape[0] - 1, dtype=np.int32), np.diff(indptr))
+    order = np.lexsort((rows, indices))
+    transposed_indptr = np.zeros(number_of_columns + 1, dtype=np.int64)
+    transposed_indptr[1:] = np.cumsum(np.bincount(indices, minlength=number_of_columns))
+    return CSRAdjacency(transposed_indptr, rows[order])
+
+
+def adjacency_to_sparse(adjacency, number_of_columns):
+    """ the adjacency as a scipy.sparse.csr_matrix of ones
+    """
+    if not HAVE_SCIPY:
+        raise AssertionError("scipy is required to build sparse matrices.")
+    indptr, indices = adjacency
+    data = np.ones(indices.shape[0], dtype=np.int8)
+    return csr_matrix((data, indices, indptr),
+                      shape=(indptr.shape[0] - 1, number_of_columns))
+
+
+class TopologyIndex(object):
+    """ Assigns an integer id to each solid, shell, face, wire, edge and vertex
+    of a shape, and gives the relations between them as CSR arrays.
+
+    index = TopologyIndex(a_shape)
+    face_edges = index.adjacency(TopAbs_FACE, TopAbs_EDGE)
+    graph = index.face_adjacency(as_sparse=True)
+    a_face = index.shape(TopAbs_FACE, 3)
+
+    Sub-shapes are identified with IsSame semantics (same TShape and
+    location), as in TopExp::MapShapes.
+    """
+    def __init__(self, a_shape):
+        if a_shape.IsNull():
+            raise AssertionError("Shape is null.")
+        self._shape = a_shape
+        self._maps = {}
+        self._adjacencies = {}
+        self._fingerprints = {}
+
+    def _map(self, topology_type):
+        if topology_type not in TOPOLOGY_TYPES:
+            raise AssertionError("%s not one of %s" % (topology_type, TOPOLOGY_TYPES))
+        if topology_type not in self._maps:
+            _map = TopTools_IndexedMapOfShape()
+            topexp_MapShapes(self._shape, topology_type, _map)
+            self._maps[topology_type] = _map
+        return self._maps[topology_type]
+
+    def number_of(self, topology_type):
+        """ the number of distinct sub-shapes of a given type
+        """
+        return self._map(topology_type).Extent()
+
+    def id(self, a_sub_shape):
+        """ the id of a sub-shape, -1 if it does not belong to the shape
+        """
+        return self._map(a_sub_shape.ShapeType()).FindIndex(a_sub_shape) - 1
+
+    def ids(self, sub_shapes):
+        """ the ids of a list of sub-shapes, as an int32 array
+        """
+        return np.array([self.id(s) for s in sub_shapes], dtype=np.int32)
+
+    def shape(self, topology_type, an_id):
+        """ the sub-shape of the given type and id
+        """
+        _map = self._map(topology_type)
+        if not 0 <= an_id < _map.Extent():
+            raise IndexError("%i is not a valid id" % an_id)
+        return _map.FindKey(int(an_id) + 1)
+
+    def shapes(self, topology_type, ids=None):
+        """ the list of the sub-shapes of the given ids, all of them by default
+        """
+        if ids is None:
+            ids = range(self.number_of(topology_type))
+        return [self.shape(topology_type, i) for i in ids]
+
+    def _sub_shapes_adjacency(self, parent_type, child_type):
+        parent_map = self._map(parent_type)
+        child_map = self._map(child_type)
+        indptr = np.zeros(parent_map.Extent() + 1, dtype=np.int64)
+        indices = []
+        explorer = TopExp_Explorer()
+        for i in range(parent_map.Extent()):
+            explorer.Init(parent_map.FindKey(i + 1), child_type)
+            children, seen = [], set()
+            while explorer.More():
+                child_id = child_map.FindIndex(explorer.Current()) - 1
+                # seam edges appear twice in their face
+                if child_id not in seen:
+                    seen.add(child_id)
+                    children.append(child_id)
+                explorer.Next()
+            indices.extend(children)
+            indptr[i + 1] = len(indices)
+        return CSRAdjacency(indptr, np.array(indices, dtype=np.int32))
+
+    def adjacency(self, from_type, to_type, as_sparse=False):
+        """ Returns, for each sub-shape of type from_type, the ids of the
+        related sub-shapes of type to_type: its sub-shapes if to_type is a
+        lower level type (the edges of each face), its ancestors otherwise
+        (the faces of each edge). Arrays are computed once and cached.
+        as_sparse: optional, returns a scipy.sparse.csr_matrix instead of a
+                   CSRAdjacency
+        """
+        if from_type == to_type:
+            raise AssertionError("from_type and to_type must be different.")
+        key = (from_type, to_type)
+        if key not in self._adjacencies:
+            # TopAbs enumerates types from the compound down to the vertex
+            if from_type < to_type:
+                self._adjacencies[key] = self._sub_shapes_adjacency(from_type, to_type)
+            else:
+                self._adjacencies[key] = transpose_adjacency(self.adjacency(to_type, from_type),
+                                                             self.number_of(from_type))
+        if as_sparse:
+            return adjacency_to_sparse(self._adjacencies[key], self.number_of(to_type))
+        return self._adjacencies[key]
+
+    def neighbours(self, topology_type, through_type, as_sparse=False):
+        """ Returns, for each sub-shape of type topology_type, the ids of the
+        other sub-shapes of the same type that share a sub-shape (or an
+        ancestor) of type through_type. For instance the faces that share an
+        edge with each face: neighbours(TopAbs_FACE, TopAbs_EDGE).
+        """
+        key = (topology_type, through_type, topology_type)
+        if key not in self._adjacencies:
+            number_of_items = self.number_of(topology_type)
+            # the items related to each shared sub-shape
+            shared_indptr, shared_indices = self.adjacency(through_type, topology_type)
+            counts = np.diff(shared_indptr)
+            pair_counts = counts * counts
+            total = int(pair_counts.sum())
+            groups = np.repeat(np.arange(counts.shape[0]), pair_counts)
+            rank = np.arange(total) - np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+            first = shared_indices[shared_indptr[groups] + rank // counts[groups]]
+            second = shared_indices[shared_indptr[groups] + rank % counts[groups]]
+            keep = first != second
+            pairs = np.unique(first[keep].astype(np.int64) * number_of_items + second[keep])
+            indptr = np.zeros(number_of_items + 1, dtype=np.int64)
+            indptr[1:] = np.cumsum(np.bincount(pairs // number_of_items,
+                                               minlength=number_of_items))
+            indices = (pairs % number_of_items).astype(np.int32)
+            self._adjacencies[key] = CSRAdjacency(indptr, indices)
+        if as_sparse:
+            return adjacency_to_sparse(self._adjacencies[key], self.number_of(topology_type))
+        return self._adjacencies[key]
+
+    def face_edges(self, as_sparse=False):
+        return self.adjacency(TopAbs_FACE, TopAbs_EDGE, as_sparse)
+
+    def edge_vertices(self, as_sparse=False):
+        return self.adjacency(TopAbs_EDGE, TopAbs_VERTEX, as_sparse)
+
+    def edge_faces(self, as_sparse=False):
+        return self.adjacency(TopAbs_EDGE, TopAbs_FACE, as_sparse)
+
+    def solid_faces(self, as_sparse=False):
+        return self.adjacency(TopAbs_SOLID, TopAbs_FACE, as_sparse)
+
+    def face_adjacency(self, as_sparse=False):
+        """ the faces sharing at least one edge with each face
+        """
+        return self.neighbours(TopAbs_FACE, TopAbs_EDGE, as_sparse)
+
+    def fingerprints(self, topology_type):
+        """ the (N, 4) array of the fingerprints of the sub-shapes of a
+        given type, in the id order. Computed once and cached.
+        """
+        if topology_type not in self._fingerprints:
+            _map = self._map(topology_type)
+            self._fingerprints[topology_type] = np.array(
+                [fingerprint(_map.FindKey(i)) for i in range(1, _map.Extent() + 1)],
+                dtype=np.float64).reshape(-1, 4)
+        return self._fingerprints[topology_type]
+
+    def reference(self, a_sub_shape):
+        """ Returns a persistent reference to a_sub_shape: a dict made of
+        python numbers only, that can be stored with json or pickle and
+        given to resolve in another session.
+        """
+        an_id = self.id(a_sub_shape)
+        if an_id < 0:
+            raise AssertionError("The sub-shape does not belong to the shape.")
+        return {"type": int(a_sub_shape.ShapeType()),
+                "id": an_id,
+                "fingerprint": list(fingerprint(a_sub_shape))}
+
+    def resolve(self, reference, rtol=1e-6, atol=1e-6):
+        """ Returns the sub-shape referred to by reference, None if it cannot
+        be found. The id is checked first: the fingerprint of the sub-shape
+        with that id must match the one of the reference (see numpy.isclose
+        for rtol and atol). Otherwise the sub-shape with a matching
+        fingerprint is searched for among all the sub-shapes of the same type.
+        """
+        topology_type = reference["type"]
+        an_id = reference["id"]
+        expected = np.asarray(reference["fingerprint"], dtype=np.float64)
+        if 0 <= an_id < self.number_of(topology_type):
+            found = np.asarray(fingerprint(self.shape(topology_type, an_id)))
+            if np.allclose(found, expected, rtol=rtol, atol=atol):
+                return self.shape(topology_type, an_id)
+        matches = np.flatnonzero(np.isclose(self.fingerprints(topology_type), expected,
+                                            rtol=rtol, atol=atol).all(axis=1))
+        if matches.shape[0] != 1:
+            # not found, or ambiguous
+            return None
+        return self.shape(topology_type, matches[0])
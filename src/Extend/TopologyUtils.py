@@ -19,22 +19,172 @@
 
 from __future__ import print_function
 
+from collections import namedtuple
+
+try:
+    from collections.abc import MutableMapping, MutableSet
+except ImportError:  # python 2
+    from collections import MutableMapping, MutableSet
+
 from OCC.Core.BRep import BRep_Tool
 from OCC.Core.BRepTools import BRepTools_WireExplorer
 from OCC.Core.TopAbs import (TopAbs_VERTEX, TopAbs_EDGE, TopAbs_FACE, TopAbs_WIRE,
                              TopAbs_SHELL, TopAbs_SOLID, TopAbs_COMPOUND,
-                             TopAbs_COMPSOLID)
-from OCC.Core.TopExp import TopExp_Explorer, topexp_MapShapesAndAncestors
-from OCC.Core.TopTools import (TopTools_ListOfShape,
-                               TopTools_ListIteratorOfListOfShape,
-                               TopTools_IndexedDataMapOfShapeListOfShape)
+                             TopAbs_COMPSOLID, TopAbs_REVERSED)
+from OCC.Core.TopExp import (TopExp_Explorer, topexp_MapShapes,
+                             topexp_MapShapesAndAncestors)
+from OCC.Core.TopTools import (TopTools_ListIteratorOfListOfShape,
+                               TopTools_IndexedDataMapOfShapeListOfShape,
+                               TopTools_IndexedMapOfShape)
 from OCC.Core.TopoDS import (TopoDS_Wire, TopoDS_Vertex, TopoDS_Edge,
                              TopoDS_Face, TopoDS_Shell, TopoDS_Solid,
                              TopoDS_Compound, TopoDS_CompSolid, topods_Edge,
-                             topods_Vertex, TopoDS_Iterator)
+                             topods_Vertex, topods_Face, topods_Wire,
+                             TopoDS_Iterator)
 from OCC.Core.GCPnts import GCPnts_UniformAbscissa
 from OCC.Core.BRepAdaptor import BRepAdaptor_Curve
 
+_MASK_64 = (1 << 64) - 1
+# the multiplier of the 64 bits Fibonacci hashing, spreads the 31 bits hash
+# code of a location over the whole key
+_LOCATION_MULTIPLIER = 0x9E3779B97F4A7C15
+
+
+def shape_key(a_shape, use_orientation=False):
+    """ Returns a 64 bits integer identifying a_shape, computed from the
+    address of its TShape, the hash code of its location and, if
+    use_orientation is True, its orientation. Unlike hash(a_shape), which
+    is reduced to 31 bits, two shapes with the same location and different
+    TShapes never share the same key. Shapes with different locations may
+    collide though, since a location is only known by its 31 bits hash code.
+    Use ShapeSet or ShapeDict when an exact IsSame/IsEqual test is required.
+    """
+    key = a_shape.TShapeId() ^ (a_shape.Location().HashCode(2147483647) *
+                                _LOCATION_MULTIPLIER & _MASK_64)
+    # TShapes are allocated at aligned addresses: the 2 lowest bits are
+    # only used by the location, they are replaced by the orientation
+    key &= _MASK_64 ^ 3
+    if use_orientation:
+        key |= a_shape.Orientation()
+    return key
+
+
+class _IndexedShapeKeys(object):
+    """ the keys of ShapeSet and ShapeDict: the index of the shape in the
+    TopTools_IndexedMapOfShape self._map, with its orientation if
+    self._use_orientation is True
+    """
+    def _key(self, a_shape, create=False):
+        if create:
+            index = self._map.Add(a_shape)
+        else:
+            index = self._map.FindIndex(a_shape)
+            if index == 0:
+                return None
+        if self._use_orientation:
+            return index, a_shape.Orientation()
+        return index
+
+
+class ShapeSet(_IndexedShapeKeys, MutableSet):
+    """ A set of TopoDS_Shape backed by a TopTools_IndexedMapOfShape.
+    Membership is decided by the OCC map, so it is exact and never suffers
+    from hash collisions. By default two shapes are the same element if
+    IsSame returns True (same TShape and location). With use_orientation=True,
+    IsEqual is used instead (the orientation is compared as well).
+    Iteration follows insertion order.
+    """
+    def __init__(self, shapes=None, use_orientation=False):
+        self._map = TopTools_IndexedMapOfShape()
+        self._use_orientation = use_orientation
+        self._items = {}
+        if shapes is not None:
+            for a_shape in shapes:
+                self.add(a_shape)
+
+    def __contains__(self, a_shape):
+        return self._key(a_shape) in self._items
+
+    def __iter__(self):
+        return iter(self._items.values())
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, a_shape):
+        key = self._key(a_shape, create=True)
+        if key not in self._items:
+            self._items[key] = a_shape
+
+    def add_new(self, a_shape):
+        """ adds a_shape and returns True if it was not already in the set
+        """
+        key = self._key(a_shape, create=True)
+        if key in self._items:
+            return False
+        self._items[key] = a_shape
+        return True
+
+    def discard(self, a_shape):
+        self._items.pop(self._key(a_shape), None)
+
+    def clear(self):
+        self._map.Clear()
+        self._items.clear()
+
+
+class ShapeDict(_IndexedShapeKeys, MutableMapping):
+    """ A dict whose keys are TopoDS_Shape, backed by a TopTools_IndexedMapOfShape.
+    Same IsSame/IsEqual semantics as ShapeSet, keys are kept in insertion order.
+    """
+    def __init__(self, items=None, use_orientation=False):
+        self._map = TopTools_IndexedMapOfShape()
+        self._use_orientation = use_orientation
+        self._items = {}
+        if items is not None:
+            self.update(items)
+
+    def __getitem__(self, a_shape):
+        try:
+            return self._items[self._key(a_shape)][1]
+        except KeyError:
+            raise KeyError(a_shape)
+
+    def __setitem__(self, a_shape, value):
+        key = self._key(a_shape, create=True)
+        if key in self._items:
+            a_shape = self._items[key][0]
+        self._items[key] = (a_shape, value)
+
+    def __delitem__(self, a_shape):
+        try:
+            del self._items[self._key(a_shape)]
+        except KeyError:
+            raise KeyError(a_shape)
+
+    def __contains__(self, a_shape):
+        return self._key(a_shape) in self._items
+
+    def __iter__(self):
+        return (item[0] for item in self._items.values())
+
+    def __len__(self):
+        return len(self._items)
+
+    def clear(self):
+        self._map.Clear()
+        self._items.clear()
+
+
+# the result of ordered_wires for one wire. edges, vertices and orientations
+# are lists, in the order of the wire, with one item per edge: the vertex is
+# the first vertex of the edge, in the direction of the wire. Seam edges
+# appear twice, with both orientations. points is a (N, 3) float64 array of
+# the discretized wire if requested, None otherwise
+OrderedWire = namedtuple("OrderedWire", ["wire", "face", "edges", "vertices",
+                                         "orientations", "points"])
+
+
 class WireExplorer(object):
     '''
     Wire traversal
@@ -43,41 +193,24 @@ class WireExplorer(object):
         if not isinstance(wire, TopoDS_Wire):
             raise AssertionError('not a TopoDS_Wire')
         self.wire = wire
-        self.wire_explorer = BRepTools_WireExplorer(self.wire)
-        self.done = False
-
-    def _reinitialize(self):
-        self.wire_explorer = BRepTools_WireExplorer(self.wire)
-        self.done = False
 
     def _loop_topo(self, edges=True):
-        if self.done:
-            self._reinitialize()
         topologyType = topods_Edge if edges else topods_Vertex
-        seq = []
-        hashes = []  # list that stores hashes to avoid redundancy
-        occ_seq = TopTools_ListOfShape()
-        while self.wire_explorer.More():
+        # a new explorer for each traversal, so that they can be nested
+        wire_explorer = BRepTools_WireExplorer(self.wire)
+        visited = TopTools_IndexedMapOfShape()  # avoid redundancy
+        number_of_visited = 0
+        while wire_explorer.More():
             # loop edges
             if edges:
-                current_item = self.wire_explorer.Current()
+                current_item = wire_explorer.Current()
             # loop vertices
             else:
-                current_item = self.wire_explorer.CurrentVertex()
-            current_item_hash = current_item.__hash__()
-            if not current_item_hash in hashes:
-                hashes.append(current_item_hash)
-                occ_seq.Append(current_item)
-            self.wire_explorer.Next()
-
-        # Convert occ_seq to python list
-        occ_iterator = TopTools_ListIteratorOfListOfShape(occ_seq)
-        while occ_iterator.More():
-            topo_to_add = topologyType(occ_iterator.Value())
-            seq.append(topo_to_add)
-            occ_iterator.Next()
-        self.done = True
-        return iter(seq)
+                current_item = wire_explorer.CurrentVertex()
+            if visited.Add(current_item) > number_of_visited:
+                number_of_visited += 1
+                yield topologyType(current_item)
+            wire_explorer.Next()
 
     def ordered_edges(self):
         return self._loop_topo(edges=True)
@@ -86,6 +219,92 @@ class WireExplorer(object):
         return self._loop_topo(edges=False)
 
 
+def _ordered_wire(wire_explorer, wire, face, discretize):
+    edges, vertices, orientations = [], [], []
+    while wire_explorer.More():
+        edges.append(wire_explorer.Current())
+        vertices.append(wire_explorer.CurrentVertex())
+        orientations.append(wire_explorer.Orientation())
+        wire_explorer.Next()
+    points = None
+    if discretize is not None:
+        points = discretize(edges, orientations)
+    return OrderedWire(wire, face, edges, vertices, orientations, points)
+
+
+def _wire_discretizer(deflection, abscissa):
+    """ returns a function that computes the points of a wire from its
+    ordered edges and orientations. Edges shared by several wires are only
+    discretized once.
+    """
+    # numpy is only required when the wires are discretized
+    import numpy as np
+    from OCC.Extend.MeshUtils import edge_points
+
+    edges_points = ShapeDict()
+
+    def discretize(edges, orientations):
+        chunks = []
+        for an_edge, orientation in zip(edges, orientations):
+            if an_edge not in edges_points:
+                edges_points[an_edge] = edge_points(an_edge, deflection, abscissa)
+            points = edges_points[an_edge]
+            # degenerated edges have no points
+            if len(points) == 0:
+                continue
+            if orientation == TopAbs_REVERSED:
+                points = points[::-1]
+            # the first point of an edge is the last one of the previous edge
+            chunks.append(points[1:] if chunks else points)
+        if not chunks:
+            return np.empty((0, 3))
+        return np.concatenate(chunks)
+    return discretize
+
+
+def ordered_wires(a_shape, with_points=False, deflection=0.1, abscissa=None):
+    """ Yields an OrderedWire for each wire of a_shape, in one pass: the
+    wires of the faces first, explored with their face so that the order of
+    the edges follows the face boundary, then the wires that do not belong
+    to a face.
+    with_points: optional, if True the wires are also discretized, see
+                 OCC.Extend.MeshUtils.edge_points for deflection and abscissa
+    """
+    discretize = _wire_discretizer(deflection, abscissa) if with_points else None
+    wire_explorer = BRepTools_WireExplorer()
+    if a_shape.ShapeType() == TopAbs_WIRE:
+        wire = topods_Wire(a_shape)
+        wire_explorer.Init(wire)
+        yield _ordered_wire(wire_explorer, wire, None, discretize)
+        return
+    visited = TopTools_IndexedMapOfShape()
+    number_of_visited = 0
+    faces_explorer = TopExp_Explorer(a_shape, TopAbs_FACE)
+    wires_explorer = TopExp_Explorer()
+    while faces_explorer.More():
+        face = topods_Face(faces_explorer.Current())
+        faces_explorer.Next()
+        if visited.Add(face) <= number_of_visited:
+            continue
+        number_of_visited += 1
+        wires_explorer.Init(face, TopAbs_WIRE)
+        while wires_explorer.More():
+            wire = topods_Wire(wires_explorer.Current())
+            wire_explorer.Init(wire, face)
+            yield _ordered_wire(wire_explorer, wire, face, discretize)
+            wires_explorer.Next()
+    # wires that do not belong to a face
+    wires_explorer.Init(a_shape, TopAbs_WIRE, TopAbs_FACE)
+    while wires_explorer.More():
+        wire = topods_Wire(wires_explorer.Current())
+        wires_explorer.Next()
+        if visited.Add(wire) <= number_of_visited:
+            continue
+        number_of_visited += 1
+        wire_explorer.Init(wire)
+        yield _ordered_wire(wire_explorer, wire, None, discretize)
+
+
 class TopologyExplorer(object):
     '''
     Topology traversal
@@ -104,31 +323,31 @@ class TopologyExplorer(object):
 
         :param myShape: the shape which topology will be traversed
 
-        :param ignore_orientation: filter out TopoDS_* entities of similar TShape but different Orientation
-
-        for instance, a cube has 24 edges, 4 edges for each of 6 faces
+        :param ignore_orientation: only used by the queries of the shapes connected
+        to a sub-shape (faces_from_edge, edges_from_vertex...): if True, connected
+        shapes that share the same TShape and location but differ in orientation
+        are returned once, otherwise once per orientation
 
-        that results in 48 vertices, while there are only 8 vertices that have a unique
-        geometric coordinate
-
-        in certain cases ( computing a graph from the topology ) its preferable to return
-        topological entities that share similar geometry, though differ in orientation
-        by setting the ``ignore_orientation`` variable
-        to True, in case of a cube, just 12 edges and only 8 vertices will be returned
+        the traversals (faces(), edges(), vertices()...) always return each sub-shape
+        once, whatever its orientation: in case of a cube, just 12 edges and only 8
+        vertices are returned
 
         for further reference see TopoDS_Shape IsEqual / IsSame methods
 
         """
         self.myShape = myShape
         self.ignore_orientation = ignore_orientation
-        self.topExp = TopExp_Explorer()
+        # (topoTypeA, topoTypeB) -> (ancestors map, {index: ancestors list})
+        self._ancestors_maps = {}
 
     def _loop_topo(self, topologyType, topologicalEntity=None, topologyTypeToAvoid=None):
         '''
-        this could be a faces generator for a python TopoShape class
-        that way you can just do:
-        for face in srf.faces:
+        returns a generator over the sub-shapes of type topologyType, so
+        that you can just do:
+        for face in srf.faces():
             processFace(face)
+        Sub-shapes are yielded as they are explored, nothing is stored but
+        the map of the shapes already visited.
         '''
         topoTypes = {TopAbs_VERTEX: TopoDS_Vertex,
                      TopAbs_EDGE: TopoDS_Edge,
@@ -142,49 +361,56 @@ class TopologyExplorer(object):
         if not topologyType in topoTypes.keys():
             raise AssertionError('%s not one of %s' % (topologyType, topoTypes.keys()))
         # use self.myShape if nothing is specified
+        # each traversal has its own explorer, so that they can be nested
+        explorer = TopExp_Explorer()
         if topologicalEntity is None and topologyTypeToAvoid is None:
-            self.topExp.Init(self.myShape, topologyType)
+            explorer.Init(self.myShape, topologyType)
         elif topologicalEntity is None and topologyTypeToAvoid is not None:
-            self.topExp.Init(self.myShape, topologyType, topologyTypeToAvoid)
+            explorer.Init(self.myShape, topologyType, topologyTypeToAvoid)
         elif topologyTypeToAvoid is None:
-            self.topExp.Init(topologicalEntity, topologyType)
+            explorer.Init(topologicalEntity, topologyType)
         elif topologyTypeToAvoid:
-            self.topExp.Init(topologicalEntity,
-                             topologyType,
-                             topologyTypeToAvoid)
-        seq = []
-        hashes = []  # list that stores hashes to avoid redundancy
-        occ_seq = TopTools_ListOfShape()
-        while self.topExp.More():
-            current_item = self.topExp.Current()
-            current_item_hash = current_item.__hash__()
-
-            if not current_item_hash in hashes:
-                hashes.append(current_item_hash)
-                occ_seq.Append(current_item)
-
-            self.topExp.Next()
-        # Convert occ_seq to python list
-        occ_iterator = TopTools_ListIteratorOfListOfShape(occ_seq)
-        while occ_iterator.More():
-            seq.append(occ_iterator.Value())
-            occ_iterator.Next()
-
-        if self.ignore_orientation:
-            # filter out those entities that share the same TShape
-            # but do *not* share the same orientation
-            filter_orientation_seq = []
-            for i in seq:
-                _present = False
-                for j in filter_orientation_seq:
-                    if i.IsSame(j):
-                        _present = True
-                        break
-                if _present is False:
-                    filter_orientation_seq.append(i)
-            return filter_orientation_seq
-        else:
-            return iter(seq)
+            explorer.Init(topologicalEntity,
+                          topologyType,
+                          topologyTypeToAvoid)
+        return self._iter_topo(explorer)
+
+    def _iter_topo(self, explorer):
+        '''
+        yields the shapes found by explorer, each TShape (and location)
+        only once: shapes already yielded are recorded in an indexed map,
+        which makes the filtering linear in the number of shapes
+        '''
+        visited = TopTools_IndexedMapOfShape()
+        number_of_visited = 0
+        while explorer.More():
+            current_item = explorer.Current()
+            # Add returns the index of the shape, a new one if not yet visited
+            if visited.Add(current_item) > number_of_visited:
+                number_of_visited += 1
+                yield current_item
+            explorer.Next()
+
+    def counts(self):
+        '''
+        returns the number of vertices, edges, wires, faces, shells, solids,
+        comp_solids and compounds of the shape, computed in a single traversal,
+        as a dict with these keys
+        '''
+        names = {TopAbs_VERTEX: "vertices",
+                 TopAbs_EDGE: "edges",
+                 TopAbs_WIRE: "wires",
+                 TopAbs_FACE: "faces",
+                 TopAbs_SHELL: "shells",
+                 TopAbs_SOLID: "solids",
+                 TopAbs_COMPSOLID: "comp_solids",
+                 TopAbs_COMPOUND: "compounds"}
+        result = dict.fromkeys(names.values(), 0)
+        _map = TopTools_IndexedMapOfShape()
+        topexp_MapShapes(self.myShape, _map)
+        for i in range(1, _map.Extent() + 1):
+            result[names[_map.FindKey(i).ShapeType()]] += 1
+        return result
 
     def faces(self):
         '''
@@ -281,6 +507,45 @@ class TopologyExplorer(object):
     def number_of_ordered_edges_from_wire(self, wire):
         return self._number_of_topo(self.ordered_edges_from_wire(wire))
 
+    def _ancestors_map(self, topoTypeA, topoTypeB):
+        '''
+        returns the TopTools_IndexedDataMapOfShapeListOfShape that maps each
+        sub-shape of type topoTypeA to its ancestors of type topoTypeB.
+        The map is built once per (topoTypeA, topoTypeB) pair and kept by the
+        explorer, together with the deduplicated ancestors lists already
+        requested, so that a query only costs a hash lookup.
+        '''
+        key = (topoTypeA, topoTypeB)
+        if key not in self._ancestors_maps:
+            _map = TopTools_IndexedDataMapOfShapeListOfShape()
+            topexp_MapShapesAndAncestors(self.myShape, topoTypeA, topoTypeB, _map)
+            self._ancestors_maps[key] = (_map, {})
+        return self._ancestors_maps[key]
+
+    def _ancestors(self, topoTypeA, topoTypeB, topologicalEntity):
+        '''
+        returns the list of the unique ancestors of topologicalEntity
+        '''
+        _map, ancestors_lists = self._ancestors_map(topoTypeA, topoTypeB)
+        index = _map.FindIndex(topologicalEntity)
+        if index == 0:
+            return []
+        if index not in ancestors_lists:
+            # IsSame filtering if orientation is ignored, IsEqual otherwise
+            unique_ancestors = ShapeSet(use_orientation=not self.ignore_orientation)
+            topology_iterator = TopTools_ListIteratorOfListOfShape(_map.FindFromIndex(index))
+            while topology_iterator.More():
+                unique_ancestors.add(topology_iterator.Value())
+                topology_iterator.Next()
+            ancestors_lists[index] = list(unique_ancestors)
+        return ancestors_lists[index]
+
+    def clear_ancestors_maps(self):
+        '''
+        forgets the cached ancestors maps, to be called if myShape is modified
+        '''
+        self._ancestors_maps.clear()
+
     def _map_shapes_and_ancestors(self, topoTypeA, topoTypeB, topologicalEntity):
         '''
         using the same method
@@ -288,34 +553,11 @@ class TopologyExplorer(object):
         @param topoTypeB:
         @param topologicalEntity:
         '''
-        topo_set = set()
-        _map = TopTools_IndexedDataMapOfShapeListOfShape()
-        topexp_MapShapesAndAncestors(self.myShape, topoTypeA, topoTypeB, _map)
-        results = _map.FindFromKey(topologicalEntity)
-        if results.IsEmpty():
+        results = self._ancestors(topoTypeA, topoTypeB, topologicalEntity)
+        if not results:
             yield None
-
-        topology_iterator = TopTools_ListIteratorOfListOfShape(results)
-        while topology_iterator.More():
-
-            topo_entity = topology_iterator.Value()
-
-            # return the entity if not in set
-            # to assure we're not returning entities several times
-            if not topo_entity in topo_set:
-                if self.ignore_orientation:
-                    unique = True
-                    for i in topo_set:
-                        if i.IsSame(topo_entity):
-                            unique = False
-                            break
-                    if unique:
-                        yield topo_entity
-                else:
-                    yield topo_entity
-
-            topo_set.add(topo_entity)
-            topology_iterator.Next()
+        for topo_entity in results:
+            yield topo_entity
 
     def _number_shapes_ancestors(self, topoTypeA, topoTypeB, topologicalEntity):
         '''returns the number of shape ancestors
@@ -326,17 +568,10 @@ class TopologyExplorer(object):
         @param topoTypeB:
         @param topologicalEntity:
         '''
-        topo_set = set()
-        _map = TopTools_IndexedDataMapOfShapeListOfShape()
-        topexp_MapShapesAndAncestors(self.myShape, topoTypeA, topoTypeB, _map)
-        results = _map.FindFromKey(topologicalEntity)
-        if results.IsEmpty():
+        results = self._ancestors(topoTypeA, topoTypeB, topologicalEntity)
+        if not results:
             return None
-        topology_iterator = TopTools_ListIteratorOfListOfShape(results)
-        while topology_iterator.More():
-            topo_set.add(topology_iterator.Value())
-            topology_iterator.Next()
-        return len(topo_set)
+        return len(results)
 
     # ======================================================================
     # EDGE <-> FACE
@@ -0,0 +1,144 @@
+/*
+
+Copyright 2018 The pythonOCC developers
+
+This file is part of pythonOCC.
+
+pythonOCC is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pythonOCC is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+*/
+
+/*
+Evaluation of curves and surfaces over arrays of parameters.
+
+occ_evaluate_array reads N parameters (curves) or N (u, v) pairs (surfaces)
+from a contiguous float64 buffer, such as a numpy array, and returns a tuple
+of bytearrays of N x 3 doubles: the points, then the derivatives up to the
+requested order. The geometry is evaluated without holding the GIL.
+*/
+%{
+#include <string>
+#include <gp_Pnt.hxx>
+#include <gp_Vec.hxx>
+#include <Standard_Failure.hxx>
+#include <Standard_ErrorHandler.hxx>
+
+static void occ_store_xyz(double * values, Py_ssize_t i, const gp_XYZ & xyz)
+{
+    values[3 * i] = xyz.X();
+    values[3 * i + 1] = xyz.Y();
+    values[3 * i + 2] = xyz.Z();
+}
+
+// Geom_Curve and Adaptor3d_Curve
+template <class Curve>
+static void occ_evaluate_curve(const Curve & curve, const double * parameters,
+                               Py_ssize_t n, int order, double ** values)
+{
+    gp_Pnt p;
+    gp_Vec v1, v2;
+    for (Py_ssize_t i = 0; i < n; i++) {
+        if (order == 0) curve.D0(parameters[i], p);
+        else if (order == 1) curve.D1(parameters[i], p, v1);
+        else curve.D2(parameters[i], p, v1, v2);
+        occ_store_xyz(values[0], i, p.XYZ());
+        if (order > 0) occ_store_xyz(values[1], i, v1.XYZ());
+        if (order > 1) occ_store_xyz(values[2], i, v2.XYZ());
+    }
+}
+
+// Geom_Surface and Adaptor3d_Surface
+template <class Surface>
+static void occ_evaluate_surface(const Surface & surface, const double * uv,
+                                 Py_ssize_t n, int order, double ** values)
+{
+    gp_Pnt p;
+    gp_Vec d1u, d1v, d2u, d2v, d2uv;
+    for (Py_ssize_t i = 0; i < n; i++) {
+        if (order == 0) surface.D0(uv[2 * i], uv[2 * i + 1], p);
+        else if (order == 1) surface.D1(uv[2 * i], uv[2 * i + 1], p, d1u, d1v);
+        else surface.D2(uv[2 * i], uv[2 * i + 1], p, d1u, d1v, d2u, d2v, d2uv);
+        occ_store_xyz(values[0], i, p.XYZ());
+        if (order > 0) {
+            occ_store_xyz(values[1], i, d1u.XYZ());
+            occ_store_xyz(values[2], i, d1v.XYZ());
+        }
+        if (order > 1) {
+            occ_store_xyz(values[3], i, d2u.XYZ());
+            occ_store_xyz(values[4], i, d2v.XYZ());
+            occ_store_xyz(values[5], i, d2uv.XYZ());
+        }
+    }
+}
+
+// dimension is 1 for curves, 2 for surfaces
+template <class Geometry>
+static PyObject * occ_evaluate_array(const Geometry & geometry, PyObject * parameters, int order, int dimension,
+                                     void (*evaluate)(const Geometry &, const double *, Py_ssize_t, int, double **))
+{
+    if (order < 0 || order > 2) {
+        PyErr_SetString(PyExc_ValueError, "order must be 0, 1 or 2.");
+        return NULL;
+    }
+    Py_buffer view;
+    if (PyObject_GetBuffer(parameters, &view, PyBUF_C_CONTIGUOUS) != 0) {
+        return NULL;
+    }
+    if (view.len % (dimension * sizeof(double)) != 0) {
+        PyBuffer_Release(&view);
+        PyErr_SetString(PyExc_ValueError, "parameters must be a contiguous float64 array.");
+        return NULL;
+    }
+    const Py_ssize_t n = view.len / (dimension * sizeof(double));
+    // the points, then the first and the second derivatives
+    const int nb_arrays = dimension == 1 ? 1 + order : (order == 0 ? 1 : (order == 1 ? 3 : 6));
+    PyObject * result = PyTuple_New(nb_arrays);
+    if (!result) {
+        PyBuffer_Release(&view);
+        return NULL;
+    }
+    double * values[6];
+    for (int k = 0; k < nb_arrays; k++) {
+        PyObject * array = PyByteArray_FromStringAndSize(NULL, 3 * n * sizeof(double));
+        if (!array) {
+            Py_DECREF(result);
+            PyBuffer_Release(&view);
+            return NULL;
+        }
+        PyTuple_SET_ITEM(result, k, array);
+        values[k] = reinterpret_cast<double *>(PyByteArray_AS_STRING(array));
+    }
+    // exceptions must not leave the block that releases the GIL
+    std::string message;
+    bool failed = false;
+    Py_BEGIN_ALLOW_THREADS
+    try {
+        OCC_CATCH_SIGNALS
+        evaluate(geometry, static_cast<const double *>(view.buf), n, order, values);
+    }
+    catch(Standard_Failure const& error) {
+        failed = true;
+        if (error.DynamicType()->Name()) message += std::string(error.DynamicType()->Name()) + "\n";
+        if (error.GetMessageString()) message += std::string(error.GetMessageString());
+    }
+    Py_END_ALLOW_THREADS
+    PyBuffer_Release(&view);
+    if (failed) {
+        Py_DECREF(result);
+        PyErr_SetString(PyExc_RuntimeError, message.c_str());
+        return NULL;
+    }
+    return result;
+}
+%}
@@ -141,6 +141,7 @@ They are instantiated with HCurve, HSurface, HCurved2d
 %include ../common/FunctionTransformers.i
 %include ../common/Operators.i
 %include ../common/OccHandle.i
+%include ../common/ArrayEvaluators.i
 
 
 %include Adaptor3d_headers.i
@@ -348,6 +349,20 @@ class Adaptor3d_Curve {
 		%feature("autodoc", "	:rtype: Handle_Geom_BSplineCurve
 ") BSpline;
 		virtual Handle_Geom_BSplineCurve BSpline ();
+
+        %feature("autodoc", "	* Evaluates the curve at the N parameters of a contiguous float64 buffer, such as a numpy array, without holding the GIL. Returns a tuple of bytearrays of N x 3 doubles: the points, then the derivatives D1 and D2 up to <order> (0, 1 or 2).
+
+	:param parameters:
+	:type parameters: PyObject *
+	:param order:
+	:type order: int
+	:rtype: PyObject *
+") EvaluateArray;
+        %extend {
+            PyObject * EvaluateArray(PyObject * parameters, int order) {
+            return occ_evaluate_array(*$self, parameters, order, 1, occ_evaluate_curve<Adaptor3d_Curve>);
+            }
+        };
 };
 
 
@@ -1942,6 +1957,20 @@ class Adaptor3d_Surface {
 		%feature("autodoc", "	:rtype: float
 ") OffsetValue;
 		virtual Standard_Real OffsetValue ();
+
+        %feature("autodoc", "	* Evaluates the surface at the N (u, v) pairs of a contiguous float64 buffer, such as a (N, 2) numpy array, without holding the GIL. Returns a tuple of bytearrays of N x 3 doubles: the points, then D1U and D1V if <order> is 1 or 2, then D2U, D2V and D2UV if <order> is 2.
+
+	:param parameters:
+	:type parameters: PyObject *
+	:param order:
+	:type order: int
+	:rtype: PyObject *
+") EvaluateArray;
+        %extend {
+            PyObject * EvaluateArray(PyObject * parameters, int order) {
+            return occ_evaluate_array(*$self, parameters, order, 2, occ_evaluate_surface<Adaptor3d_Surface>);
+            }
+        };
 };
 
 
@@ -56,6 +56,7 @@ construction of the geometric objects.
 %include ../common/FunctionTransformers.i
 %include ../common/Operators.i
 %include ../common/OccHandle.i
+%include ../common/ArrayEvaluators.i
 
 
 %include Geom_headers.i
@@ -1070,6 +1071,20 @@ class Geom_Curve : public Geom_Geometry {
 	:rtype: gp_Pnt
 ") Value;
 		gp_Pnt Value (const Standard_Real U);
+
+        %feature("autodoc", "	* Evaluates the curve at the N parameters of a contiguous float64 buffer, such as a numpy array, without holding the GIL. Returns a tuple of bytearrays of N x 3 doubles: the points, then the derivatives D1 and D2 up to <order> (0, 1 or 2).
+
+	:param parameters:
+	:type parameters: PyObject *
+	:param order:
+	:type order: int
+	:rtype: PyObject *
+") EvaluateArray;
+        %extend {
+            PyObject * EvaluateArray(PyObject * parameters, int order) {
+            return occ_evaluate_array(*$self, parameters, order, 1, occ_evaluate_curve<Geom_Curve>);
+            }
+        };
 };
 
 
@@ -1400,6 +1415,20 @@ class Geom_Surface : public Geom_Geometry {
 	:rtype: gp_Pnt
 ") Value;
 		gp_Pnt Value (const Standard_Real U,const Standard_Real V);
+
+        %feature("autodoc", "	* Evaluates the surface at the N (u, v) pairs of a contiguous float64 buffer, such as a (N, 2) numpy array, without holding the GIL. Returns a tuple of bytearrays of N x 3 doubles: the points, then D1U and D1V if <order> is 1 or 2, then D2U, D2V and D2UV if <order> is 2.
+
+	:param parameters:
+	:type parameters: PyObject *
+	:param order:
+	:type order: int
+	:rtype: PyObject *
+") EvaluateArray;
+        %extend {
+            PyObject * EvaluateArray(PyObject * parameters, int order) {
+            return occ_evaluate_array(*$self, parameters, order, 2, occ_evaluate_surface<Geom_Surface>);
+            }
+        };
 };
 
 
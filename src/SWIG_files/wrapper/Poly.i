@@ -1246,6 +1246,69 @@ class Poly_Triangulation : public MMgt_TShared {
 		%feature("autodoc", "	:rtype: bool
 ") HasNormals;
 		Standard_Boolean HasNormals ();
+
+        %feature("autodoc", "	* Returns the arrays of the triangulation in a single call, as a tuple of 4 bytearrays: the nodes (NbNodes x 3 doubles), the triangles (NbTriangles x 3 ints, 0-based node indices), the UV nodes (NbNodes x 2 doubles, None if not HasUVNodes) and the normals (NbNodes x 3 floats, None if not HasNormals). The arrays are copied without holding the GIL.
+
+	:rtype: PyObject *
+") Buffers;
+        %extend {
+            PyObject * Buffers() {
+            const TColgp_Array1OfPnt & nodes = $self->Nodes();
+            const Poly_Array1OfTriangle & triangles = $self->Triangles();
+            const Standard_Integer nb_nodes = nodes.Length();
+            const Standard_Integer nb_triangles = triangles.Length();
+            const Standard_Boolean has_uv = $self->HasUVNodes();
+            const Standard_Boolean has_normals = $self->HasNormals();
+            PyObject * nodes_buffer = PyByteArray_FromStringAndSize(NULL, 3 * nb_nodes * sizeof(double));
+            PyObject * triangles_buffer = PyByteArray_FromStringAndSize(NULL, 3 * nb_triangles * sizeof(int));
+            PyObject * uv_buffer = has_uv ? PyByteArray_FromStringAndSize(NULL, 2 * nb_nodes * sizeof(double)) : Py_None;
+            PyObject * normals_buffer = has_normals ? PyByteArray_FromStringAndSize(NULL, 3 * nb_nodes * sizeof(float)) : Py_None;
+            if (!has_uv) Py_INCREF(Py_None);
+            if (!has_normals) Py_INCREF(Py_None);
+            if (!nodes_buffer || !triangles_buffer || !uv_buffer || !normals_buffer) {
+                Py_XDECREF(nodes_buffer);
+                Py_XDECREF(triangles_buffer);
+                Py_XDECREF(uv_buffer);
+                Py_XDECREF(normals_buffer);
+                return NULL;
+            }
+            double * node_values = reinterpret_cast<double *>(PyByteArray_AS_STRING(nodes_buffer));
+            int * triangle_values = reinterpret_cast<int *>(PyByteArray_AS_STRING(triangles_buffer));
+            double * uv_values = has_uv ? reinterpret_cast<double *>(PyByteArray_AS_STRING(uv_buffer)) : NULL;
+            float * normal_values = has_normals ? reinterpret_cast<float *>(PyByteArray_AS_STRING(normals_buffer)) : NULL;
+            Py_BEGIN_ALLOW_THREADS
+            const Standard_Integer lower = nodes.Lower();
+            for (Standard_Integer i = 0; i < nb_nodes; i++) {
+                const gp_Pnt & p = nodes.Value(lower + i);
+                node_values[3 * i] = p.X();
+                node_values[3 * i + 1] = p.Y();
+                node_values[3 * i + 2] = p.Z();
+            }
+            Standard_Integer n1, n2, n3;
+            for (Standard_Integer i = 0; i < nb_triangles; i++) {
+                triangles.Value(triangles.Lower() + i).Get(n1, n2, n3);
+                triangle_values[3 * i] = n1 - lower;
+                triangle_values[3 * i + 1] = n2 - lower;
+                triangle_values[3 * i + 2] = n3 - lower;
+            }
+            if (has_uv) {
+                const TColgp_Array1OfPnt2d & uv_nodes = $self->UVNodes();
+                for (Standard_Integer i = 0; i < nb_nodes; i++) {
+                    const gp_Pnt2d & uv = uv_nodes.Value(uv_nodes.Lower() + i);
+                    uv_values[2 * i] = uv.X();
+                    uv_values[2 * i + 1] = uv.Y();
+                }
+            }
+            if (has_normals) {
+                const TShort_Array1OfShortReal & normals = $self->Normals();
+                for (Standard_Integer i = 0; i < 3 * nb_nodes; i++) {
+                    normal_values[i] = normals.Value(normals.Lower() + i);
+                }
+            }
+            Py_END_ALLOW_THREADS
+            return Py_BuildValue("(NNNN)", nodes_buffer, triangles_buffer, uv_buffer, normals_buffer);
+            }
+        };
 };
 
 
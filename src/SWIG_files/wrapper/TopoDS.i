@@ -879,6 +879,16 @@ class TopoDS_Shape {
             return $self->HashCode(2147483647);
             }
         };
+
+        %feature("autodoc", "	* Returns the address of the TShape shared by <self>. Two shapes have the same TShapeId if and only if they are partners (see IsPartner).
+
+	:rtype: size_t
+") TShapeId;
+        %extend {
+            size_t TShapeId() {
+            return reinterpret_cast<size_t>($self->TShape().operator->());
+            }
+        };
         		%feature("compactdefaultargs") EmptyCopy;
 		%feature("autodoc", "	* Replace <self> by a new Shape with the same Orientation and Location and a new TShape with the same geometry and no sub-shapes.
 
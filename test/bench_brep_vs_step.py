@@ -0,0 +1,48 @@
+import os
+import os.path
+import tempfile
+import time
+
+from OCC.Core.BRep import BRep_Builder
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeSphere
+from OCC.Core.TopoDS import TopoDS_Compound
+from OCC.Core.gp import gp_Pnt
+
+from OCC.Extend.TopologyUtils import TopologyExplorer
+from OCC.Extend.DataExchange import (read_step_file, write_step_file,
+                                     read_brep_file, write_brep_file, HAVE_ZSTD)
+
+# a compound of spheres, large enough so that the timings are meaningful
+builder = BRep_Builder()
+shp = TopoDS_Compound()
+builder.MakeCompound(shp)
+for i in range(20):
+    for j in range(20):
+        builder.Add(shp, BRepPrimAPI_MakeSphere(gp_Pnt(30. * i, 30. * j, 0.), 10.).Shape())
+number_of_faces = TopologyExplorer(shp).number_of_faces()
+
+directory = tempfile.mkdtemp()
+formats = [("STEP", "shape.stp", write_step_file, read_step_file),
+           ("BRep", "shape.brep", write_brep_file, read_brep_file),
+           ("BRep gzip", "shape.brep.gz", write_brep_file, read_brep_file)]
+if HAVE_ZSTD:
+    formats.append(("BRep zstd", "shape.brep.zst", write_brep_file, read_brep_file))
+
+print("Round trip of %i faces" % number_of_faces)
+for name, basename, write_function, read_function in formats:
+    filename = os.path.join(directory, basename)
+    t0 = time.monotonic()
+    write_function(shp, filename)
+    t1 = time.monotonic()
+    if read_function is read_step_file:
+        shp2 = read_function(filename, verbosity=False)
+    else:
+        shp2 = read_function(filename)
+    t2 = time.monotonic()
+    assert TopologyExplorer(shp2).number_of_faces() == number_of_faces
+    print("%s:" % name)
+    print("  * write: %.2fs" % (t1 - t0))
+    print("  * read: %.2fs" % (t2 - t1))
+    print("  * file size: %.1fkB" % (os.path.getsize(filename) / 1024.))
+    os.remove(filename)
+os.rmdir(directory)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+
+##Copyright 2018 The pythonOCC developers
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox, BRepPrimAPI_MakeSphere
+from OCC.Core.Quantity import Quantity_Color, Quantity_TOC_RGB
+from OCC.Core.STEPCAFControl import STEPCAFControl_Writer
+from OCC.Core.STEPControl import STEPControl_AsIs
+from OCC.Core.TCollection import TCollection_ExtendedString
+from OCC.Core.TDocStd import TDocStd_Document
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.XCAFDoc import (XCAFDoc_DocumentTool_ShapeTool,
+                              XCAFDoc_DocumentTool_ColorTool, XCAFDoc_ColorGen)
+from OCC.Core.XSControl import XSControl_WorkSession
+from OCC.Core.gp import gp_Trsf, gp_Vec
+from OCC.Extend.DataExchange import (read_step_file, write_step_file, write_iges_file,
+                                     batch_read_files, ImportCache,
+                                     read_step_file_with_names_colors,
+                                     read_step_assembly_tree, iter_step_file,
+                                     write_stl_file, read_stl_mesh,
+                                     read_stl_file_as_triangulation, write_mesh_file,
+                                     read_brep_file, write_brep_file,
+                                     read_brep_bytes, write_brep_bytes, HAVE_ZSTD,
+                                     ExchangeStats)
+from OCC.Core.Visualization import Tesselator
+from OCC.Extend.MeshUtils import face_triangulation, shape_triangulation, tesselator_mesh
+from OCC.Extend.TopologyUtils import TopologyExplorer
+
+
+def get_test_box_shape():
+    return BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+
+
+def write_test_assembly(filename, number_of_instances):
+    """ writes an assembly made of several instances of the same red box
+    """
+    doc = TDocStd_Document(TCollection_ExtendedString("pythonocc-doc"))
+    shape_tool = XCAFDoc_DocumentTool_ShapeTool(doc.Main())
+    color_tool = XCAFDoc_DocumentTool_ColorTool(doc.Main())
+    part_label = shape_tool.AddShape(get_test_box_shape(), False)
+    color_tool.SetColor(part_label, Quantity_Color(1., 0., 0., Quantity_TOC_RGB),
+                        XCAFDoc_ColorGen)
+    assembly_label = shape_tool.NewShape()
+    for i in range(number_of_instances):
+        translation = gp_Trsf()
+        translation.SetTranslation(gp_Vec(20. * i, 0., 0.))
+        shape_tool.AddComponent(assembly_label, part_label, TopLoc_Location(translation))
+    shape_tool.UpdateAssembly(assembly_label)
+    writer = STEPCAFControl_Writer(XSControl_WorkSession(), False)
+    writer.Transfer(doc, STEPControl_AsIs)
+    writer.Write(filename)
+
+
+@contextlib.contextmanager
+def captured_output():
+    """ captures what is written to the standard output, by python and by
+    the C++ code, whose output does not go through sys.stdout
+    """
+    output = io.StringIO()
+    sys.stdout.flush()
+    saved_descriptor = os.dup(1)
+    with tempfile.TemporaryFile(mode="w+") as f:
+        os.dup2(f.fileno(), 1)
+        try:
+            with contextlib.redirect_stdout(f):
+                yield output
+            sys.stdout.flush()
+        finally:
+            os.dup2(saved_descriptor, 1)
+            os.close(saved_descriptor)
+        f.seek(0)
+        output.write(f.read())
+
+
+class TestExtendDataExchange(unittest.TestCase):
+
+    def test_batch_read_files(self):
+        box_filename = os.path.join("test_io", "batch_box.stp")
+        sphere_filename = os.path.join("test_io", "batch_sphere.igs")
+        missing_filename = os.path.join("test_io", "batch_missing.stp")
+        write_step_file(get_test_box_shape(), box_filename)
+        write_iges_file(BRepPrimAPI_MakeSphere(10.).Shape(), sphere_filename)
+        results = batch_read_files([box_filename, sphere_filename, missing_filename],
+                                   max_workers=2)
+        self.assertEqual([r.filename for r in results],
+                         [box_filename, sphere_filename, missing_filename])
+        self.assertTrue(results[0].error is None)
+        self.assertEqual(TopologyExplorer(results[0].shape).number_of_faces(), 6)
+        self.assertTrue(results[1].error is None)
+        self.assertFalse(results[1].shape.IsNull())
+        self.assertTrue(results[2].shape is None)
+        self.assertTrue(results[2].error.startswith("FileNotFoundError"))
+        self.assertTrue(all(r.elapsed >= 0. for r in results))
+
+    def test_import_cache(self):
+        cache_directory = tempfile.mkdtemp()
+        try:
+            cache = ImportCache(cache_directory)
+            step_filename = os.path.join("test_io", "cached_box.stp")
+            write_step_file(get_test_box_shape(), step_filename)
+            first = read_step_file(step_filename, verbosity=False, cache=cache)
+            self.assertEqual(len(os.listdir(cache_directory)), 1)
+            second = read_step_file(step_filename, verbosity=False, cache=cache)
+            self.assertEqual(TopologyExplorer(first).number_of_faces(),
+                             TopologyExplorer(second).number_of_faces())
+            # the key only depends on the content of the file
+            copy_filename = os.path.join(cache_directory, "copy.step")
+            shutil.copy(step_filename, copy_filename)
+            self.assertEqual(cache.key(step_filename, reader="step"),
+                             cache.key(copy_filename, reader="step"))
+            self.assertNotEqual(cache.key(step_filename, reader="step"),
+                                cache.key(step_filename, reader="iges"))
+            # entries are bytes with JSON metadata, corrupt entries are misses
+            cache.put("entry", b"data", {"names": ["box"]})
+            self.assertEqual(cache.get_entry("entry"), (b"data", {"names": ["box"]}))
+            with open(os.path.join(cache_directory, "entry.occcache"), "wb") as f:
+                f.write(b"corrupt")
+            self.assertTrue(cache.get("entry") is None)
+            # a failed put does not leave any temporary file
+            with self.assertRaises(TypeError):
+                cache.put("failed", b"data", {"names": object()})
+            self.assertFalse(any(name.endswith(".tmp") for name in os.listdir(cache_directory)))
+            # eviction
+            cache.max_size = 0
+            cache.put("entry", b"data")
+            self.assertEqual(cache.size(), 0)
+        finally:
+            shutil.rmtree(cache_directory)
+
+    def test_read_step_file_with_names_colors(self):
+        filename = os.path.join("test_io", "assembly_of_boxes.stp")
+        write_test_assembly(filename, 5)
+        shapes = read_step_file_with_names_colors(filename)
+        self.assertEqual(len(shapes), 5)
+        # the instances are placed, not copied: they share the same TShape
+        self.assertEqual(len(set(a_shape.TShapeId() for a_shape in shapes)), 1)
+        x_positions = sorted(round(a_shape.Location().Transformation().TranslationPart().X(), 6)
+                             for a_shape in shapes)
+        self.assertEqual(x_positions, [0., 20., 40., 60., 80.])
+        for name, color in shapes.values():
+            self.assertAlmostEqual(color.Red(), 1.)
+
+    def test_read_step_assembly_tree(self):
+        filename = os.path.join("test_io", "assembly_of_boxes.stp")
+        write_test_assembly(filename, 3)
+        tree = read_step_assembly_tree(filename)
+        self.assertEqual(tree.parents.tolist(), [-1, 0, 0, 0])
+        self.assertEqual(tree.depths.tolist(), [0, 1, 1, 1])
+        self.assertEqual(tree.part_ids.tolist(), [-1, 0, 0, 0])
+        self.assertEqual(len(tree.parts), 1)
+        self.assertEqual(tree.global_transforms.shape, (4, 4, 4))
+        self.assertTrue(np.allclose(tree.global_transforms[1:, 0, 3], [0., 20., 40.]))
+        self.assertTrue(np.allclose(tree.colors[1:], [1., 0., 0.]))
+        self.assertEqual(len(tree.names), 4)
+        self.assertEqual(len(set(tree.entries)), 2)
+
+    def test_iter_step_file(self):
+        filename = os.path.join("test_io", "assembly_of_boxes.stp")
+        write_test_assembly(filename, 3)
+        parts = iter_step_file(filename)
+        self.assertFalse(isinstance(parts, list))
+        parts = list(parts)
+        self.assertEqual(len(parts), 3)
+        x_positions = [loc.Transformation().TranslationPart().X() for _, loc, _ in parts]
+        self.assertTrue(np.allclose(sorted(x_positions), [0., 20., 40.]))
+        self.assertEqual(len(set(a_shape.TShapeId() for _, _, a_shape in parts)), 1)
+        name = parts[0][0]
+        self.assertEqual(len(list(iter_step_file(filename, names=[name]))), 3)
+        self.assertEqual(list(iter_step_file(filename, names=["not a part name"])), [])
+
+    def test_read_stl_mesh(self):
+        for mode in ("ascii", "binary"):
+            filename = os.path.join("test_io", "box_%s.stl" % mode)
+            write_stl_file(get_test_box_shape(), filename, mode=mode)
+            vertices, triangles = read_stl_mesh(filename, weld=False)
+            self.assertEqual(vertices.shape, (36, 3))
+            self.assertEqual(triangles.shape, (12, 3))
+            vertices, triangles = read_stl_mesh(filename)
+            self.assertEqual(vertices.dtype, np.float32)
+            self.assertEqual(vertices.shape, (8, 3))
+            self.assertEqual(triangles.shape, (12, 3))
+            self.assertTrue(np.allclose(vertices.max(axis=0), [10, 20, 30]))
+            face_mesh = face_triangulation(read_stl_file_as_triangulation(filename),
+                                           compute_normals=False)
+            self.assertEqual(face_mesh.nodes.shape, (8, 3))
+            self.assertEqual(face_mesh.triangles.shape, (12, 3))
+
+    def test_write_mesh_file(self):
+        box = get_test_box_shape()
+        mesh = shape_triangulation(box, linear_deflection=0.1)
+        filename = os.path.join("test_io", "box_mesh.stl")
+        write_mesh_file(filename, mesh.nodes, mesh.triangles, groups=mesh.face_ids)
+        vertices, triangles = read_stl_mesh(filename)
+        self.assertEqual(triangles.shape, mesh.triangles.shape)
+        self.assertEqual(vertices.shape, (8, 3))
+        with self.assertRaises(AssertionError):
+            write_mesh_file(filename, mesh.nodes, mesh.triangles,
+                            groups=np.full(mesh.triangles.shape[0], 65536))
+        filename = os.path.join("test_io", "box_mesh.obj")
+        write_mesh_file(filename, mesh.nodes, mesh.triangles, mesh.normals, mesh.face_ids)
+        with open(filename) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(sum(1 for l in lines if l.startswith("g ")), 6)
+        self.assertEqual(sum(1 for l in lines if l.startswith("f ")), mesh.triangles.shape[0])
+        tess = Tesselator(box)
+        tess.Compute()
+        vertices, triangles = tesselator_mesh(tess)
+        self.assertEqual(triangles.shape[0], tess.ObjGetTriangleCount())
+        filename = os.path.join("test_io", "box_mesh.ply")
+        write_mesh_file(filename, vertices, triangles)
+        with open(filename, "rb") as f:
+            self.assertTrue(f.read().startswith(b"ply\nformat binary_little_endian 1.0"))
+
+    def test_brep_file(self):
+        box = get_test_box_shape()
+        translation = gp_Trsf()
+        translation.SetTranslation(gp_Vec(5., 0., 0.))
+        box.Move(TopLoc_Location(translation))
+        compressions = [None, "gzip"]
+        if HAVE_ZSTD:
+            compressions.append("zstd")
+        for compression in compressions:
+            data = write_brep_bytes(box, compression)
+            for shape in [read_brep_bytes(data), read_brep_bytes(memoryview(data))]:
+                self.assertEqual(TopologyExplorer(shape).number_of_faces(), 6)
+                self.assertTrue(shape.Location().Transformation().TranslationPart().IsEqual(
+                    translation.TranslationPart(), 1e-9))
+        # files written by OpenCASCADE and by write_brep_bytes are the same format
+        filename = os.path.join("test_io", "box_written.brep")
+        write_brep_file(box, filename)
+        with open(filename, "rb") as f:
+            self.assertEqual(TopologyExplorer(read_brep_bytes(f.read())).number_of_faces(), 6)
+        with open(filename, "wb") as f:
+            f.write(write_brep_bytes(box))
+        self.assertEqual(TopologyExplorer(read_brep_file(filename)).number_of_faces(), 6)
+        filename = os.path.join("test_io", "box_written.brep.gz")
+        write_brep_file(box, filename)
+        with open(filename, "rb") as f:
+            self.assertTrue(f.read(2) == b"\x1f\x8b")
+        self.assertEqual(TopologyExplorer(read_brep_file(filename)).number_of_faces(), 6)
+        with self.assertRaises(AssertionError):
+            write_brep_file(box, filename, compression="lzma")
+
+    def test_exchange_stats(self):
+        filename = os.path.join("test_io", "stats_box.stp")
+        stats = ExchangeStats()
+        write_step_file(get_test_box_shape(), filename, stats=stats)
+        self.assertEqual(stats.operation, "write")
+        self.assertTrue(stats.number_of_entities > 0)
+        self.assertEqual(stats.shape_counts["faces"], 6)
+        stats = ExchangeStats()
+        read_step_file(filename, verbosity=False, stats=stats)
+        self.assertEqual((stats.format, stats.operation), ("step", "read"))
+        self.assertTrue(stats.parse_time > 0. and stats.transfer_time > 0.)
+        self.assertTrue(stats.number_of_entities > 0)
+        self.assertEqual(stats.shape_counts["solids"], 1)
+        self.assertEqual(stats.number_of_fails, 0)
+        self.assertEqual(stats.as_dict()["shape_counts"]["faces"], 6)
+        # the readers do not print anything, neither python nor OpenCASCADE
+        with captured_output() as output:
+            read_step_file(filename)
+            stats = ExchangeStats()
+            shapes = read_step_file_with_names_colors(filename, stats=stats)
+        self.assertEqual(output.getvalue(), "")
+        self.assertEqual(stats.shape_counts["solids"], len(shapes))
+
+
+def suite():
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(TestExtendDataExchange))
+    return test_suite
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+##Copyright 2018 The pythonOCC developers
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+import numpy as np
+
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeSphere, BRepPrimAPI_MakeTorus
+from OCC.Core.gp import gp_Pnt, gp_Vec, gp_Ax1, gp_Dir, gp_Trsf
+from OCC.Extend.GeometryUtils import (curve_values, curve_derivatives,
+                                      curve_curvatures, surface_values,
+                                      surface_normals, surface_curvatures,
+                                      trsf_to_matrix, matrix_to_trsf,
+                                      transform_points, compose_transformations)
+from OCC.Extend.TopologyUtils import TopologyExplorer
+
+
+class TestExtendGeometry(unittest.TestCase):
+
+    def test_curve_evaluation(self):
+        torus = BRepPrimAPI_MakeTorus(50, 20).Shape()
+        for edge in TopologyExplorer(torus).edges():
+            parameters = np.linspace(0., 1., 11)
+            points = curve_values(edge, parameters)
+            self.assertEqual(points.shape, (11, 3))
+            points2, d1, d2 = curve_derivatives(edge, parameters, order=2)
+            self.assertTrue(np.allclose(points, points2))
+            # torus edges are circles, of radius 20 or 70 (or 30)
+            curvatures = curve_curvatures(edge, parameters)
+            radius = 1. / curvatures
+            self.assertTrue(np.allclose(radius, radius[0]))
+            self.assertTrue(np.any(np.isclose(radius[0], [20., 30., 70.])))
+
+    def test_surface_evaluation(self):
+        sphere = BRepPrimAPI_MakeSphere(10.).Shape()
+        face = next(TopologyExplorer(sphere).faces())
+        uv = np.array([[0., 0.], [1., 0.5], [2., -0.5]])
+        points = surface_values(face, uv)
+        self.assertTrue(np.allclose(np.linalg.norm(points, axis=1), 10.))
+        # outward normals of a sphere centered at the origin
+        normals = surface_normals(face, uv)
+        self.assertTrue(np.allclose(normals, points / 10.))
+        gaussian, mean, k_min, k_max = surface_curvatures(face, uv)
+        self.assertTrue(np.allclose(gaussian, 0.01))
+        self.assertTrue(np.allclose(np.abs(mean), 0.1))
+        self.assertTrue(np.allclose(k_min, k_max))
+
+    def test_transformations(self):
+        trsf = gp_Trsf()
+        trsf.SetRotation(gp_Ax1(gp_Pnt(1, 2, 3), gp_Dir(0, 0, 1)), 0.3)
+        translation = gp_Trsf()
+        translation.SetTranslation(gp_Vec(10, -5, 2))
+        points = np.random.rand(50, 3)
+        transformed = transform_points(points, trsf)
+        for p, q in zip(points, transformed):
+            self.assertTrue(np.allclose(gp_Pnt(*p).Transformed(trsf).Coord(), q))
+        # matrix round trip
+        matrix = trsf_to_matrix(trsf)
+        self.assertTrue(np.allclose(trsf_to_matrix(matrix_to_trsf(matrix)), matrix))
+        # composition follows gp_Trsf.Multiplied
+        composed = compose_transformations(trsf, translation)
+        self.assertTrue(np.allclose(composed, trsf_to_matrix(translation.Multiplied(trsf))))
+        # several placements at once
+        placed = transform_points(points, [trsf, translation])
+        self.assertEqual(placed.shape, (2, 50, 3))
+        self.assertTrue(np.allclose(placed[0], transformed))
+
+
+def suite():
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(TestExtendGeometry))
+    return test_suite
+
+if __name__ == "__main__":
+    unittest.main()
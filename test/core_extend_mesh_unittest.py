@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+##Copyright 2018 The pythonOCC developers
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+import numpy as np
+
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox, BRepPrimAPI_MakeSphere
+from OCC.Extend.MeshUtils import (mesh_shape, face_triangulation,
+                                  shape_triangulation, discretize_edges)
+from OCC.Extend.TopologyUtils import TopologyExplorer
+
+
+class TestExtendMesh(unittest.TestCase):
+
+    def test_face_triangulation(self):
+        box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        face = next(TopologyExplorer(box).faces())
+        self.assertTrue(face_triangulation(face) is None)
+        mesh_shape(box, 0.1)
+        face_mesh = face_triangulation(face)
+        self.assertEqual(face_mesh.nodes.shape[1], 3)
+        self.assertEqual(face_mesh.triangles.dtype, np.int32)
+        self.assertTrue(face_mesh.triangles.min() >= 0)
+        self.assertTrue(face_mesh.triangles.max() < face_mesh.nodes.shape[0])
+        self.assertEqual(face_mesh.uv_nodes.shape, (face_mesh.nodes.shape[0], 2))
+        self.assertTrue(np.allclose(np.linalg.norm(face_mesh.normals, axis=1), 1.))
+
+    def test_shape_triangulation(self):
+        sphere = BRepPrimAPI_MakeSphere(10.).Shape()
+        shape_mesh = shape_triangulation(sphere, linear_deflection=0.1)
+        self.assertTrue(shape_mesh.triangles.shape[0] > 0)
+        self.assertEqual(shape_mesh.face_ids.shape[0], shape_mesh.triangles.shape[0])
+        self.assertEqual(shape_mesh.node_offsets[-1], shape_mesh.nodes.shape[0])
+        self.assertTrue(np.allclose(np.linalg.norm(shape_mesh.nodes, axis=1), 10.))
+
+    def test_discretize_edges(self):
+        box = BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+        discretization = discretize_edges(box, abscissa=1.)
+        self.assertEqual(discretization.points.dtype, np.float32)
+        self.assertEqual(discretization.edge_ids.tolist(), list(range(12)))
+        self.assertEqual(discretization.offsets[-1], discretization.points.shape[0])
+        # 11, 21 or 31 points depending on the length of the edge
+        counts = np.diff(discretization.offsets)
+        self.assertEqual(sorted(set(counts.tolist())), [11, 21, 31])
+        # straight edges only need their ends
+        discretization = discretize_edges(box, deflection=0.1, edge_ids=[0, 1])
+        self.assertEqual(np.diff(discretization.offsets).tolist(), [2, 2])
+        # the sphere has a degenerated edge at each pole
+        sphere = BRepPrimAPI_MakeSphere(10.).Shape()
+        discretization = discretize_edges(sphere, deflection=0.01, max_workers=2, chunk_size=1)
+        counts = np.diff(discretization.offsets)
+        self.assertEqual(int((counts == 0).sum()), 2)
+        self.assertTrue(np.allclose(np.linalg.norm(discretization.points, axis=1), 10., atol=1e-4))
+
+
+def suite():
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(TestExtendMesh))
+    return test_suite
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+##Copyright 2018 The pythonOCC developers
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+import multiprocessing
+import pickle
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
+from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_SOLID
+from OCC.Extend import ParallelUtils
+from OCC.Extend.ParallelUtils import (SharedShape, serialize_shape,
+                                      deserialize_shape, map_sub_shapes)
+from OCC.Extend.TopologyUtils import TopologyExplorer
+
+
+def get_test_box_shape():
+    return BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+
+
+def number_of_edges(a_shape):
+    return TopologyExplorer(a_shape).number_of_edges()
+
+
+def number_of_shared_faces(shared):
+    return shared.number_of_sub_shapes(TopAbs_FACE)
+
+
+class TestExtendParallel(unittest.TestCase):
+
+    def test_serialize_deserialize(self):
+        box = get_test_box_shape()
+        new_box = deserialize_shape(serialize_shape(box))
+        self.assertFalse(new_box.IsNull())
+        self.assertEqual(TopologyExplorer(new_box).number_of_faces(), 6)
+
+    def test_shared_shape_pickle(self):
+        for use_mmap in [False, True]:
+            with SharedShape(get_test_box_shape(), use_mmap=use_mmap) as shared:
+                state = pickle.dumps(shared)
+                # only the segment name is transmitted
+                self.assertTrue(len(state) < shared.nbytes)
+                attached = pickle.loads(state)
+                self.assertEqual(attached.number_of_sub_shapes(TopAbs_FACE), 6)
+                self.assertEqual(attached.number_of_sub_shapes(TopAbs_SOLID), 1)
+                face = attached.sub_shape(0, TopAbs_FACE)
+                self.assertEqual(attached.sub_shape_index(face, TopAbs_FACE), 0)
+
+    def test_shared_shape_attach(self):
+        for use_mmap in [False, True]:
+            with SharedShape(get_test_box_shape(), use_mmap=use_mmap) as shared:
+                state = pickle.dumps(shared)
+                # as in a process that did not create the shared shape: the
+                # shape is read from the shared memory or the mmap-ed file
+                ParallelUtils._ATTACHED_SHAPES.pop(shared.name)
+                attached = pickle.loads(state)
+                self.assertEqual(TopologyExplorer(attached.shape()).number_of_faces(), 6)
+                self.assertTrue(shared.name in ParallelUtils._ATTACHED_SHAPES)
+                attached.close()
+                # workers started with spawn do not inherit anything
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    self.assertEqual(executor.submit(number_of_shared_faces, shared).result(), 6)
+
+    def test_attached_shapes_bound(self):
+        max_attached_shapes = ParallelUtils.MAX_ATTACHED_SHAPES
+        ParallelUtils.MAX_ATTACHED_SHAPES = 2
+        shared_shapes = []
+        try:
+            for _ in range(3):
+                shared_shapes.append(SharedShape(get_test_box_shape()))
+            names = [shared.name for shared in shared_shapes]
+            self.assertFalse(names[0] in ParallelUtils._ATTACHED_SHAPES)
+            self.assertTrue(names[2] in ParallelUtils._ATTACHED_SHAPES)
+            # the owner keeps its shape
+            self.assertFalse(shared_shapes[0].shape().IsNull())
+        finally:
+            ParallelUtils.MAX_ATTACHED_SHAPES = max_attached_shapes
+            for shared in shared_shapes:
+                shared.unlink()
+
+    def test_map_sub_shapes(self):
+        results = map_sub_shapes(number_of_edges, get_test_box_shape(),
+                                 topology_type=TopAbs_FACE, max_workers=2)
+        self.assertEqual(results, [4] * 6)
+
+
+def suite():
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(TestExtendParallel))
+    return test_suite
+
+if __name__ == "__main__":
+    unittest.main()
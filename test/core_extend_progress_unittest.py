@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+##Copyright 2018 The pythonOCC developers
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import unittest
+
+from OCC.Core.BRep import BRep_Builder
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox, BRepPrimAPI_MakeSphere
+from OCC.Core.TopoDS import TopoDS_Compound
+from OCC.Core.gp import gp_Pnt
+from OCC.Extend.DataExchange import read_step_file, write_step_file
+from OCC.Extend.MeshUtils import mesh_shape, tesselate
+from OCC.Extend.ProgressUtils import ProgressIndicator, OperationCancelled
+
+
+def get_test_spheres(number_of_spheres):
+    builder = BRep_Builder()
+    compound = TopoDS_Compound()
+    builder.MakeCompound(compound)
+    for i in range(number_of_spheres):
+        builder.Add(compound, BRepPrimAPI_MakeSphere(gp_Pnt(30. * i, 0., 0.), 10.).Shape())
+    return compound
+
+
+class TestExtendProgress(unittest.TestCase):
+
+    def test_progress_indicator(self):
+        reports = []
+        progress = ProgressIndicator(lambda *args: reports.append(args), interval=3600.)
+        progress.start("phase", 10)
+        for _ in range(10):
+            progress.advance()
+        progress.finish()
+        # throttled: only the start and the end of the phase are reported
+        self.assertEqual(reports, [("phase", 0, 10), ("phase", 10, 10)])
+        progress.cancel()
+        self.assertTrue(progress.cancelled)
+        with self.assertRaises(OperationCancelled):
+            progress.advance()
+        with self.assertRaises(OperationCancelled):
+            ProgressIndicator(timeout=-1.).start("phase")
+
+    def test_read_step_file_progress(self):
+        filename = os.path.join("test_io", "progress_box.stp")
+        write_step_file(BRepPrimAPI_MakeBox(10, 20, 30).Shape(), filename)
+        phases = []
+        progress = ProgressIndicator(lambda name, value, total: phases.append(name))
+        self.assertFalse(read_step_file(filename, verbosity=False, progress=progress).IsNull())
+        self.assertEqual(phases, ["read", "read", "transfer", "transfer"])
+
+        def cancel_after_read(name, value, total):
+            if name == "read" and value == total:
+                progress.cancel()
+        progress = ProgressIndicator(cancel_after_read)
+        with self.assertRaises(OperationCancelled):
+            read_step_file(filename, verbosity=False, progress=progress)
+
+    def test_mesh_progress(self):
+        spheres = get_test_spheres(4)
+        values = []
+        progress = ProgressIndicator(lambda name, value, total: values.append((name, value, total)),
+                                     interval=0.)
+        mesh_shape(spheres, progress=progress)
+        self.assertEqual(values[0], ("mesh", 0, 4))
+        self.assertEqual(values[-1], ("mesh", 4, 4))
+
+        def cancel_after_first_part(name, value, total):
+            if value == 1:
+                progress.cancel()
+        progress = ProgressIndicator(cancel_after_first_part, interval=0.)
+        with self.assertRaises(OperationCancelled):
+            tesselate(get_test_spheres(4), progress=progress)
+        tess = tesselate(spheres, progress=ProgressIndicator())
+        self.assertTrue(tess.ObjGetTriangleCount() > 0)
+        # the deviation is given to the tesselator
+        coarse = tesselate(get_test_spheres(1), deviation=5., progress=ProgressIndicator())
+        fine = tesselate(get_test_spheres(1), deviation=0.05, progress=ProgressIndicator())
+        self.assertTrue(coarse.ObjGetTriangleCount() < fine.ObjGetTriangleCount())
+
+
+def suite():
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(TestExtendProgress))
+    return test_suite
+
+if __name__ == "__main__":
+    unittest.main()
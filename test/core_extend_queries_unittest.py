@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+
+##Copyright 2018 The pythonOCC developers
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import unittest
+
+import numpy as np
+
+from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_MakeFace
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.gp import gp_Dir, gp_Pln, gp_Pnt, gp_Trsf, gp_Vec
+from OCC.Extend.ParallelUtils import HAVE_SHARED_MEMORY
+if HAVE_SHARED_MEMORY:
+    from multiprocessing import shared_memory
+from OCC.Extend.ShapeQueries import (classify_points, STATE_IN, STATE_OUT,
+                                     STATE_ON, distances_to_shape, RayCaster,
+                                     mass_properties, MassPropertiesCache)
+
+
+def get_test_box_shape():
+    return BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+
+
+class TestExtendQueries(unittest.TestCase):
+
+    def test_classify_points(self):
+        points = np.array([[5, 5, 5], [-1, 5, 5], [0, 5, 5], [50, 50, 50]])
+        states = classify_points(get_test_box_shape(), points, tolerance=1e-6)
+        self.assertEqual(states.dtype, np.int8)
+        self.assertEqual(states.tolist(), [STATE_IN, STATE_OUT, STATE_ON, STATE_OUT])
+
+    def test_classify_points_parallel(self):
+        points = np.random.rand(1000, 3) * [20, 40, 60] - [5, 10, 15]
+        expected = np.where(np.all((points > 0) & (points < [10, 20, 30]), axis=1),
+                            STATE_IN, STATE_OUT)
+        states = classify_points(get_test_box_shape(), points,
+                                 max_workers=2, chunk_size=100)
+        self.assertEqual(states.tolist(), expected.tolist())
+
+    def test_distances_to_shape(self):
+        points = np.array([[5, 10, 40], [-3, -4, 15], [5, 10, 15], [5, 10, 0]])
+        distances, closest_points, face_ids = distances_to_shape(get_test_box_shape(), points)
+        self.assertTrue(np.allclose(distances, [10, 5, 5, 0]))
+        self.assertTrue(np.allclose(closest_points[0], [5, 10, 30]))
+        self.assertTrue(np.allclose(closest_points[1], [0, 0, 15]))
+        self.assertTrue(np.all(face_ids >= 0))
+
+    def test_distances_to_shape_parallel(self):
+        points = np.random.rand(500, 3) * 100 - 50
+        distances, _, _ = distances_to_shape(get_test_box_shape(), points)
+        distances2, _, _ = distances_to_shape(get_test_box_shape(), points,
+                                              max_workers=2, chunk_size=100)
+        self.assertTrue(np.allclose(distances, distances2))
+
+    def test_ray_caster(self):
+        ray_caster = RayCaster(get_test_box_shape())
+        origins = np.array([[5, 10, -10], [5, 10, 15], [-5, -5, -5], [50, 0, 0]])
+        directions = np.array([[0, 0, 1], [0, 0, 2], [0, 0, -1], [1, 0, 0]])
+        distances, points, face_ids, uv = ray_caster.cast(origins, directions)
+        self.assertTrue(np.allclose(distances[:2], [10, 15]))
+        self.assertTrue(np.allclose(points[0], [5, 10, 0]))
+        self.assertTrue(np.allclose(points[1], [5, 10, 30]))
+        self.assertTrue(np.all(np.isinf(distances[2:])))
+        self.assertEqual(face_ids[2:].tolist(), [-1, -1])
+        # a ray through the box hits two faces
+        ray_ids, distances, _, face_ids, _ = ray_caster.cast_all(origins[:1], directions[:1])
+        self.assertEqual(ray_ids.tolist(), [0, 0])
+        self.assertTrue(np.allclose(distances, [10, 40]))
+        self.assertNotEqual(face_ids[0], face_ids[1])
+
+    def test_ray_caster_parallel(self):
+        origins = np.random.rand(300, 3) * 100 - 50
+        directions = np.random.rand(300, 3) - 0.5
+        with RayCaster(get_test_box_shape()) as ray_caster:
+            distances, _, face_ids, _ = ray_caster.cast(origins, directions)
+            distances2, _, face_ids2, _ = ray_caster.cast(origins, directions,
+                                                          max_workers=2, chunk_size=50)
+            shared_name = ray_caster._shared.name
+        self.assertTrue(np.allclose(distances, distances2))
+        self.assertEqual(face_ids.tolist(), face_ids2.tolist())
+        # the shared shape is released at the end of the with block
+        self.assertTrue(ray_caster._shared is None)
+        if HAVE_SHARED_MEMORY:
+            with self.assertRaises(FileNotFoundError):
+                shared_memory.SharedMemory(name=shared_name)
+        else:
+            self.assertFalse(os.path.exists(shared_name))
+
+    def test_mass_properties(self):
+        box = get_test_box_shape()
+        translation = gp_Trsf()
+        translation.SetTranslation(gp_Vec(100, 0, 0))
+        moved_box = box.Moved(TopLoc_Location(translation))
+        cache = MassPropertiesCache()
+        props = mass_properties([box, moved_box], cache=cache)
+        # both instances share the same TShape
+        self.assertEqual(len(cache), 1)
+        self.assertTrue(np.allclose(props["volume"], [6000, 6000]))
+        self.assertTrue(np.allclose(props["area"], [2200, 2200]))
+        self.assertTrue(np.allclose(props["center_of_mass"], [[5, 10, 15], [105, 10, 15]]))
+        self.assertTrue(np.allclose(props["inertia"][0], props["inertia"][1]))
+        boxes = [BRepPrimAPI_MakeBox(i + 1, 1, 1).Shape() for i in range(20)]
+        props = mass_properties(boxes, max_workers=2, chunk_size=4)
+        self.assertTrue(np.allclose(props["volume"], np.arange(1, 21)))
+        # a face away from the origin has no volume, its properties
+        # are the ones of its area
+        face = BRepBuilderAPI_MakeFace(gp_Pln(gp_Pnt(0, 0, 5), gp_Dir(0, 0, 1)),
+                                       0, 10, 0, 20).Face()
+        props = mass_properties([face])
+        self.assertEqual(props["volume"][0], 0.)
+        self.assertAlmostEqual(props["area"][0], 200)
+        self.assertTrue(np.allclose(props["center_of_mass"][0], [5, 10, 5]))
+        # scaled locations: inertia scales as length ** 5 for solids,
+        # and as length ** 4 for faces
+        scaling = gp_Trsf()
+        scaling.SetScale(gp_Pnt(0, 0, 0), 2.)
+        scaled_box = box.Moved(TopLoc_Location(scaling))
+        scaled_face = face.Moved(TopLoc_Location(scaling))
+        props = mass_properties([box, scaled_box, face, scaled_face])
+        self.assertTrue(np.allclose(props["volume"], [6000, 48000, 0, 0]))
+        self.assertTrue(np.allclose(props["area"], [2200, 8800, 200, 800]))
+        self.assertTrue(np.allclose(props["center_of_mass"][1], [10, 20, 30]))
+        self.assertTrue(np.allclose(props["center_of_mass"][3], [10, 20, 10]))
+        self.assertTrue(np.allclose(props["inertia"][1], props["inertia"][0] * 2 ** 5))
+        self.assertTrue(np.allclose(props["inertia"][3], props["inertia"][2] * 2 ** 4))
+
+
+def suite():
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(TestExtendQueries))
+    return test_suite
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+##Copyright 2018 The pythonOCC developers
+##
+##This file is part of pythonOCC.
+##
+##pythonOCC is free software: you can redistribute it and/or modify
+##it under the terms of the GNU Lesser General Public License as published by
+##the Free Software Foundation, either version 3 of the License, or
+##(at your option) any later version.
+##
+##pythonOCC is distributed in the hope that it will be useful,
+##but WITHOUT ANY WARRANTY; without even the implied warranty of
+##MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+##GNU Lesser General Public License for more details.
+##
+##You should have received a copy of the GNU Lesser General Public License
+##along with pythonOCC.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import json
+import unittest
+
+import numpy as np
+
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
+from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_EDGE, TopAbs_VERTEX, TopAbs_SOLID
+from OCC.Extend.TopologyIndex import TopologyIndex, HAVE_SCIPY
+from OCC.Extend.TopologyUtils import TopologyExplorer
+
+
+def get_test_box_shape():
+    return BRepPrimAPI_MakeBox(10, 20, 30).Shape()
+
+
+class TestExtendTopologyIndex(unittest.TestCase):
+
+    def test_ids(self):
+        box = get_test_box_shape()
+        index = TopologyIndex(box)
+        self.assertEqual(index.number_of(TopAbs_SOLID), 1)
+        self.assertEqual(index.number_of(TopAbs_FACE), 6)
+        self.assertEqual(index.number_of(TopAbs_EDGE), 12)
+        self.assertEqual(index.number_of(TopAbs_VERTEX), 8)
+        faces = list(TopologyExplorer(box).faces())
+        ids = index.ids(faces)
+        self.assertEqual(sorted(ids.tolist()), list(range(6)))
+        for face, face_id in zip(faces, ids):
+            self.assertTrue(index.shape(TopAbs_FACE, face_id).IsSame(face))
+        self.assertEqual(index.id(BRepPrimAPI_MakeBox(1, 1, 1).Shape()), -1)
+
+    def test_adjacency(self):
+        index = TopologyIndex(get_test_box_shape())
+        indptr, indices = index.face_edges()
+        self.assertEqual(np.diff(indptr).tolist(), [4] * 6)
+        indptr, indices = index.edge_vertices()
+        self.assertEqual(np.diff(indptr).tolist(), [2] * 12)
+        indptr, indices = index.edge_faces()
+        self.assertEqual(np.diff(indptr).tolist(), [2] * 12)
+        # each face of a box touches the 4 faces that are not parallel to it
+        indptr, indices = index.face_adjacency()
+        self.assertEqual(np.diff(indptr).tolist(), [4] * 6)
+        for face_id in range(6):
+            self.assertNotIn(face_id, indices[indptr[face_id]:indptr[face_id + 1]])
+
+    def test_references(self):
+        index = TopologyIndex(get_test_box_shape())
+        faces = index.shapes(TopAbs_FACE)
+        references = [json.dumps(index.reference(face)) for face in faces]
+        # the same shape, built again
+        other_index = TopologyIndex(get_test_box_shape())
+        for face_id, reference in enumerate(references):
+            reference = json.loads(reference)
+            self.assertEqual(reference["id"], face_id)
+            face = other_index.resolve(reference)
+            self.assertEqual(other_index.id(face), face_id)
+        # a wrong id is recovered from the fingerprint
+        reference = json.loads(references[2])
+        reference["id"] = 4
+        self.assertEqual(other_index.id(other_index.resolve(reference)), 2)
+        reference["fingerprint"][0] += 1.
+        self.assertTrue(other_index.resolve(reference) is None)
+
+    @unittest.skipUnless(HAVE_SCIPY, "scipy is not installed")
+    def test_sparse_adjacency(self):
+        index = TopologyIndex(get_test_box_shape())
+        matrix = index.face_adjacency(as_sparse=True)
+        self.assertEqual(matrix.shape, (6, 6))
+        self.assertEqual(matrix.nnz, 24)
+        self.assertTrue((matrix != matrix.T).nnz == 0)
+
+
+def suite():
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(TestExtendTopologyIndex))
+    return test_suite
+
+if __name__ == "__main__":
+    unittest.main()
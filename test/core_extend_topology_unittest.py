@@ -19,9 +19,13 @@
 
 import unittest
 
-from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeTorus, BRepPrimAPI_MakeBox
+from OCC.Core.BRepPrimAPI import (BRepPrimAPI_MakeTorus, BRepPrimAPI_MakeBox,
+                                  BRepPrimAPI_MakeSphere)
 from OCC.Extend.TopologyUtils import (TopologyExplorer, WireExplorer,
-                                      discretize_edge, discretize_wire)
+                                      discretize_edge, discretize_wire,
+                                      ShapeSet, ShapeDict, shape_key,
+                                      ordered_wires)
+from OCC.Core.BRep import BRep_Tool
 from OCC.Core.TopoDS import TopoDS_Face, TopoDS_Edge
 
 
@@ -78,6 +82,23 @@ class TestExtendTopology(unittest.TestCase):
         self.assertEqual(topo.number_of_compounds(), 0)
         self.assertEqual(topo.number_of_comp_solids(), 0)
 
+    def test_counts(self):
+        counts = topo.counts()
+        self.assertEqual(counts, {"vertices": 8, "edges": 12, "wires": 6,
+                                  "faces": 6, "shells": 1, "solids": 1,
+                                  "comp_solids": 0, "compounds": 0})
+
+    def test_lazy_traversal(self):
+        faces = topo.faces()
+        self.assertFalse(isinstance(faces, list))
+        first_face = next(faces)
+        # a traversal started in between does not disturb the first one
+        self.assertEqual(len(list(topo.faces())), 6)
+        self.assertEqual(len(list(faces)), 5)
+        self.assertTrue(isinstance(first_face, TopoDS_Face))
+        explorer = TopologyExplorer(get_test_box_shape(), ignore_orientation=True)
+        self.assertEqual(explorer.number_of_edges(), 12)
+
 
     def test_nested_iteration(self):
         '''check nested looping'''
@@ -107,6 +128,18 @@ class TestExtendTopology(unittest.TestCase):
         edges_from_face = [i for i in topo.edges_from_face(face)]
         self.assertEqual(len(edges_from_face), topo.number_of_edges_from_face(face))
 
+    def test_ancestors_maps_cache(self):
+        explorer = TopologyExplorer(get_test_box_shape())
+        for edg in explorer.edges():
+            self.assertEqual(explorer.number_of_faces_from_edge(edg), 2)
+        # the edge -> face map is built once for all the queries
+        self.assertEqual(len(explorer._ancestors_maps), 1)
+        for vert in explorer.vertices():
+            self.assertEqual(len(list(explorer.edges_from_vertex(vert))), 3)
+        self.assertEqual(len(explorer._ancestors_maps), 2)
+        explorer.clear_ancestors_maps()
+        self.assertEqual(len(explorer._ancestors_maps), 0)
+
 
     def test_edge_wire(self):
         edg = next(topo.edges())
@@ -176,6 +209,59 @@ class TestExtendTopology(unittest.TestCase):
         for v in _vertices:
             self.assertFalse(v.IsNull())
 
+    def test_ordered_wires(self):
+        wires = list(ordered_wires(get_test_box_shape()))
+        self.assertEqual(len(wires), 6)
+        for ordered_wire in wires:
+            self.assertEqual(len(ordered_wire.edges), 4)
+            self.assertEqual(len(ordered_wire.vertices), 4)
+            self.assertEqual(len(ordered_wire.orientations), 4)
+            self.assertTrue(ordered_wire.points is None)
+        ordered_wire = next(ordered_wires(get_test_box_shape(), with_points=True, abscissa=1.))
+        # a closed polyline: the last point is the first one
+        self.assertTrue((abs(ordered_wire.points[0] - ordered_wire.points[-1]) < 1e-7).all())
+        for point, vertex in zip(ordered_wire.points[[0]], ordered_wire.vertices[:1]):
+            self.assertTrue((abs(point - BRep_Tool().Pnt(vertex).Coord()) < 1e-7).all())
+        # the wire of a sphere has degenerated edges, without points, at its poles
+        for ordered_wire in ordered_wires(get_test_sphere_shape(), with_points=True):
+            self.assertTrue(len(ordered_wire.points) > 1)
+            self.assertTrue((abs(ordered_wire.points[0] - ordered_wire.points[-1]) < 1e-7).all())
+
+    def test_shape_set(self):
+        edges = list(topo.edges())
+        shape_set = ShapeSet(edges)
+        self.assertEqual(len(shape_set), 12)
+        # a reversed edge is the same, but not equal
+        reversed_edge = edges[0].Reversed()
+        self.assertTrue(reversed_edge in shape_set)
+        self.assertFalse(shape_set.add_new(reversed_edge))
+        oriented_set = ShapeSet(edges, use_orientation=True)
+        self.assertFalse(reversed_edge in oriented_set)
+        self.assertTrue(oriented_set.add_new(reversed_edge))
+        self.assertEqual(len(oriented_set), 13)
+        shape_set.discard(edges[0])
+        self.assertEqual(len(shape_set), 11)
+
+
+    def test_shape_dict(self):
+        shape_dict = ShapeDict()
+        for i, face in enumerate(topo.faces()):
+            shape_dict[face] = i
+        self.assertEqual(len(shape_dict), 6)
+        self.assertEqual([shape_dict[f] for f in topo.faces()], list(range(6)))
+        self.assertEqual(shape_dict[next(topo.faces()).Reversed()], 0)
+        self.assertRaises(KeyError, shape_dict.__getitem__, next(topo.edges()))
+
+
+    def test_shape_key(self):
+        face = next(topo.faces())
+        keys = set(shape_key(f) for f in topo.faces())
+        self.assertEqual(len(keys), 6)
+        self.assertEqual(shape_key(face), shape_key(face.Reversed()))
+        self.assertNotEqual(shape_key(face, use_orientation=True),
+                            shape_key(face.Reversed(), use_orientation=True))
+        self.assertTrue(all(0 <= key < 2**64 for key in keys))
+
 def suite():
     test_suite = unittest.TestSuite()
     test_suite.addTest(unittest.makeSuite(TestExtendTopology))
@@ -23,6 +23,13 @@ import core_wrapper_features_unittest
 import core_geometry_unittest
 import core_visualization_unittest
 import core_extend_topology_unittest
+import core_extend_parallel_unittest
+import core_extend_geometry_unittest
+import core_extend_mesh_unittest
+import core_extend_queries_unittest
+import core_extend_topology_index_unittest
+import core_extend_dataexchange_unittest
+import core_extend_progress_unittest
 try:
     import core_ocaf_unittest
     HAVE_OCAF = True
@@ -52,6 +59,20 @@ if HAVE_SMESH:
     tests.append(suite6)
 suite7 = core_extend_topology_unittest.suite()
 tests.append(suite7)
+suite8 = core_extend_parallel_unittest.suite()
+tests.append(suite8)
+suite9 = core_extend_geometry_unittest.suite()
+tests.append(suite9)
+suite10 = core_extend_mesh_unittest.suite()
+tests.append(suite10)
+suite11 = core_extend_queries_unittest.suite()
+tests.append(suite11)
+suite12 = core_extend_topology_index_unittest.suite()
+tests.append(suite12)
+suite13 = core_extend_dataexchange_unittest.suite()
+tests.append(suite13)
+suite14 = core_extend_progress_unittest.suite()
+tests.append(suite14)
 
 # Add test cases
 suite.addTests(tests)